@@ -0,0 +1,192 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import os
+import io
+import gc
+import json
+import time
+import shutil
+import platform
+import tempfile
+import argparse
+from collections import OrderedDict
+
+import avb
+import avb.utils
+import avb.rawcopy
+from avb.core import walk_references
+
+from . import synthetic
+
+clock = getattr(time, 'perf_counter', time.time)
+
+def timeit(func, repeat=3):
+    """
+    Returns the best wall time of repeat calls to func in seconds.
+    """
+    def timed():
+        start = clock()
+        func()
+        return clock() - start
+    return best_of(timed, repeat)
+
+def best_of(func, repeat=3):
+    """
+    Returns the smallest of the times in seconds returned by repeat calls to func,
+    for functions that time only part of their work to leave out their setup.
+    """
+    best = None
+    for i in range(repeat):
+        gc.collect()
+        elapsed = func()
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench_open(path, use_ext):
+    with avb.open(path, use_ext=use_ext) as f:
+        pass
+
+def bench_walk(path, use_ext):
+    with avb.open(path, use_ext=use_ext) as f:
+        for obj in walk_references(f.content):
+            pass
+
+def class_indices(path):
+    result = OrderedDict()
+    with avb.open(path) as f:
+        for i, chunk in enumerate(f.chunks()):
+            if i and chunk.class_id in avb.utils.AVBClaseID_dict:
+                result.setdefault(chunk.class_id, []).append(i)
+    return result
+
+def bench_decode(path, use_ext, indices):
+    # decode from the chunk data, read_object would return cached objects like the root bin
+    with avb.open(path, use_ext=use_ext) as f:
+        chunks = list(f.iter_chunk_data(indices))
+        keep = []
+        start = clock()
+        for index, class_id, data in chunks:
+            keep.append(f.decode_object(index, class_id, data))
+        return clock() - start
+
+def bench_write(path, result_path):
+    with avb.open(path) as f:
+        f.write(result_path)
+
+def bench_copy(path, result_path):
+    with avb.open(path) as a:
+        with avb.open() as b:
+            for mob in a.content.mobs:
+                b.content.add_mob(mob.copy(b))
+            b.write(result_path)
+
+def bench_raw_copy(path, result_path):
+    with avb.open(path) as a:
+        with avb.open() as b:
+            for mob in avb.rawcopy.copy_mobs(list(a.content.toplevel()), b):
+                b.content.add_mob(mob)
+            b.write(result_path)
+
+def bench_retime(path):
+    with avb.open(path) as f:
+        for effect in f.iter_class_ids([b'SPED']):
+            for param in effect.param_list:
+                if param.uuid == synthetic.PARAM_SPEED_MAP_U_ID and param.control_track:
+                    track = param.control_track
+                    start = int(track.control_points[0].time)
+                    for t, v in track.integrate(start, start + effect.length):
+                        pass
+
+def run(params, repeat=3, work_dir=None, classes=True):
+    """
+    Generates a synthetic bin with params and times the main operations on it.
+    Returns a dict of the environment, the parameters and the timings in seconds.
+    """
+    cleanup = work_dir is None
+    if work_dir is None:
+        work_dir = tempfile.mkdtemp(prefix='pyavb_bench')
+
+    try:
+        path = os.path.join(work_dir, 'synthetic.avb')
+        result_path = os.path.join(work_dir, 'result.avb')
+
+        timings = OrderedDict()
+        timings['generate'] = timeit(lambda: synthetic.write_bin(path, **params), 1)
+
+        for use_ext in (True, False):
+            suffix = '' if use_ext else '_no_ext'
+            timings['open' + suffix] = timeit(lambda: bench_open(path, use_ext), repeat)
+            timings['walk' + suffix] = timeit(lambda: bench_walk(path, use_ext), repeat)
+
+        if classes:
+            for class_id, indices in class_indices(path).items():
+                name = class_id.decode('ascii', 'replace').strip()
+                for use_ext in (True, False):
+                    suffix = '' if use_ext else '_no_ext'
+                    timings['decode_%s%s' % (name, suffix)] = best_of(
+                        lambda: bench_decode(path, use_ext, indices), repeat)
+
+        timings['write'] = timeit(lambda: bench_write(path, result_path), repeat)
+        timings['copy'] = timeit(lambda: bench_copy(path, result_path), repeat)
+        timings['raw_copy'] = timeit(lambda: bench_raw_copy(path, result_path), repeat)
+        timings['retime'] = timeit(lambda: bench_retime(path), repeat)
+
+        with avb.open(path) as f:
+            objects = len(f.object_positions) - 1
+        size = os.path.getsize(path)
+    finally:
+        if cleanup:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    return OrderedDict([
+        ('pyavb_version', getattr(avb, '__version__', None)),
+        ('python', platform.python_version()),
+        ('platform', platform.platform()),
+        ('timestamp', time.strftime('%Y-%m-%dT%H:%M:%S')),
+        ('params', params),
+        ('repeat', repeat),
+        ('file_size', size),
+        ('objects', objects),
+        ('timings', timings),
+    ])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pyavb benchmarks on a synthetic bin")
+    parser.add_argument('--masters', type=int, default=200, help="number of master mobs")
+    parser.add_argument('--sequences', type=int, default=2, help="number of sequences")
+    parser.add_argument('--components', type=int, default=500, help="components per sequence")
+    parser.add_argument('--effect-interval', type=int, default=10,
+                        help="wrap every nth clip in a motion effect, 0 disables effects")
+    parser.add_argument('--keyframes', type=int, default=16, help="keyframes per speed map")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--no-classes', action='store_true', help="skip the per class decode timings")
+    parser.add_argument('-o', '--output', help="write json results to file instead of stdout")
+    args = parser.parse_args(argv)
+
+    params = OrderedDict([
+        ('masters', args.masters),
+        ('sequences', args.sequences),
+        ('components', args.components),
+        ('effect_interval', args.effect_interval),
+        ('keyframes', args.keyframes),
+        ('seed', args.seed),
+    ])
+
+    results = run(params, args.repeat, classes=not args.no_classes)
+    data = json.dumps(results, indent=2)
+
+    if args.output:
+        with io.open(args.output, 'w') as f:
+            f.write(data)
+    else:
+        print(data)
+
+if __name__ == "__main__":
+    main()
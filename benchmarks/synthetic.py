@@ -0,0 +1,170 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import random
+from uuid import UUID
+
+import avb
+from avb.components import CP_TYPE_DOUBLE
+
+PARAM_SPEED_MAP_U_ID = UUID("8d56827c-847e-11d5-935a-50f857c10000")
+PARAM_SPEED_OFFSET_MAP_U_ID = UUID("8d56827d-847e-11d5-935a-50f857c10000")
+
+def create_track(f, index, component, edit_rate):
+    track = f.create.Track()
+    track.index = index
+    track.component = component
+    track.filler_proxy = f.create.TrackRef(edit_rate=edit_rate, media_kind=component.media_kind)
+    track.filler_proxy.length = 2147483647
+    return track
+
+def create_mastermob(f, name, length, edit_rate=25):
+    """
+    Creates a tape, file and master mob chain, returns the master mob.
+    """
+    tape_mob = f.create.Composition(mob_type="SourceMob")
+    tape_mob.descriptor = f.create.TapeDescriptor()
+    tape_mob.descriptor.mob_kind = 2
+    tape_mob.name = name + ".TAPE"
+    tape_mob.length = 10368000
+
+    timecode = f.create.Timecode(edit_rate=edit_rate, media_kind='timecode')
+    timecode.length = 10368000
+    tape_mob.tracks.append(create_track(f, 1, timecode, edit_rate))
+
+    clip = f.create.SourceClip(edit_rate=edit_rate, media_kind='picture')
+    clip.length = 10368000
+    tape_mob.tracks.append(create_track(f, 1, clip, edit_rate))
+
+    file_mob = f.create.Composition(mob_type="SourceMob")
+    file_mob.descriptor = f.create.CDCIDescriptor()
+    file_mob.descriptor.length = length
+    file_mob.descriptor.mob_kind = 1
+    file_mob.name = name
+    file_mob.length = length
+
+    clip = f.create.SourceClip(edit_rate=edit_rate, media_kind='picture')
+    clip.length = length
+    clip.track_id = 1
+    clip.start_time = edit_rate * 60 * 60
+    clip.mob_id = tape_mob.mob_id
+    file_mob.tracks.append(create_track(f, 1, clip, edit_rate))
+
+    mob = f.create.Composition(mob_type="MasterMob")
+    mob.name = name
+    mob.length = length
+
+    clip = f.create.SourceClip(edit_rate=edit_rate, media_kind='picture')
+    clip.length = length
+    clip.track_id = 1
+    clip.mob_id = file_mob.mob_id
+    mob.tracks.append(create_track(f, 1, clip, edit_rate))
+
+    f.content.add_mob(mob)
+    f.content.add_mob(file_mob)
+    f.content.add_mob(tape_mob)
+    return mob
+
+def create_param_clip(f, length, keyframes, edit_rate, rng):
+    clip = f.create.ParamClip(edit_rate=edit_rate, media_kind='DescriptiveMetadata')
+    clip.length = length
+    clip.interp_kind = 3
+    clip.value_type = CP_TYPE_DOUBLE
+    clip.extrap_kind = 1
+    clip.fields = 1
+    clip.control_points = []
+
+    for i in range(max(keyframes, 2)):
+        cp = f.create.ParamControlPoint()
+        cp.offset = [int(i * length / max(keyframes - 1, 1)), 1]
+        cp.timescale = 1
+        cp.value = rng.uniform(0.5, 2.0)
+        cp.pp = []
+        clip.control_points.append(cp)
+    return clip
+
+def create_parameter(f, uuid, control_track):
+    param = f.create.ParameterItem()
+    param.uuid = uuid
+    param.value_type = CP_TYPE_DOUBLE
+    param.value = 0.0
+    param.name = None
+    param.enable = True
+    param.control_track = control_track
+    return param
+
+def create_motion_effect(f, clip, keyframes, edit_rate, rng):
+    """
+    Wraps clip in a MotionEffect with keyframed speed and offset maps.
+    """
+    length = clip.length
+    effect = f.create.MotionEffect(edit_rate=edit_rate, media_kind='picture')
+    effect.effect_id = 'EFF_ADV_MOTION_CTL'
+    effect.length = length
+    effect.speed_ratio = [1, 1]
+    effect.phase_offset = 0
+
+    param_list = f.create.ParameterList()
+    param_list.append(create_parameter(f, PARAM_SPEED_MAP_U_ID,
+                                       create_param_clip(f, length, keyframes, edit_rate, rng)))
+    param_list.append(create_parameter(f, PARAM_SPEED_OFFSET_MAP_U_ID,
+                                       create_param_clip(f, length, keyframes, edit_rate, rng)))
+    effect.param_list = param_list
+
+    track = f.create.Track()
+    track.index = 1
+    track.component = clip
+    effect.tracks.append(track)
+    return effect
+
+def create_bin(f, masters=100, sequences=1, components=100, effect_interval=10, keyframes=16,
+               edit_rate=25, seed=0):
+    """
+    Fills the bin of f with masters master mobs and sequences sequences of components
+    components. Every effect_interval-th clip is wrapped in a MotionEffect with keyframes
+    keyframes per speed map, 0 disables effects. The same seed gives the same bin.
+    """
+    rng = random.Random(seed)
+    mastermobs = [create_mastermob(f, "clip%06d" % i, 1000, edit_rate) for i in range(masters)]
+
+    for s in range(sequences):
+        comp = f.create.Composition(mob_type="CompositionMob")
+        comp.name = "sequence%03d" % s
+        comp.usage_code = 0
+
+        sequence = f.create.Sequence(edit_rate=edit_rate, media_kind='picture')
+        sequence.components.append(f.create.Filler(edit_rate=edit_rate, media_kind='picture'))
+        for i in range(components):
+            length = rng.randint(10, 100)
+            if i % 2 or not mastermobs:
+                item = f.create.Filler(edit_rate=edit_rate, media_kind='picture')
+                item.length = length
+            else:
+                item = f.create.SourceClip(edit_rate=edit_rate, media_kind='picture')
+                item.length = length
+                item.track_id = 1
+                item.start_time = rng.randint(0, 900)
+                item.mob_id = rng.choice(mastermobs).mob_id
+                if effect_interval and (i // 2) % effect_interval == effect_interval - 1:
+                    item = create_motion_effect(f, item, keyframes, edit_rate, rng)
+            sequence.components.append(item)
+        sequence.components.append(f.create.Filler(edit_rate=edit_rate, media_kind='picture'))
+
+        comp.tracks.append(create_track(f, 1, sequence, edit_rate))
+        comp.length = sequence.length
+        f.content.add_mob(comp)
+
+    return f
+
+def write_bin(path, **kwargs):
+    """
+    Creates a synthetic bin with create_bin and writes it to path.
+    """
+    with avb.open() as f:
+        create_bin(f, **kwargs)
+        f.write(path)
+    return path
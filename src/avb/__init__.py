@@ -1,8 +1,35 @@
+import sys
+
 from .file import AVBFile as open
-from . import bin
-from . import attributes
-from . import components
-from . import trackgroups
-from . import essence
-from . import misc
-from . import interpolation
+
+# class modules are imported on first use, either through the class registries
+# in utils or as attributes of this package
+LAZY_MODULES = (
+    'bin',
+    'attributes',
+    'components',
+    'trackgroups',
+    'essence',
+    'misc',
+    'interpolation',
+)
+
+if sys.version_info < (3, 7):
+    from .snapshot import load_snapshot
+    from . import bin
+    from . import attributes
+    from . import components
+    from . import trackgroups
+    from . import essence
+    from . import misc
+    from . import interpolation
+else:
+    from importlib import import_module
+
+    def __getattr__(name):
+        if name in LAZY_MODULES:
+            return import_module('.' + name, __name__)
+        if name == 'load_snapshot':
+            from .snapshot import load_snapshot
+            return load_snapshot
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -1,6 +1,7 @@
 # cython: language_level=3, distutils: language = c++, boundscheck=False, profile=False
 
 from libcpp.vector cimport vector
+from libc.string cimport strcmp
 cimport cython
 
 IF UNAME_SYSNAME == "Windows":
@@ -19,12 +20,11 @@ IF UNAME_SYSNAME == "Windows":
 ELSE:
     from libc.stdint cimport (uint8_t, int16_t, uint32_t, int32_t, uint64_t, int64_t)
 
-from datetime import datetime
 import uuid
 
 from .utils import AVBObjectRef
 from . import utils
-from .mobid import MobID
+from .mobid import FrozenMobID
 from . import core
 
 cdef extern from "" namespace "Properties":
@@ -114,6 +114,7 @@ cdef extern from "_ext_core.cpp" nogil:
         vector[uint8_t] name
         AttrType type
         uint32_t value
+        uint32_t offset
         vector[uint8_t] data
 
     cdef struct Buffer:
@@ -137,6 +138,7 @@ cdef extern from "_ext_core.cpp" nogil:
         vector[ControlPointData] control_points
         vector[IntArrayData] arrays
         vector[BytesData] bytearrays
+        vector[uint32_t] ref_offsets
 
     cdef int read_attributes(Buffer *f, vector[AttrData] &d) except+
     cdef int read_comp(Buffer *f, Properties *p) except+
@@ -155,26 +157,71 @@ cdef extern from "_ext_core.cpp" nogil:
     cdef int read_effectparamlist(Buffer *f, Properties *p) except+
 
 cdef class AVBPropertyData(dict):
-
-    def deref(self, value):
-        if isinstance(value, utils.AVBObjectRef):
+    # reference properties named in layout are stored as plain indices of root
+    cdef public object root
+    cdef public object layout
+
+    def is_ref(self, key):
+        if self.layout is None:
+            return False
+        offset = self.layout.offsets.get(key, None)
+        return offset is not None and bool(self.layout.refs & (1 << offset))
+
+    def deref(self, value, key=None):
+        if isinstance(value, AVBObjectRef):
             return value.value
+        if key is not None and isinstance(value, core.INT_FORMAT) and self.is_ref(key):
+            return utils.deref_index(self.root, value)
         return value
 
-    def __getitem__(self, key):
-        return self.deref(super(AVBPropertyData, self).__getitem__(key))
+    def get_ref(self, key):
+        value = dict.get(self, key, None)
+        if isinstance(value, core.INT_FORMAT) and self.is_ref(key):
+            return AVBObjectRef(self.root, value)
+        if isinstance(value, AVBObjectRef):
+            return value
+        return None
 
-    def items(self):
-        for key, value in super(AVBPropertyData, self).items():
-            yield key, self.deref(value)
+    def __getitem__(self, key):
+        return self.deref(dict.__getitem__(self, key), key)
 
-    def get(self, *args, **kwargs):
-        return self.deref(super(AVBPropertyData, self).get(*args, **kwargs))
+    def __setitem__(self, key, value):
+        if isinstance(value, AVBObjectRef) and value.root is self.root and self.is_ref(key):
+            value = value.index
+        dict.__setitem__(self, key, value)
 
-cdef void refs2dict(object root, dict d, Properties* p):
+    def items(self):
+        for key, value in dict.items(self):
+            yield key, self.deref(value, key)
+
+    def values(self):
+        return [self.deref(value, key) for key, value in dict.items(self)]
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        return self.deref(dict.__getitem__(self, key), key)
+
+cdef inline set_property_data(object object_instance, dict pdata):
+    # compact files pre-allocate slot storage for each object
+    cdef object current = object_instance.property_data
+    if isinstance(current, core.AVBPropertySlots):
+        current.update(pdata)
+    else:
+        object_instance.property_data = pdata
+
+cdef void refs2dict(object root, dict d, Properties* p, object layout):
     cdef IntData item
+    cdef object name
+    cdef object offset
     for item in p.refs:
-        d[item.name.decode('utf-8')] = AVBObjectRef(root, item.data.u64)
+        name = item.name.decode('utf-8')
+        # reference properties are kept as plain indices, see AVBPropertyData
+        offset = layout.offsets.get(name, None) if layout is not None else None
+        if offset is not None and layout.refs & (1 << offset):
+            d[name] = item.data.u64
+        else:
+            d[name] = AVBObjectRef(root, item.data.u64)
 
 cdef void reflist2dict(object root, dict d, Properties* p):
     cdef RefListData item
@@ -233,12 +280,12 @@ cdef void controlpoints2dict(object root, dict d, Properties* p):
                     ppdata['value'] = pp.value
 
                 py_pp = pp_obj_class.__new__(pp_obj_class, root=root)
-                py_pp.property_data = ppdata
+                set_property_data(py_pp, ppdata)
                 pp_list.append(py_pp)
 
             cpdata['pp'] = pp_list
             py_cp = obj_class.__new__(obj_class, root=root)
-            py_cp.property_data = cpdata
+            set_property_data(py_cp, cpdata)
             control_point_list.append(py_cp)
 
         d[item.name.decode("utf-8")] = control_point_list
@@ -256,7 +303,8 @@ cdef void ints2dict(dict d, Properties* p):
 cdef void dates2dict(dict d, Properties* p):
     cdef IntData item
     for item in p.dates:
-        d[item.name.decode('utf-8')] = datetime.fromtimestamp(item.data.u64)
+        # raw timestamps, converted to datetime on access
+        d[item.name.decode('utf-8')] = item.data.u64
 
 cdef void doubles2dict(dict d, Properties *p):
     cdef DoubleData item
@@ -290,9 +338,20 @@ cdef void mob_id2dict(dict d, Properties *p):
         ptr = &item.data[0]
         data = <bytes> ptr[:32]
 
-        d[item.name.decode('utf-8')] = MobID(bytes_le=data)
+        d[item.name.decode('utf-8')] = FrozenMobID(bytes_le=data)
 
-cdef void strings2dict(dict d, Properties *p):
+cdef inline object decode_string(dict table, const char *ptr, size_t size):
+    cdef bytes data = ptr[:size]
+    if table is None:
+        return data.decode("macroman")
+
+    value = table.get(data, None)
+    if value is None:
+        value = data.decode("macroman")
+        table[data] = value
+    return value
+
+cdef void strings2dict(dict table, dict d, Properties *p):
     cdef const char * ptr
 
     cdef StringData item
@@ -303,11 +362,11 @@ cdef void strings2dict(dict d, Properties *p):
 
         if data_size > 0:
             ptr = <const char *>&item.data[0]
-            d[item.name.decode('utf-8')] = ptr[:data_size].decode("macroman")
+            d[item.name.decode('utf-8')] = decode_string(table, ptr, data_size)
         else:
             d[item.name.decode('utf-8')] = u""
 
-cdef void children2dict(object root, dict d, Properties *p):
+cdef void children2dict(object root, dict d, Properties *p, object owner):
     cdef ChildData item
     cdef Properties child_properties
 
@@ -318,15 +377,15 @@ cdef void children2dict(object root, dict d, Properties *p):
         plist = []
 
         for child_properties in item.data:
-            pdata = process_poperties(root, &child_properties)
-
             if child_properties.type == TRACK:
                 obj_class = utils.AVBClassName_dict['Track']
+                object_instance = obj_class.__new__(obj_class, root=root, owner=owner)
             elif child_properties.type == PARAM:
                 obj_class = utils.AVBClassName_dict['EffectParam']
+                object_instance = obj_class.__new__(obj_class, root=root)
 
-            object_instance = obj_class.__new__(obj_class, root=root)
-            object_instance.property_data = pdata
+            pdata = process_poperties(root, &child_properties, object_instance)
+            set_property_data(object_instance, pdata)
             plist.append(object_instance)
 
         d[item.name.decode('utf-8')] = plist
@@ -355,11 +414,13 @@ cdef void bytearray2dict(dict d, Properties *p):
         else:
             d[item.name.decode('utf-8')] = bytearray()
 
-cdef dict process_poperties(object root, Properties *p):
-    cdef dict result = AVBPropertyData()
+cdef dict process_poperties(object root, Properties *p, object object_instance):
+    cdef AVBPropertyData result = AVBPropertyData()
+    result.root = root
+    result.layout = getattr(object_instance.property_data, 'layout', None)
 
     if p.refs.size():
-        refs2dict(root, result, p)
+        refs2dict(root, result, p, result.layout)
     if p.reflists.size():
         reflist2dict(root, result, p)
     if p.ints.size():
@@ -367,7 +428,7 @@ cdef dict process_poperties(object root, Properties *p):
     if p.doubles.size():
         doubles2dict(result, p)
     if p.strings.size():
-        strings2dict(result, p)
+        strings2dict(getattr(root, 'string_table', None), result, p)
     if p.bools.size():
         bools2dict(result, p)
     if p.uuids.size():
@@ -383,7 +444,7 @@ cdef dict process_poperties(object root, Properties *p):
     if p.control_points.size():
         controlpoints2dict(root, result, p)
     if p.children.size():
-        children2dict(root, result, p)
+        children2dict(root, result, p, object_instance)
 
     return result
 
@@ -403,6 +464,7 @@ def read_attr_data(root, object_instance, const unsigned char[:] data):
     cdef const char * ptr
     cdef size_t data_size;
     cdef int ret = 0
+    cdef dict table = getattr(root, 'string_table', None)
 
     with nogil:
         ret = read_attributes(&buf, d)
@@ -421,7 +483,7 @@ def read_attr_data(root, object_instance, const unsigned char[:] data):
             data_size = item.data.size()
             if data_size > 0:
                 ptr =  <const char *>&item.data[0]
-                value = ptr[:data_size].decode('macroman')
+                value = decode_string(table, ptr, data_size)
             else:
                 value = ""
 
@@ -438,7 +500,7 @@ def read_attr_data(root, object_instance, const unsigned char[:] data):
 
         data_size = item.name.size()
         ptr =  <const char *>&item.name[0]
-        object_instance[ptr[:data_size].decode('macroman')] = value
+        object_instance[decode_string(table, ptr, data_size)] = value
 
 # cdef print_property_sizes(Properties *p):
 #     print("refs",           p.refs.size())
@@ -468,9 +530,9 @@ def read_sequence_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading SEQU: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_sourceclip_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -487,9 +549,9 @@ def read_sourceclip_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading SCLP: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_paramclip_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -509,9 +571,9 @@ def read_paramclip_data(root, object_instance, const unsigned char[:] data):
         raise ValueError("Error reading PRCL: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_paramitem_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -529,9 +591,9 @@ def read_paramitem_data(root, object_instance, const unsigned char[:] data):
         raise ValueError("Error reading PRIT: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_trackref_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -548,9 +610,9 @@ def read_trackref_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading TRKR: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_filler_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -567,9 +629,9 @@ def read_filler_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading FILL: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def reads_selector_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -586,9 +648,9 @@ def reads_selector_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading SLCT: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_composition_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -609,9 +671,9 @@ def read_composition_data(root, object_instance, const unsigned char[:] data):
         raise ValueError("Error reading CMPO: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_media_descriptor_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -629,9 +691,9 @@ def read_media_descriptor_data(root, object_instance, const unsigned char[:] dat
         raise ValueError("Error reading MDES: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_did_descriptor_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -649,9 +711,9 @@ def read_did_descriptor_data(root, object_instance, const unsigned char[:] data)
         raise ValueError("Error reading DIDD: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 
 def read_cdci_descriptor_data(root, object_instance, const unsigned char[:] data):
@@ -670,9 +732,9 @@ def read_cdci_descriptor_data(root, object_instance, const unsigned char[:] data
         raise ValueError("Error reading CDCI: %s" % buf.error_message.decode("utf-8"))
 
     # print_property_sizes(&p)
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_trackeffect_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -691,10 +753,10 @@ def read_trackeffect_data(root, object_instance, const unsigned char[:] data):
     if ret < 0:
         raise ValueError("Error reading TKFX: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
 
     # print_property_sizes(&p)
-    object_instance.property_data = result
+    set_property_data(object_instance, result)
 
 def read_effectparamlist_data(root, object_instance, const unsigned char[:] data):
     cdef Buffer buf
@@ -711,10 +773,172 @@ def read_effectparamlist_data(root, object_instance, const unsigned char[:] data
     if ret < 0:
         raise ValueError("Error reading FXPS: %s" % buf.error_message.decode("utf-8"))
 
-    cdef dict result = process_poperties(root, &p)
+    cdef dict result = process_poperties(root, &p, object_instance)
+
+    set_property_data(object_instance, result)
+
+cdef void collect_ref_offsets(Properties *p, list offsets):
+    cdef uint32_t offset
+    cdef ChildData item
+    cdef Properties child_properties
+
+    for offset in p.ref_offsets:
+        offsets.append(offset)
+
+    for item in p.children:
+        for child_properties in item.data:
+            collect_ref_offsets(&child_properties, offsets)
+
+def read_ref_offsets(bytes class_id, const unsigned char[:] data):
+    """
+    Returns the sorted offsets of the object indices stored in a chunk,
+    without creating any python objects for its properties.
+    """
+    cdef Buffer buf
+    buf.root = &data[0]
+    buf.ptr =  &data[0]
+    buf.end = &data[-1]
+    buf.error_message = ""
+
+    cdef Properties p
+    cdef vector[AttrData] attrs
+    cdef AttrData attr
+    cdef list offsets = []
+    cdef int ret = 0
 
-    object_instance.property_data = result
+    if class_id == b'ATTR':
+        with nogil:
+            ret = read_attributes(&buf, attrs)
+        if ret < 0:
+            raise ValueError("Error reading ATTR: %s" % buf.error_message.decode("utf-8"))
+        for attr in attrs:
+            if attr.type == OBJ_ATTR:
+                offsets.append(attr.offset)
+        return offsets
+
+    read_properties(class_id, &buf, &p)
+    collect_ref_offsets(&p, offsets)
+    offsets.sort()
+    return offsets
+
+cdef int read_properties(bytes class_id, Buffer *buf, Properties *p) except -1:
+    cdef int ret = 0
+
+    if class_id == b'CMPO':
+        ret = read_composition(buf, p)
+    elif class_id == b'TKFX':
+        ret = read_trackeffect(buf, p)
+    elif class_id == b'MDES':
+        ret = read_media_descriptor(buf, p)
+    elif class_id == b'DIDD':
+        ret = read_did_descriptor(buf, p)
+    elif class_id == b'CDCI':
+        ret = read_cdci_descriptor(buf, p)
+    elif class_id == b'SLCT':
+        ret = read_selector(buf, p)
+    elif class_id == b'SEQU':
+        ret = read_sequence(buf, p)
+    elif class_id == b'FILL':
+        ret = read_filler(buf, p)
+    elif class_id == b'SCLP':
+        ret = read_sourceclip(buf, p)
+    elif class_id == b'PRCL':
+        ret = read_paramclip(buf, p)
+    elif class_id == b'PRIT':
+        ret = read_paramitem(buf, p)
+    elif class_id == b'TRKR':
+        ret = read_trackref(buf, p)
+    elif class_id == b'FXPS':
+        ret = read_effectparamlist(buf, p)
+    else:
+        raise NotImplementedError(class_id)
+
+    if ret < 0:
+        raise ValueError("Error reading %s: %s" % (class_id, buf.error_message.decode("utf-8")))
+    return 0
+
+cdef object scalar_property(Properties *p, const char *name, object missing):
+    # only the requested property is converted to a python value
+    cdef IntData int_item
+    cdef BoolData bool_item
+    cdef DoubleData double_item
+    cdef StringData string_item
+    cdef BytesData bytes_item
+    cdef const uint8_t *ptr
+
+    for int_item in p.ints:
+        if strcmp(int_item.name, name) == 0:
+            if int_item.is_signed:
+                return int_item.data.s64
+            return int_item.data.u64
+    for int_item in p.dates:
+        if strcmp(int_item.name, name) == 0:
+            return int_item.data.u64
+    for bool_item in p.bools:
+        if strcmp(bool_item.name, name) == 0:
+            return bool_item.data
+    for double_item in p.doubles:
+        if strcmp(double_item.name, name) == 0:
+            return double_item.data
+    for string_item in p.strings:
+        if strcmp(string_item.name, name) == 0:
+            if string_item.data.size() == 0:
+                return u""
+            return decode_string(None, <const char *>&string_item.data[0], string_item.data.size())
+    for bytes_item in p.mob_ids:
+        if strcmp(bytes_item.name, name) == 0:
+            ptr = &bytes_item.data[0]
+            return FrozenMobID(bytes_le=<bytes> ptr[:32])
+    return missing
+
+def match_chunk(bytes class_id, const unsigned char[:] data, list predicates, object missing):
+    """
+    Parses a chunk with the native reader and tests its scalar properties without
+    creating the object. predicates is a list of (name, test) with name as bytes.
+    Returns False if a test fails, None if a property is not known to the native
+    reader and True otherwise. Attributes have no scalar properties and always
+    return None.
+    """
+    if class_id == b'ATTR':
+        return None
+
+    cdef Buffer buf
+    buf.root = &data[0]
+    buf.ptr =  &data[0]
+    buf.end = &data[-1]
+    buf.error_message = ""
+
+    cdef Properties p
+    cdef bytes name
+    cdef object value
+    cdef object result = True
+
+    read_properties(class_id, &buf, &p)
+
+    for name, test in predicates:
+        value = scalar_property(&p, name, missing)
+        if value is missing:
+            result = None
+        elif not test(value):
+            return False
+    return result
+
+def chunk_properties(bytes class_id, const unsigned char[:] data, list names, object missing):
+    """
+    Parses a chunk with the native reader and returns the values of the scalar
+    properties names, given as bytes, or missing for those it does not know.
+    """
+    cdef Buffer buf
+    buf.root = &data[0]
+    buf.ptr =  &data[0]
+    buf.end = &data[-1]
+    buf.error_message = ""
+
+    cdef Properties p
+    cdef bytes name
 
+    read_properties(class_id, &buf, &p)
+    return [scalar_property(&p, name, missing) for name in names]
 
 READERS = {
 b'CMPO': read_composition_data,
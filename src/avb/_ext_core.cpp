@@ -140,6 +140,7 @@ struct AttrData {
     vector<uint8_t> name;
     AttrType type;
     uint32_t value;
+    uint32_t offset;
     vector<uint8_t> data;
 };
 
@@ -163,6 +164,7 @@ struct Properties {
     vector<ControlPointData> control_points;
     vector<IntArrayData> arrays;
     vector<BytesData> bytearrays;
+    vector<uint32_t> ref_offsets;
 };
 
 static inline uint8_t read_u8(Buffer *f)
@@ -279,6 +281,19 @@ static inline void add_object_ref(Properties *p, const char* name, uint64_t valu
     p->refs.push_back(d);
 }
 
+static inline uint32_t read_ref_index(Properties *p, Buffer *f)
+{
+    // remember where the index is stored in the chunk
+    p->ref_offsets.push_back((uint32_t)(f->ptr - f->root));
+    return read_u32le(f);
+}
+
+static inline void read_object_ref(Properties *p, Buffer *f, const char* name)
+{
+    uint32_t value = read_ref_index(p, f);
+    add_object_ref(p, name, value);
+}
+
 static inline void add_uint(Properties *p, const char* name, uint64_t value)
 {
     IntData d = {};
@@ -425,8 +440,8 @@ static int read_comp(Buffer *f, Properties *p)
     read_assert_tag(f, 0x02);
     read_assert_tag(f, 0x03);
 
-    add_object_ref(p, "left_bob", read_u32le(f));
-    add_object_ref(p, "right_bob", read_u32le(f));
+    read_object_ref(p, f, "left_bob");
+    read_object_ref(p, f, "right_bob");
 
     add_uint(p, "media_kind_id", read_u16le(f));
 
@@ -435,16 +450,16 @@ static int read_comp(Buffer *f, Properties *p)
     add_string(p, f, "name", MACROMAN);
     add_string(p, f, "effect_id", MACROMAN);
 
-    add_object_ref(p, "attributes", read_u32le(f));
-    add_object_ref(p, "session_attrs", read_u32le(f));
-    add_object_ref(p, "precomputed", read_u32le(f));
+    read_object_ref(p, f, "attributes");
+    read_object_ref(p, f, "session_attrs");
+    read_object_ref(p, f, "precomputed");
 
     while (iter_ext(f)) {
         uint8_t tag = read_u8(f);
         switch (tag) {
             case 0x01:
                 read_assert_tag(f, 72);
-                add_object_ref(p, "param_list", read_u32le(f));
+                read_object_ref(p, f, "param_list");
                 break;
             default:
                 fprintf(stderr, "unknown ext tag: %d\n", tag);
@@ -468,7 +483,7 @@ static int read_sequence(Buffer *f, Properties *p)
     reflist.name = "components";
     reflist.data.reserve(count);
     for (size_t i =0; i < count; i++) {
-        reflist.data.push_back(read_u32le(f));
+        reflist.data.push_back(read_ref_index(p, f));
     }
 
     read_assert_tag(f, 0x03);
@@ -561,7 +576,7 @@ static int read_paramclip(Buffer *f, Properties *p)
                 cp->double_value = read_double_le(f);
                 break;
             case CP_TYPE_REFERENCE:
-                cp->value = read_u32le(f);
+                cp->value = read_ref_index(p, f);
                 break;
             default:
                 fprintf(stderr, "unknown value_type: %d\n", value_type);
@@ -627,7 +642,7 @@ static int read_paramitem(Buffer *f, Properties *p)
             add_double(p, "value", read_double_le(f));
             break;
         case 4:
-            add_object_ref(p, "value", read_u32le(f));
+            read_object_ref(p, f, "value");
             break;
         default:
             fprintf(stderr, "unknown value_type: %d\n", value_type);
@@ -637,7 +652,7 @@ static int read_paramitem(Buffer *f, Properties *p)
 
     add_string(p, f, "name", MACROMAN);
     add_bool(p, "enable", read_bool(f));
-    add_object_ref(p, "control_track", read_u32le(f));
+    read_object_ref(p, f, "control_track");
 
     while (iter_ext(f)) {
         uint8_t tag = read_u8(f);
@@ -696,19 +711,19 @@ static int read_trackgroup(Buffer *f, Properties *p)
             add_int(&track, "index", (int16_t)read_u16le(f));
 
         if (flags & TRACK_ATTRIBUTES_FLAG)
-            add_object_ref(&track, "attributes", read_u32le(f));
+            read_object_ref(&track, f, "attributes");
 
         if (flags & TRACK_SESSION_ATTR_FLAG)
-            add_object_ref(&track, "session_attr", read_u32le(f));
+            read_object_ref(&track, f, "session_attr");
 
         if (flags & TRACK_COMPONENT_FLAG)
-            add_object_ref(&track, "component", read_u32le(f));
+            read_object_ref(&track, f, "component");
 
         if (flags & TRACK_FILLER_PROXY_FLAG)
-            add_object_ref(&track, "filler_proxy", read_u32le(f));
+            read_object_ref(&track, f, "filler_proxy");
 
         if (flags & TRACK_BOB_DATA_FLAG)
-            add_object_ref(&track, "bob_data", read_u32le(f));
+            read_object_ref(&track, f, "bob_data");
 
         if (flags & TRACK_CONTROL_CODE_FLAG)
             add_int(&track, "control_code", (int16_t)read_u16le(f));
@@ -766,7 +781,7 @@ static int read_trackeffect(Buffer *f, Properties *p)
     add_int(p, "info_is_reversed",  (int8_t)read_u8(f));
     add_bool(p, "info_aspect_on",   read_bool(f));
 
-    add_object_ref(p, "keyframes",       read_u32le(f));
+    read_object_ref(p, f, "keyframes");
     add_bool(p, "info_force_software",   read_bool(f));
     add_bool(p, "info_never_hardware",   read_bool(f));
 
@@ -775,7 +790,7 @@ static int read_trackeffect(Buffer *f, Properties *p)
         switch (tag) {
             case 0x02:
                 read_assert_tag(f, 72);
-                add_object_ref(p, "trackman", read_u32le(f));
+                read_object_ref(p, f, "trackman");
                 break;
             default:
                 fprintf(stderr, "unknown ext tag: %d\n", tag);
@@ -815,7 +830,7 @@ static int read_composition(Buffer *f, Properties *p)
     add_date(p, "last_modified", read_u32le(f));
     add_uint(p, "mob_type_id", read_u8(f));
     add_int(p, "usage_code", read_u32le(f));
-    add_object_ref(p, "descriptor", read_u32le(f));
+    read_object_ref(p, f, "descriptor");
 
     while (iter_ext(f)) {
         uint8_t tag = read_u8(f);
@@ -845,9 +860,9 @@ static int read_media_descriptor(Buffer *f,  Properties *p)
     read_assert_tag(f, 0x03);
 
     add_uint(p, "mob_kind", read_u8(f));
-    add_object_ref(p, "locator", read_u32le(f));
+    read_object_ref(p, f, "locator");
     add_bool(p, "intermediate", read_bool(f));
-    add_object_ref(p, "physical_media", read_u32le(f));
+    read_object_ref(p, f, "physical_media");
 
     while (iter_ext(f)) {
         uint8_t tag = read_u8(f);
@@ -867,7 +882,7 @@ static int read_media_descriptor(Buffer *f,  Properties *p)
             read_data32(f, data);
         } else if (tag == 0x03 ) {
             read_assert_tag(f, 72);
-            add_object_ref(p, "attributes", read_u32le(f));
+            read_object_ref(p, f, "attributes");
         } else {
             fprintf(stderr, "unknown ext tag: %d\n", tag);
             f->error_message = ASSERT_MESSAGE;
@@ -930,7 +945,7 @@ static int read_did_descriptor(Buffer *f,  Properties *p)
     add_bool(p, "uniformness",         read_bool(f));
     add_int(p, "did_image_size",       (int32_t)read_u32le(f));
 
-    add_object_ref(p, "next_did_desc", read_u32le(f));
+    read_object_ref(p, f, "next_did_desc");
 
     vector<uint8_t> &compress_method = add_bytearray(p, "compress_method");
     compress_method.resize(4);
@@ -1248,6 +1263,7 @@ static int read_attributes(Buffer *f, std::vector<AttrData> &d)
                 read_data16(f, ptr->data);
                 break;
             case OBJ_ATTR:
+                ptr->offset = (uint32_t)(f->ptr - f->root);
                 ptr->value = read_u32le(f);
                 break;
             case BOB_ATTR:
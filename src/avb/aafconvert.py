@@ -0,0 +1,630 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+from uuid import UUID
+
+from . import essence
+from . import components
+from . import trackgroups
+from .file import AVBFile
+
+try:
+    import aaf2
+    from aaf2.rational import AAFRational
+    from aaf2.mobid import MobID as AAFMobID
+except ImportError:
+    aaf2 = None
+
+try:
+    from urllib.request import pathname2url
+except ImportError:
+    from urllib import pathname2url
+
+TRACK_TYPES = ('picture', 'sound', 'edgecode', 'timecode', 'DescriptiveMetadata')
+
+INTERP_KINDS = {
+    2: 'ConstantInterp',
+    3: 'LinearInterp',
+    5: 'AvidBezierInterpolator',
+    6: 'AvidCubicInterpolator',
+}
+
+EXTRAP_KINDS = {
+    1: UUID('0e24dd54-66cd-4f1a-b0a0-670ac3a7a0b3'),
+}
+
+PP_CODES = {
+    5:  'PP_IN_TANGENT_POS_U',
+    6:  'PP_IN_TANGENT_VAL_U',
+    7:  'PP_OUT_TANGENT_POS_U',
+    8:  'PP_OUT_TANGENT_VAL_U',
+    9:  'PP_TANGENT_MODE_U',
+    14: 'PP_BASE_FRAME_U',
+}
+
+SPEED_MAP_PARAMS = {
+    UUID("8d56827c-847e-11d5-935a-50f857c10000"): 'PARAM_SPEED_MAP_U',
+    UUID("8d56827d-847e-11d5-935a-50f857c10000"): 'PARAM_SPEED_OFFSET_MAP_U',
+}
+
+def nice_edit_rate(rate):
+    if rate == 24:
+        return "24/1"
+    elif rate ==  23.976:
+        return "24000/1001"
+    elif rate == 29.97:
+        return "30000/1001"
+
+    if int(rate) == rate:
+        return "%d/1" % int(rate)
+
+    return "%d/%d" % (int(rate * 1000), 1000)
+
+def is_zero_mob_id(mob_id):
+    material = mob_id.material
+    lo = material.time_low
+    hi = material.time_mid + (material.time_hi_version << 16)
+    return lo == 0 and hi == 0
+
+def iter_tracks(avb_mob):
+    """
+    Yields the tracks of avb_mob in AAF slot order, grouped by media kind.
+    """
+    track_dict = {}
+    for track in avb_mob.tracks:
+        media_kind = track.component.media_kind
+        track_dict.setdefault(media_kind, []).append(track)
+
+    for track_type in TRACK_TYPES:
+        for track in track_dict.get(track_type, []):
+            yield track
+
+def conversion_order(avb_bin, mobs=None):
+    """
+    Returns (mob_id, instance_id) for mobs, the toplevel mobs of avb_bin by default,
+    and every mob they depend on, with dependencies first. The order is found from
+    the mob graph of the bin, which only holds indices, so the mobs themselves can
+    be released while converting.
+    """
+    graph = avb_bin.mob_graph()
+    if mobs is None:
+        mobs = avb_bin.select([('mob_type', '==', 'CompositionMob'), ('usage_code', '==', 0)])
+    mob_ids = [mob.mob_id for mob in mobs]
+    return [(mob_id, graph.index_of(mob_id)) for mob_id in graph.postorder(mob_ids)]
+
+def register_definitions(f):
+    def register(def_obj):
+        f.dictionary.register_def(def_obj)
+        return def_obj
+
+    def op_def(auid, name, media_kind, time_warp, bypass, inputs):
+        op = register(f.create.OperationDef(auid, name, ''))
+        op.media_kind = media_kind
+        op['IsTimeWarp'].value = time_warp
+        op['Bypass'].value = bypass
+        op['NumberInputs'].value = inputs
+        op['OperationCategory'].value = 'OperationCategory_Effect'
+        return op
+
+    def param_def(auid, name, typedef):
+        return register(f.create.ParameterDef(auid, name, '', typedef))
+
+    param_byteorder = param_def("c0038672-a8cf-11d3-a05b-006094eb75cb", "AvidParameterByteOrder", 'aafUInt16')
+    param_effect_id = param_def("93994bd6-a81d-11d3-a05b-006094eb75cb", "AvidEffectID", 'AvidBagOfBits')
+
+    op = op_def('89d9b67e-5584-302d-9abd-8bd330c46841', 'VideoDissolve_2', 'picture', False, 1, 2)
+    op.parameters.extend([param_byteorder, param_effect_id])
+
+    # note not part of VideoDissolve_2 op_def but still used...
+    param_def('8d56813d-847e-11d5-935a-50f857c10000', 'AFX_FG_KEY_OPACITY_U', 'Rational')
+
+    register(f.create.InterpolationDef('5b6c85a4-0ede-11d3-80a9-006008143e6f', 'LinearInterp', ''))
+    register(f.create.InterpolationDef('a04a5439-8a0e-4cb7-975f-a5b255866883', 'AvidCubicInterpolator', ''))
+    register(f.create.InterpolationDef('5b6c85a5-0ede-11d3-80a9-006008143e6f', 'ConstantInterp', ''))
+    register(f.create.InterpolationDef('df394eda-6ac6-4566-8dbe-f28b0bdd781a', 'AvidBezierInterpolator', ''))
+    register(f.create.InterpolationDef('5b6c85a3-0ede-11d3-80a9-006008143e6f', 'NoInterp', ''))
+
+    op = op_def('0c3bea41-fc05-11d2-8a29-0050040ef7d2', 'Audio Dissolve', 'sound', False, 1, 2)
+    op.parameters.extend([param_byteorder, param_effect_id])
+
+    op = op_def('9d2ea890-0968-11d3-8a38-0050040ef7d2', 'Motion Control', 'picture', True, 0, 1)
+    op.parameters.extend([
+        param_def("f7ffed29-fc8e-43ed-943a-4b57b5c157ee", "AvidMotionPulldown", 'aafInt32'),
+        param_def("8dde1839-6862-4874-a1e9-4fbd1164f22a", "AvidMotionOutputFormat", 'aafInt32'),
+        param_def("5b22ff71-c51b-11d3-a069-006094eb75cb", "AvidPhase", 'aafInt32'),
+        param_def("72559a80-24d7-11d3-8a50-0050040ef7d2", "SpeedRatio", 'Rational'),
+        param_def("1c5a02d5-e503-4ca6-8617-d7914bb8ac03", "AvidMotionInputFormat", 'Rational'),
+    ])
+
+    # used on Motion Control but not part of op_def
+    param_def("8d56827c-847e-11d5-935a-50f857c10000", "PARAM_SPEED_MAP_U", 'Rational')
+    param_def("8d56827d-847e-11d5-935a-50f857c10000", "PARAM_SPEED_OFFSET_MAP_U", 'Rational')
+    param_def("8d568283-847e-11d5-935a-50f857c10000", "PARAM_PULLDOWN_PHASE_U", 'Rational')
+    param_def('8d56830e-847e-11d5-935a-50f857c10000', 'PP_IN_TANGENT_POS_U', 'Rational')
+    param_def('8d56830f-847e-11d5-935a-50f857c10000', 'PP_IN_TANGENT_VAL_U', 'Rational')
+    param_def('8d568310-847e-11d5-935a-50f857c10000', 'PP_OUT_TANGENT_POS_U', 'Rational')
+    param_def('8d568311-847e-11d5-935a-50f857c10000', 'PP_OUT_TANGENT_VAL_U', 'Rational')
+    param_def('8d568312-847e-11d5-935a-50f857c10000', 'PP_TANGENT_MODE_U', 'Rational')
+    param_def('8d568313-847e-11d5-935a-50f857c10000', 'PP_BASE_FRAME_U', 'Rational')
+
+    op = op_def('2db619ef-7210-4e89-95d7-970336d72e8c', 'Title_2', 'picture', False, 0, 3)
+    op.parameters.extend([
+        param_def('1fdd2907-e48c-11d3-a078-006094eb75cb', 'AvidGraphicFXAttr', 'AvidBagOfBits'),
+        param_byteorder,
+        param_effect_id,
+    ])
+
+class AAFConverter(object):
+    """
+    Converts the mobs of AVB bins into an open aaf2 file.
+
+    Mobs are converted once, keyed by mob_id, the slot ids of every converted mob
+    are remembered so SourceClips never have to revisit the mob they point at.
+    With release set only mob ids are held between mobs, the AVB objects of a
+    converted mob are garbage collected once nothing else references them.
+    """
+    def __init__(self, aaf_file, release=True):
+        if aaf2 is None:
+            raise ImportError("pyaaf2 is required for AAF conversion")
+
+        self.aaf_file = aaf_file
+        self.release = release
+        self.mobs = {}
+        self.slot_ids = {}
+        self.definitions_registered = False
+        self.converters = {}
+
+    def register_definitions(self):
+        if not self.definitions_registered:
+            register_definitions(self.aaf_file)
+            self.definitions_registered = True
+
+    def convert_bin(self, avb_file, mobs=None):
+        """
+        Converts the toplevel mobs of avb_file, or mobs, and all their dependencies.
+        Yields every AAF mob as it is added.
+        """
+        self.register_definitions()
+        for mob_id, instance_id in conversion_order(avb_file.content, mobs):
+            if self.aaf_mob_id(mob_id) in self.mobs:
+                continue
+            avb_mob = avb_file.read_object(instance_id)
+            aaf_mob = self.convert_composition(avb_mob)
+            if self.release:
+                del avb_mob
+            yield aaf_mob
+
+    def aaf_mob_id(self, mob_id):
+        return AAFMobID(bytes_le=mob_id.bytes_le)
+
+    # descriptors
+
+    def convert_descriptor(self, d):
+        f = self.aaf_file
+        d_type = type(d)
+        if d_type is essence.MediaDescriptor:
+            descriptor = f.create.ImportDescriptor()
+
+        elif d_type is essence.TapeDescriptor:
+            descriptor = f.create.TapeDescriptor()
+
+        elif d_type is essence.PCMADescriptor:
+            descriptor = f.create.PCMDescriptor()
+            descriptor['AverageBPS'].value = d.average_bps
+            descriptor['BlockAlign'].value = d.block_align
+            descriptor["SampleRate"].value = nice_edit_rate(d.sample_rate)
+            descriptor["AudioSamplingRate"].value = nice_edit_rate(d.sample_rate)
+            descriptor["QuantizationBits"].value = d.quantization_bits
+            descriptor["Channels"].value = 1
+
+        elif isinstance(d, essence.DIDDescriptor):
+            if d_type is essence.CDCIDescriptor:
+                descriptor = f.create.CDCIDescriptor()
+                descriptor['ComponentWidth'].value = d.component_width
+                descriptor['HorizontalSubsampling'].value = d.horizontal_subsampling
+                descriptor['VerticalSubsampling'].value = d.vertical_subsampling
+                descriptor['ResolutionID'].value = d.resolution_id
+                descriptor['ImageAlignmentFactor'].value = d.image_alignment_factor
+            elif d_type is essence.RGBADescriptor:
+                descriptor = f.create.RGBADescriptor()
+                descriptor['PixelLayout'].value = d.pixel_layout
+            else:
+                raise ValueError("unhandled digital image descriptor: %s" % str(d.class_id))
+
+            descriptor['StoredHeight'].value = d.stored_height
+            descriptor['StoredWidth'].value = d.stored_width
+            descriptor['ImageAspectRatio'].value = "{}/{}".format(*d.aspect_ratio)
+            descriptor['FrameLayout'].value = d.frame_layout
+            descriptor['VideoLineMap'].value = d.line_map
+            descriptor['SampleRate'].value = 0
+
+        elif isinstance(d, essence.MultiDescriptor):
+            descriptor = f.create.MultipleDescriptor()
+            descriptor['SampleRate'].value = 0
+            for item in d.descriptors:
+                descriptor['FileDescriptors'].append(self.convert_descriptor(item))
+        else:
+            raise ValueError("unhandled descriptor: %s" % str(d.class_id))
+
+        if hasattr(d, 'length'):
+            descriptor["Length"].value = d.length
+
+        if d.physical_media:
+            loc = d.physical_media.locator
+            n = f.create.NetworkLocator()
+            n['URLString'].value = "file:///" + pathname2url(loc.path)
+            descriptor['Locator'].append(n)
+
+        return descriptor
+
+    # components
+
+    def converter(self, avb_component):
+        # the converter of each class is looked up once
+        cls = type(avb_component)
+        method = self.converters.get(cls, None)
+        if method is None:
+            method = self.convert_filler
+            for base, name in (
+                    (components.SourceClip, 'convert_source_clip'),
+                    (components.Sequence, 'convert_sequence'),
+                    (components.Timecode, 'convert_timecode'),
+                    (components.Edgecode, 'convert_edgecode'),
+                    (trackgroups.TransitionEffect, 'convert_transition'),
+                    (trackgroups.Selector, 'convert_selector'),
+                    (trackgroups.TrackEffect, 'convert_track_effect'),
+                    (trackgroups.CaptureMask, 'convert_capture_mask'),
+                    (trackgroups.MotionEffect, 'convert_motion_effect'),
+                    (trackgroups.EssenceGroup, 'convert_essence_group')):
+                if issubclass(cls, base):
+                    method = getattr(self, name)
+                    break
+            self.converters[cls] = method
+        return method
+
+    def convert_component(self, avb_component):
+        aaf_component = self.converter(avb_component)(avb_component)
+        aaf_component.media_kind = avb_component.media_kind
+        aaf_component.length = avb_component.length
+        return aaf_component
+
+    def convert_filler(self, avb_component):
+        return self.aaf_file.create.Filler()
+
+    def convert_timecode(self, avb_timecode):
+        timecode = self.aaf_file.create.Timecode()
+        timecode['Start'].value = avb_timecode.start
+        timecode['FPS'].value = avb_timecode.fps
+        return timecode
+
+    def source_slot_id(self, avb_source_clip):
+        mob_id = avb_source_clip.mob_id
+        aaf_mob_id = self.aaf_mob_id(mob_id)
+        if aaf_mob_id not in self.mobs:
+            # not reached through the conversion order, convert it now
+            avb_mob = avb_source_clip.root.content.find_by_mob_id(mob_id)
+            if avb_mob is None:
+                raise ValueError("source mob not found: %s" % str(mob_id))
+            self.convert_composition(avb_mob)
+
+        key = (avb_source_clip.track_id, avb_source_clip.media_kind)
+        slot_id = self.slot_ids[aaf_mob_id].get(key, None)
+        if slot_id is None:
+            raise ValueError("track %d %s not found in %s" % (key[0], key[1], str(mob_id)))
+        return slot_id
+
+    def convert_source_clip(self, avb_source_clip):
+        if is_zero_mob_id(avb_source_clip.mob_id):
+            mob_id = AAFMobID()
+            slot_id = 0
+        else:
+            mob_id = self.aaf_mob_id(avb_source_clip.mob_id)
+            slot_id = self.source_slot_id(avb_source_clip)
+
+        aaf_component = self.aaf_file.create.SourceClip()
+        aaf_component['SourceID'].value = mob_id
+        aaf_component['StartTime'].value = avb_source_clip.start_time
+        aaf_component['SourceMobSlotID'].value = slot_id
+        return aaf_component
+
+    def convert_sequence(self, avb_sequence):
+        aaf_sequence = self.aaf_file.create.Sequence()
+        for avb_component in avb_sequence.components:
+            # avb puts 0 length filler on head and tail of sequence
+            if avb_component.length <= 0:
+                continue
+            aaf_sequence.components.append(self.convert_component(avb_component))
+        return aaf_sequence
+
+    def convert_selector(self, avb_selector):
+        selector = self.aaf_file.create.Selector()
+        selected = avb_selector.selected
+        selected_clip = None
+        for i, item in enumerate(avb_selector.components()):
+            clip = self.convert_component(item)
+            if i == selected:
+                selected_clip = clip
+            else:
+                selector['Alternates'].append(clip)
+        assert selected_clip
+        selector['Selected'].value = selected_clip
+        return selector
+
+    def convert_transition(self, avb_transition):
+        f = self.aaf_file
+        transition = f.create.Transition()
+        transition['CutPoint'].value = 0
+        if avb_transition.media_kind == 'picture':
+            op_group = f.create.OperationGroup('VideoDissolve_2')
+        else:
+            op_group = f.create.OperationGroup('Audio Dissolve')
+        transition['OperationGroup'].value = op_group
+        return transition
+
+    def convert_capture_mask(self, capture_mask):
+        return self.convert_component(capture_mask.tracks[0].component)
+
+    def convert_edgecode(self, avb_edgecode):
+        edgecode = self.aaf_file.create.EdgeCode()
+        edgecode['Start'].value = avb_edgecode.start_ec
+        edgecode['FilmKind'].value = avb_edgecode.film_kind
+        edgecode['CodeFormat'].value = avb_edgecode.code_format
+        edgecode['Header'].value = avb_edgecode.header
+        return edgecode
+
+    def first_item(self, avb_component):
+        if avb_component.class_id != b'SEQU':
+            return avb_component
+
+        for item in avb_component.components:
+            if item.length > 0:
+                return item
+
+        raise ValueError("sequence has no items")
+
+    def convert_title(self, avb_title):
+        f = self.aaf_file
+        fx_attr = avb_title.attributes.get('AGraphicFXAttr', None)
+        if not fx_attr or not fx_attr.pict_data:
+            return f.create.Filler()
+
+        pict_data = bytearray(fx_attr.pict_data)
+
+        op = f.create.OperationGroup('Title_2')
+        if len(pict_data) > 0xFFFF:
+            stream = op['OpGroupGraphicsParamStream'].open('w')
+            stream.write(pict_data)
+        else:
+            op.parameters.append(f.create.ConstantValue('AvidGraphicFXAttr', pict_data))
+
+        op.parameters.append(f.create.ConstantValue('AvidEffectID', bytearray(b'EFF2_BLEND_GRAPHIC\x00')))
+
+        for track in avb_title.tracks:
+            op.segments.append(self.convert_component(track.component))
+
+        return op
+
+    def convert_track_effect(self, avb_effect):
+        if avb_effect.effect_id == 'EFF2_BLEND_GRAPHIC':
+            return self.convert_title(avb_effect)
+
+        # other effects are passed through as their first input
+        track = avb_effect.tracks[0]
+        return self.convert_component(self.first_item(track.component))
+
+    def convert_essence_group(self, avb_essence_group):
+        e = self.aaf_file.create.EssenceGroup()
+        for track in avb_essence_group.tracks:
+            e['Choices'].append(self.convert_component(track.component))
+        e['EssenceGroupType'].value = avb_essence_group.rep_set_type
+        return e
+
+    def convert_parameter(self, name, param):
+        f = self.aaf_file
+        control_track = param.control_track
+        interpdef = INTERP_KINDS[control_track.interp_kind]
+
+        if interpdef in ('ConstantInterp', ):
+            assert len(control_track.control_points) == 1
+            p = control_track.control_points[0]
+            return f.create.ConstantValue(name, p.value)
+
+        var = f.create.VaryingValue(name, interpdef)
+        var['VVal_Extrapolation'].value = EXTRAP_KINDS[control_track.extrap_kind]
+        var['VVal_FieldCount'].value = 1
+
+        for p in control_track.control_points:
+            t = AAFRational(p.offset[0], p.offset[1])
+            point = var.add_keyframe(t, p.value, 'RelativeFixed')
+            bezier_controls = []
+            for pp in p.pp:
+                bezier_controls.append(f.create.ConstantValue(PP_CODES[pp.code], pp.value))
+            point['ControlPointPointProperties'].extend(bezier_controls)
+
+        return var
+
+    def convert_motion_effect(self, avb_effect):
+        f = self.aaf_file
+        op_group = f.create.OperationGroup("Motion Control")
+
+        for param in avb_effect.param_list:
+            name = SPEED_MAP_PARAMS.get(param.uuid, None)
+            if name:
+                op_group.parameters.append(self.convert_parameter(name, param))
+
+        ratio = avb_effect.speed_ratio
+        op_group.parameters.append(f.create.ConstantValue("SpeedRatio", AAFRational(ratio[0], ratio[1])))
+
+        for attr_name, param_name in (('_MFX_INPUT_FORMAT', 'AvidMotionInputFormat'),
+                                      ('_MFX_OUTPUT_FORMAT', 'AvidMotionOutputFormat')):
+            attr = avb_effect.attributes.get(attr_name, None)
+            if attr is not None:
+                op_group.parameters.append(f.create.ConstantValue(param_name, attr))
+
+        segment = self.convert_component(avb_effect.tracks[0].component)
+        op_group['InputSegments'].append(segment)
+        return op_group
+
+    # markers
+
+    def convert_marker(self, avb_marker):
+        f = self.aaf_file
+        attrs = avb_marker.attributes or {}
+        marker = f.create.DescriptiveMarker()
+
+        marker['CommentMarkerTime'].value = attrs.get('_ATN_CRM_TIME', None)
+        marker['CommentMarkerDate'].value = attrs.get('_ATN_CRM_DATE', None)
+        marker['CommentMarkerUser'].value = attrs.get('_ATN_CRM_USER', None)
+        marker['Comment'].value = attrs.get('_ATN_CRM_COM', None)
+
+        c = avb_marker.color
+        marker['CommentMarkerColor'].value = {'red': c[0], 'green': c[1], 'blue': c[2]}
+
+        for key, value in attrs.items():
+            marker['CommentMarkerAttributeList'].append(f.create.TaggedValue(key, value))
+
+        database_id = attrs.get('_ATN_CRM_ID', None)
+        if database_id:
+            marker['UserComments'].append(f.create.TaggedValue('DatabaseID', database_id))
+
+        return marker
+
+    def component_markers(self, c):
+        attributes = c.attributes or {}
+        markers = list(attributes.get('_TMP_CRM', []))
+        if isinstance(c, components.Sequence):
+            for item in c.components:
+                markers.extend(self.component_markers(item))
+
+        elif isinstance(c, trackgroups.TrackGroup):
+            for track in c.tracks:
+                if hasattr(track, 'component'):
+                    markers.extend(self.component_markers(track.component))
+
+        return markers
+
+    def convert_markers(self, avb_component, described_slots):
+        if isinstance(avb_component, components.Sequence):
+            items = avb_component.components
+        else:
+            items = [avb_component]
+
+        pos = 0
+        marker_list = []
+        for item in items:
+            is_transition = isinstance(item, trackgroups.TransitionEffect)
+            if is_transition:
+                pos -= item.length
+
+            for marker in self.component_markers(item):
+                aaf_marker = self.convert_marker(marker)
+                aaf_marker['Position'].value = pos + marker.comp_offset
+                aaf_marker['DescribedSlots'].value = described_slots
+                marker_list.append(aaf_marker)
+
+            if not is_transition:
+                pos += item.length
+
+        return marker_list
+
+    # mobs
+
+    def convert_slots(self, avb_mob, aaf_mob, slot_ids):
+        f = self.aaf_file
+        marker_slot_id = 1000
+
+        for i, track in enumerate(iter_tracks(avb_mob)):
+            media_kind = track.component.media_kind
+            if media_kind in ('picture', 'sound', 'edgecode', 'timecode'):
+                slot = f.create.TimelineMobSlot()
+            elif media_kind in ('DescriptiveMetadata', ):
+                slot = f.create.EventMobSlot()
+            else:
+                raise ValueError("Unknown media_kind: %s" % media_kind)
+
+            track_index = getattr(track, 'index', None)
+            if track_index is not None:
+                slot['PhysicalTrackNumber'].value = track_index
+
+            slot_id = i + 1
+            slot_ids.setdefault((track_index, media_kind), slot_id)
+
+            slot.edit_rate = nice_edit_rate(track.component.edit_rate)
+            slot.slot_id = slot_id
+            slot.segment = self.convert_component(track.component)
+            # If slot name is not set, Resolve doesn't like the AAF
+            slot.name = ""
+            aaf_mob.slots.append(slot)
+
+            markers = self.convert_markers(track.component, described_slots=[slot.slot_id])
+            if markers:
+                event_slot = f.create.EventMobSlot()
+                event_slot.edit_rate = track.component.edit_rate
+                event_slot.slot_id = marker_slot_id
+                event_slot.segment = f.create.Sequence()
+                event_slot.segment.media_kind = 'DescriptiveMetadata'
+                event_slot.segment.components.extend(markers)
+                marker_slot_id += 1
+                aaf_mob.slots.append(event_slot)
+
+    def convert_composition(self, avb_mob):
+        f = self.aaf_file
+        mob_id = self.aaf_mob_id(avb_mob.mob_id)
+        aaf_mob = self.mobs.get(mob_id, None)
+        if aaf_mob is not None:
+            return aaf_mob
+
+        mob_type = avb_mob.mob_type
+        if mob_type == 'MasterMob':
+            aaf_mob = f.create.MasterMob()
+            aaf_mob.mob_id = mob_id
+        elif mob_type == 'SourceMob':
+            aaf_mob = f.create.SourceMob()
+            aaf_mob.descriptor = self.convert_descriptor(avb_mob.descriptor)
+            aaf_mob.mob_id = mob_id
+        elif mob_type == 'CompositionMob':
+            aaf_mob = f.create.CompositionMob()
+
+            # use exsiting mob_id for non toplevel comps
+            if avb_mob.usage is not None:
+                aaf_mob.mob_id = mob_id
+                aaf_mob['AppCode'].value = 1
+
+            if avb_mob.usage_code == 0:
+                aaf_mob.usage = "Usage_TopLevel"
+        else:
+            raise ValueError("unhandled mob type: %s" % str(mob_type))
+
+        aaf_mob.name = avb_mob.name or ""
+
+        f.content.mobs.append(aaf_mob)
+        self.mobs[mob_id] = aaf_mob
+        slot_ids = self.slot_ids[mob_id] = {}
+
+        self.convert_slots(avb_mob, aaf_mob, slot_ids)
+
+        for key, value in avb_mob.attributes.get('_USER', {}).items():
+            aaf_mob.comments.append(f.create.TaggedValue(key, value))
+
+        return aaf_mob
+
+def convert_file(avb_path, aaf_path, release=True, compact=False):
+    """
+    Converts the toplevel mobs of the bin at avb_path into a new AAF file at aaf_path.
+    Each call opens its own files, so bins can be converted in parallel processes.
+    compact is passed on to AVBFile. Returns the number of mobs written.
+    """
+    if aaf2 is None:
+        raise ImportError("pyaaf2 is required for AAF conversion")
+
+    count = 0
+    with AVBFile(avb_path, compact=compact) as avb_file:
+        with aaf2.open(aaf_path, 'w') as aaf_file:
+            converter = AAFConverter(aaf_file, release=release)
+            for aaf_mob in converter.convert_bin(avb_file):
+                count += 1
+    return count
@@ -22,7 +22,7 @@ if bytes is not str:
 class Attributes(AVBPropertyData):
     class_id = b'ATTR'
     propertydefs = []
-    __slots__ = ('root', 'instance_id', )
+    __slots__ = ('instance_id', )
 
     def __new__(cls, *args, **kwargs):
         self = super(Attributes, cls).__new__(cls)
@@ -50,6 +50,19 @@ class Attributes(AVBPropertyData):
         self.mark_modified()
         return result
 
+    def __reduce__(self):
+        from . import transfer
+        return transfer.reduce_object(self)
+
+    def __copy__(self):
+        obj = self.__class__.__new__(self.__class__, root=self.root)
+        for key in self:
+            AVBPropertyData.__setitem__(obj, key, dict.__getitem__(self, key))
+        return obj
+
+    def __deepcopy__(self, memo):
+        return self.copy(self.root)
+
     def copy(self, root):
         obj = root.create.from_name(self.__class__.__name__)
         for key, value in self.items():
@@ -140,7 +153,7 @@ class ParameterList(AVBRefList):
 
         count = ctx.read_s32(f)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.append(ref)
 
         ctx.read_assert_tag(f, 0x03)
@@ -168,7 +181,7 @@ class TimeCrumbList(AVBRefList):
 
         count = ctx.read_s16(f)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.append(ref)
 
         ctx.read_assert_tag(f, 0x03)
@@ -5,10 +5,14 @@ from __future__ import (
     division,
     )
 
+from array import array
+
 from . import core
 from . import utils
 from . core import AVBPropertyDef
 from . utils import peek_data
+from . mobgraph import MobGraph
+from . query import has_chunks
 
 class Setting(core.AVBObject):
     class_id = b'ASET'
@@ -33,7 +37,7 @@ class Setting(core.AVBObject):
 
         self.attr_count = ctx.read_s16(f)
         self.attr_type =  ctx.read_s16(f)
-        self.attributes = ctx.read_object_ref(self.root, f)
+        self.attributes = ctx.read_object_index(self.root, f)
 
     def write(self, f):
         super(Setting, self).write(f)
@@ -182,6 +186,192 @@ class BinItem(core.AVBObject):
     ]
     __slots__ = ()
 
+# mob index, x, y, keyframe, user_placed
+BIN_ITEM_FIELDS = 'IhhiB'
+BIN_ITEM_TYPECODES = ('I', 'h', 'h', 'i', 'B')
+
+def object_index(value):
+    """
+    Returns the object index a decoded reference points to, 0 for None.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, utils.AVBObjectRef):
+        return value.index
+    return value.instance_id
+
+class BinItemList(list):
+    """
+    The items of a Bin stored as parallel typed arrays, one per BinItem property.
+    BinItems are only created when an item is accessed, after that the BinItem
+    takes precedence over the table. Operations that move items around create
+    all BinItems and drop the table.
+    """
+    __slots__ = ('root', 'table')
+
+    def __init__(self, root, table=None):
+        self.root = root
+        if table is None:
+            table = [array(str(t)) for t in BIN_ITEM_TYPECODES]
+        self.table = table
+        super(BinItemList, self).__init__([None] * len(table[0]))
+
+    @classmethod
+    def from_columns(cls, root, columns):
+        return cls(root, [array(str(t), c) for t, c in zip(BIN_ITEM_TYPECODES, columns)])
+
+    def item(self, i):
+        bin_obj = list.__getitem__(self, i)
+        if bin_obj is None:
+            mob, x, y, keyframe, user_placed = [column[i] for column in self.table]
+            bin_obj = BinItem.__new__(BinItem, root=self.root)
+            data = bin_obj.property_data
+            data['mob'] = utils.AVBObjectRef(self.root, mob)
+            data['x'] = x
+            data['y'] = y
+            data['keyframe'] = keyframe
+            data['user_placed'] = user_placed == 0x01
+            list.__setitem__(self, i, bin_obj)
+        return bin_obj
+
+    def mob_index(self, i):
+        """
+        Returns the object index of the mob of item i without creating the BinItem.
+        """
+        bin_obj = list.__getitem__(self, i)
+        if bin_obj is None:
+            return self.table[0][i]
+        ref = bin_obj.get_ref('mob')
+        if ref is not None:
+            return ref.index
+        return object_index(bin_obj.mob)
+
+    def iter_mobs(self):
+        for i in range(len(self)):
+            bin_obj = list.__getitem__(self, i)
+            if bin_obj is None:
+                yield utils.deref_index(self.root, self.table[0][i])
+            else:
+                yield bin_obj.mob
+
+    def row(self, i):
+        """
+        Returns mob index, x, y, keyframe and user_placed of item i without creating the BinItem.
+        """
+        bin_obj = list.__getitem__(self, i)
+        if bin_obj is None:
+            mob, x, y, keyframe, user_placed = [column[i] for column in self.table]
+            return mob, x, y, keyframe, 1 if user_placed == 0x01 else 0
+        return (self.mob_index(i), bin_obj.x, bin_obj.y, bin_obj.keyframe,
+                1 if bin_obj.user_placed else 0)
+
+    def columns(self):
+        rows = [self.row(i) for i in range(len(self))]
+        if not rows:
+            return [[] for t in BIN_ITEM_TYPECODES]
+        return [list(column) for column in zip(*rows)]
+
+    def write_columns(self):
+        """
+        Returns the columns with the mob indices mapped to the indices of the file being written.
+        """
+        root = self.root
+        columns = self.columns()
+        if not root.debug_copy_refs:
+            ref_mapping = root.ref_mapping
+            mobs = columns[0]
+            for i, index in enumerate(mobs):
+                if index:
+                    if index not in ref_mapping:
+                        raise Exception("object not written yet")
+                    mobs[i] = ref_mapping[index]
+        return columns
+
+    def materialize(self):
+        for i in range(len(self)):
+            self.item(i)
+        self.table = [array(str(t)) for t in BIN_ITEM_TYPECODES]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.item(i) for i in range(*index.indices(len(self)))]
+        return self.item(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.item(i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self.item(i)
+
+    def __contains__(self, value):
+        return any(item is value or item == value for item in self)
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def copy(self):
+        return list(self)
+
+    def index(self, value, *args):
+        self.materialize()
+        return super(BinItemList, self).index(value, *args)
+
+    def count(self, value):
+        self.materialize()
+        return super(BinItemList, self).count(value)
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self.materialize()
+        super(BinItemList, self).__setitem__(index, value)
+
+    def __delitem__(self, index):
+        self.materialize()
+        super(BinItemList, self).__delitem__(index)
+
+    def insert(self, index, value):
+        self.materialize()
+        super(BinItemList, self).insert(index, value)
+
+    def pop(self, *args):
+        self.materialize()
+        return super(BinItemList, self).pop(*args)
+
+    def remove(self, value):
+        self.materialize()
+        super(BinItemList, self).remove(value)
+
+    def reverse(self):
+        self.materialize()
+        super(BinItemList, self).reverse()
+
+    def sort(self, *args, **kwargs):
+        self.materialize()
+        super(BinItemList, self).sort(*args, **kwargs)
+
+    def __imul__(self, value):
+        self.materialize()
+        return super(BinItemList, self).__imul__(value)
+
 @utils.register_helper_class
 class SiftItem(core.AVBObject):
     propertydefs_dict = {}
@@ -216,14 +406,14 @@ class Bin(core.AVBObject):
         AVBPropertyDef('attributes',       'BinAttr',        'reference'),
         AVBPropertyDef('was_iconic',       'WasIconic',      'bool',      False),
     ]
-    __slots__ = ('_mob_dict')
+    __slots__ = ('_mob_dict', '_mob_graph', '_table')
 
     def __init__(self):
         super(Bin, self).__init__(self)
 
         self.view_setting = self.root.create.BinViewSetting()
         self.uid = utils.generate_uid()
-        self.items = []
+        self.items = BinItemList(self.root)
         self.sort_columns = []
 
         self.sifted_settings= []
@@ -233,6 +423,8 @@ class Bin(core.AVBObject):
 
         self.attributes = self.root.create.Attributes()
         self._mob_dict ={}
+        self._mob_graph = None
+        self._table = None
 
     def read(self, f):
         super(Bin, self).read(f)
@@ -246,7 +438,7 @@ class Bin(core.AVBObject):
         else:
             self.large_bin = False
 
-        self.view_setting = ctx.read_object_ref(self.root, f)
+        self.view_setting = ctx.read_object_index(self.root, f)
         self.uid = ctx.read_u64(f)
 
         if version == 0x0e:
@@ -255,17 +447,13 @@ class Bin(core.AVBObject):
             #large bin size > max u16
             object_count = ctx.read_u32(f)
 
-        self.items = []
         self._mob_dict ={}
+        self._mob_graph = None
+        self._table = None
 
-        for i in range(object_count):
-            bin_obj = BinItem.__new__(BinItem, root=self.root)
-            bin_obj.mob = ctx.read_object_ref(self.root, f)
-            bin_obj.x = ctx.read_s16(f)
-            bin_obj.y = ctx.read_s16(f)
-            bin_obj.keyframe = ctx.read_s32(f)
-            bin_obj.user_placed = ctx.read_bool(f)
-            self.items.append(bin_obj)
+        # the item table is read in one go, BinItems are created on access
+        columns = ctx.read_record_table(self.root, f, BIN_ITEM_FIELDS, object_count, ref_fields=(0,))
+        self.items = BinItemList.from_columns(self.root, columns)
 
         self.display_mask = ctx.read_s32(f)
         self.display_mode = ctx.read_s16(f)
@@ -301,7 +489,7 @@ class Bin(core.AVBObject):
 
         self.ql_image_scale = ctx.read_s16(f)
 
-        self.attributes = ctx.read_object_ref(self.root, f)
+        self.attributes = ctx.read_object_index(self.root, f)
         self.was_iconic = ctx.read_bool(f)
 
         if self.class_id[:] == b'ABIN':
@@ -329,12 +517,11 @@ class Bin(core.AVBObject):
         else:
             ctx.write_u16(f, object_count)
 
-        for bin_obj in self.items:
-             ctx.write_object_ref(self.root, f, bin_obj.mob)
-             ctx.write_s16(f, bin_obj.x)
-             ctx.write_s16(f, bin_obj.y)
-             ctx.write_s32(f, bin_obj.keyframe)
-             ctx.write_u8(f, bin_obj.user_placed)
+        items = self.items
+        if not isinstance(items, BinItemList):
+            items = BinItemList(self.root)
+            list.extend(items, self.items)
+        ctx.write_record_table(f, BIN_ITEM_FIELDS, items.write_columns())
 
         ctx.write_s32(f, self.display_mask)
         ctx.write_s16(f, self.display_mode)
@@ -385,13 +572,83 @@ class Bin(core.AVBObject):
 
         if self._mob_dict:
             self._mob_dict[mob.mob_id] = mob
+        self._mob_graph = None
 
         return bin_item
 
+    def select(self, where=None):
+        """
+        Yields the mobs of the bin matching where in file order, see AVBFile.select.
+        """
+        items = self.items
+        if isinstance(items, BinItemList):
+            indices = [items.mob_index(i) for i in range(len(items))]
+        else:
+            indices = [object_index(item.mob) for item in items]
+        return self.root.select(b'CMPO', where, indices)
+
+    def mob_graph(self, rebuild=False):
+        """
+        Returns the dependency graph of the mobs in the bin. The graph is built once and
+        cached, it is rebuilt when objects of the file were modified or added since, or
+        if rebuild is set. Mobs stored in the file are scanned without being decoded,
+        see MobGraph.from_chunks, files without chunks are built from the decoded mobs.
+        """
+        graph = None if rebuild else self.cached_mob_graph()
+        if graph is None:
+            items = self.items
+            if isinstance(items, BinItemList) and has_chunks(self.root):
+                graph = MobGraph.from_chunks(self.root, [items.mob_index(i) for i in range(len(items))])
+            else:
+                graph = MobGraph(self.mobs)
+            graph.item_count = len(items)
+            graph.modification_count = getattr(self.root, 'modification_count', 0)
+            self._mob_graph = graph
+        return graph
+
+    def cached_mob_graph(self):
+        """
+        Returns the cached dependency graph if it is still current, otherwise None.
+        """
+        graph = self._mob_graph
+        if graph is None or graph.item_count != len(self.items):
+            return None
+        if graph.modification_count != getattr(self.root, 'modification_count', 0):
+            return None
+        return graph
+
+    def table(self, columns=None):
+        """
+        Returns the column values of the mobs in the bin as a binview.BinTable. The table
+        is cached, rows are only recomputed for new mobs and for mobs whose source objects
+        changed since the last call, see BinTable.refresh.
+        """
+        from .binview import BinTable
+        table = getattr(self, '_table', None)
+        if table is None:
+            table = BinTable(self, columns)
+            self._table = table
+        else:
+            table.refresh()
+            for title in columns or ():
+                table.add_column(title)
+        return table
+
+    def view_mobs(self):
+        """
+        Returns the mobs sifted by sifted_settings if sifted is set and sorted by sort_columns.
+        """
+        return self.table().view()
+
     @property
     def mobs(self):
-        for item in self.items:
-            yield item.mob
+        items = self.items
+        if isinstance(items, BinItemList):
+            for mob in items.iter_mobs():
+                yield mob
+        else:
+            for item in items:
+                yield item.mob
 
     def toplevel(self):
         for mob in self.mobs:
@@ -408,6 +665,13 @@ class Bin(core.AVBObject):
             if  mob.mob_type in ('MasterMob', ):
                 yield mob
 
+    def modified_since(self, when):
+        """
+        Yields the mobs last modified at or after when, a datetime or timestamp, in
+        file order. The raw timestamps are tested before the mobs are decoded, see select.
+        """
+        return self.select([('last_modified', '>=', when)])
+
 
 @utils.register_class
 class BinFirst(Bin):
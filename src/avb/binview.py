@@ -0,0 +1,460 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import sys
+
+from . import utils
+
+if sys.version_info.major < 3:
+    TEXT_TYPES = (str, unicode)
+    BYTES_TYPES = (bytearray,)
+else:
+    TEXT_TYPES = (str,)
+    BYTES_TYPES = (bytes, bytearray)
+
+# SiftItem.method
+SIFT_CONTAINS = 1
+SIFT_BEGINS_WITH = 2
+SIFT_EXACT = 3
+
+# Bin.sort_columns direction
+SORT_ASCENDING = 0
+SORT_DESCENDING = 1
+
+# source clips are followed at most this many mobs deep, master mob -> file mob -> tape mob
+MAX_SOURCE_DEPTH = 3
+
+TRACK_LABELS = (
+    ('picture', 'V'),
+    ('sound', 'A'),
+    ('timecode', 'TC'),
+    ('edgecode', 'EC'),
+    ('DataEssenceTrack', 'D'),
+)
+
+def safe(func, *args):
+    # a column that can not be computed for a mob is empty
+    try:
+        return func(*args)
+    except (AttributeError, KeyError, ValueError, TypeError, IndexError, ZeroDivisionError):
+        return None
+
+def frame_rate(value):
+    return int(round(float(value))) or 1
+
+def frames_to_timecode(frames, fps):
+    negative = frames < 0
+    frames = abs(frames)
+    ff = frames % fps
+    seconds = frames // fps
+    text = "%02d:%02d:%02d:%02d" % (seconds // 3600, seconds // 60 % 60, seconds % 60, ff)
+    return "-" + text if negative else text
+
+def source_clip(mob):
+    """
+    Returns the source clip of the first picture or sound track of mob that consists
+    of a single source clip, or None.
+    """
+    for track in mob.tracks:
+        component = getattr(track, 'component', None)
+        if component is None or component.media_kind not in ('picture', 'sound'):
+            continue
+        if component.class_id == b'SEQU':
+            items = list(component.components)
+            component = items[0] if len(items) == 1 else None
+        if component is not None and component.class_id == b'SCLP':
+            return component
+
+def source_chain(mob, bin):
+    """
+    Yields mob and the mobs its first picture or sound track takes its material
+    from, following source clips through bin.
+    """
+    for i in range(MAX_SOURCE_DEPTH):
+        yield mob
+        clip = source_clip(mob)
+        if clip is None:
+            return
+        mob = bin.find_by_mob_id(clip.mob_id)
+        if mob is None:
+            return
+
+def row_dependencies(mob, bin):
+    """
+    Returns the indices of the objects the columns of mob are computed from and the
+    mob ids of the source clips followed through bin.
+    """
+    objects = []
+    mob_ids = set()
+    for source in source_chain(mob, bin):
+        data = source.property_data
+        objects.extend((source, data.get('attributes', None)))
+        descriptor = data.get('descriptor', None)
+        if descriptor is not None:
+            objects.extend((descriptor, descriptor.property_data.get('locator', None)))
+        for track in source.tracks:
+            component = track.property_data.get('component', None)
+            objects.append(component)
+            if component is not None and component.class_id == b'SEQU' and len(component.components):
+                objects.append(component.components[0])
+        clip = source_clip(source)
+        if clip is not None:
+            mob_ids.add(clip.mob_id)
+
+    indices = set(getattr(obj, 'instance_id', None) for obj in objects)
+    indices.discard(None)
+    return indices, mob_ids
+
+def chain_descriptors(mob, bin):
+    for source in source_chain(mob, bin):
+        descriptor = source.property_data.get('descriptor', None)
+        if descriptor is not None:
+            yield descriptor
+
+def track_summary(mob):
+    indices = {}
+    for track in mob.tracks:
+        if 'index' not in track.property_data:
+            continue
+        kind = safe(lambda: track.media_kind)
+        indices.setdefault(kind, []).append(track.index)
+
+    parts = []
+    for kind, label in TRACK_LABELS:
+        values = sorted(set(indices.get(kind, [])))
+        ranges = []
+        for value in values:
+            if ranges and ranges[-1][1] == value - 1:
+                ranges[-1][1] = value
+            else:
+                ranges.append([value, value])
+        for start, end in ranges:
+            if start == end:
+                parts.append("%s%d" % (label, start))
+            else:
+                parts.append("%s%d-%d" % (label, start, end))
+    return " ".join(parts)
+
+def start_timecode(mob, bin):
+    for source in source_chain(mob, bin):
+        for track in source.tracks:
+            component = getattr(track, 'component', None)
+            if component is None or component.media_kind != 'timecode':
+                continue
+            if component.class_id == b'SEQU':
+                component = list(component.components)[0]
+            if component.class_id == b'TCCP':
+                return component.start, component.fps
+
+def user_attribute(mob, title):
+    attributes = mob.property_data.get('attributes', None)
+    if attributes is None:
+        return None
+    return attributes.get('_USER', {}).get(title, None)
+
+def column_name(mob, bin):
+    return mob.name
+
+def column_creation_date(mob, bin):
+    return mob.creation_timestamp
+
+def column_duration(mob, bin):
+    return mob.length
+
+def column_start(mob, bin):
+    value = start_timecode(mob, bin)
+    return value[0] if value else None
+
+def column_tracks(mob, bin):
+    return track_summary(mob)
+
+def column_tape(mob, bin):
+    for source in source_chain(mob, bin):
+        descriptor = source.property_data.get('descriptor', None)
+        if descriptor is not None and descriptor.class_id == b'MDTP':
+            return source.name
+
+def column_drive(mob, bin):
+    for descriptor in chain_descriptors(mob, bin):
+        locator = descriptor.property_data.get('locator', None)
+        volume = locator.property_data.get('last_known_volume', None) if locator is not None else None
+        if volume:
+            return volume
+
+def column_video(mob, bin):
+    for descriptor in chain_descriptors(mob, bin):
+        value = descriptor.property_data.get('resolution_id', None)
+        if value is not None:
+            return value
+
+def column_audio_sr(mob, bin):
+    for descriptor in chain_descriptors(mob, bin):
+        if descriptor.class_id in (b'WAVE', b'AIFC', b'PCMA', b'MPGA'):
+            value = descriptor.property_data.get('sample_rate', None)
+            if value is not None:
+                return value
+
+# column title -> function computing the value of a mob, other titles are read
+# from the user attributes of the mob
+COLUMNS = {
+    'Name':          column_name,
+    'Creation Date': column_creation_date,
+    'Duration':      column_duration,
+    'Start':         column_start,
+    'Tracks':        column_tracks,
+    'Tape':          column_tape,
+    'Drive':         column_drive,
+    'Video':         column_video,
+    'Audio SR':      column_audio_sr,
+}
+
+def column_value(title, mob, bin):
+    func = COLUMNS.get(title, None)
+    if func is None:
+        return safe(user_attribute, mob, title)
+    return safe(func, mob, bin)
+
+def column_text(title, value, mob):
+    """
+    Returns value as text, as it is matched by sift.
+    """
+    if value is None:
+        return ''
+    if title == 'Creation Date':
+        return utils.timestamp_to_datetime(value).strftime('%m/%d/%y %H:%M:%S')
+    if title in ('Duration', 'Start'):
+        fps = safe(frame_rate, mob.edit_rate) or 25
+        return frames_to_timecode(value, fps)
+    if isinstance(value, bytes) and not isinstance(value, str):
+        return value.decode('utf-8', 'replace')
+    return '%s' % value
+
+def sort_key(value):
+    # empty values sort first, text is compared case insensitive, bytes after text
+    if value is None:
+        return (0, 0)
+    if isinstance(value, TEXT_TYPES):
+        return (2, value.lower())
+    if isinstance(value, BYTES_TYPES):
+        return (3, bytes(value).lower())
+    return (1, value)
+
+class BinTable(object):
+    """
+    Column values of the mobs of a Bin, stored column wise in the order of Bin.items
+    together with their sort keys and sift text. Values of a column are computed
+    when it is first used. Each row records the objects and source mobs its values
+    are computed from, refresh recomputes only new rows and rows whose dependencies
+    were modified, added to or removed from the bin since the last refresh.
+    """
+
+    def __init__(self, bin, columns=None):
+        self.bin = bin
+        self.titles = []
+        self.values = {}
+        self.keys = {}
+        self.text = {}
+        self.rows = []
+        self.row_of = {}
+        self.mobs = {}
+        # mob index -> (object indices, followed mob ids) and the reverse mappings
+        self.depends = {}
+        self.dependants = {}
+        self.followers = {}
+        self.modification_count = None
+        for title in columns or default_columns():
+            self.add_column(title)
+        self.refresh()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def mob_indices(self):
+        items = self.bin.items
+        mob_index = getattr(items, 'mob_index', None)
+        if mob_index is not None:
+            return [mob_index(i) for i in range(len(items))]
+        return [getattr(item.mob, 'instance_id', 0) for item in items]
+
+    def read_mobs(self, indices):
+        root = self.bin.root
+        for index, mob in zip(indices, root.read_objects(indices)):
+            self.mobs[index] = mob
+
+    def compute(self, title, rows):
+        values = self.values[title]
+        keys = self.keys[title]
+        text = self.text[title]
+        for row in rows:
+            mob = self.mobs[self.rows[row]]
+            value = column_value(title, mob, self.bin)
+            values[row] = value
+            keys[row] = sort_key(value)
+            text[row] = column_text(title, value, mob).lower()
+
+    def add_column(self, title):
+        if title in self.values:
+            return
+        count = len(self.rows)
+        self.titles.append(title)
+        self.values[title] = [None] * count
+        self.keys[title] = [None] * count
+        self.text[title] = [None] * count
+        self.compute(title, range(count))
+
+    def forget(self, index):
+        indices, mob_ids = self.depends.pop(index, ((), ()))
+        for i in indices:
+            self.dependants[i].discard(index)
+        for mob_id in mob_ids:
+            self.followers[mob_id].discard(index)
+
+    def record(self, index):
+        mob = self.mobs[index]
+        result = safe(row_dependencies, mob, self.bin)
+        if result is None:
+            result = (set([index]), set())
+        self.depends[index] = result
+        for i in result[0]:
+            self.dependants.setdefault(i, set()).add(index)
+        for mob_id in result[1]:
+            self.followers.setdefault(mob_id, set()).add(index)
+
+    def refresh(self):
+        """
+        Brings the table in line with the items of the bin. Rows of mobs still in the bin
+        are reused unless an object they depend on was modified, or a mob they follow
+        a source clip to was added to or removed from the bin.
+        """
+        root = self.bin.root
+        indices = self.mob_indices()
+        count = getattr(root, 'modification_count', 0)
+        if indices == self.rows and count == self.modification_count:
+            return
+
+        stale = set()
+        if self.modification_count is not None and count != self.modification_count:
+            for i in root.modified_indices(self.modification_count):
+                stale.update(self.dependants.get(i, ()))
+        self.modification_count = count
+
+        old_rows = self.row_of
+        current = set(indices)
+        added = [index for index in indices if index not in old_rows]
+        removed = [index for index in self.rows if index not in current]
+        self.read_mobs([index for index in added if index not in self.mobs])
+
+        # rows following a clip to a mob that appeared or disappeared
+        for index in added + removed:
+            mob_id = safe(lambda: self.mobs[index].mob_id)
+            stale.update(self.followers.get(mob_id, ()))
+
+        for index in removed + list(stale):
+            self.forget(index)
+
+        for title in self.titles:
+            for columns in (self.values, self.keys, self.text):
+                old = columns[title]
+                columns[title] = [old[old_rows[index]] if index in old_rows else None for index in indices]
+
+        self.rows = indices
+        self.row_of = dict((index, row) for row, index in enumerate(indices))
+        self.mobs = dict((index, self.mobs[index]) for index in indices)
+
+        new_rows = [row for row, index in enumerate(indices) if index not in old_rows or index in stale]
+        for row in new_rows:
+            self.record(indices[row])
+        for title in self.titles:
+            self.compute(title, new_rows)
+
+    def column(self, title):
+        """
+        Returns the values of column title in the order of Bin.items.
+        """
+        self.add_column(title)
+        return self.values[title]
+
+    def mob(self, row):
+        return self.mobs[self.rows[row]]
+
+    def match(self, row, method, string, column):
+        string = string.lower()
+        if column in (None, '', 'Any'):
+            titles = self.titles
+        else:
+            self.add_column(column)
+            titles = [column]
+
+        for title in titles:
+            text = self.text[title][row]
+            if method == SIFT_BEGINS_WITH:
+                if text.startswith(string):
+                    return True
+            elif method == SIFT_EXACT:
+                if text == string:
+                    return True
+            elif string in text:
+                return True
+        return False
+
+    def sift(self, settings=None, rows=None):
+        """
+        Returns the rows matching the sift settings, by default Bin.sifted_settings.
+        Settings are (method, string, column) tuples or SiftItems, empty strings are
+        ignored. The first three settings select rows matching any of them, the
+        last three narrow those down to rows also matching any of them.
+        """
+        if settings is None:
+            settings = self.bin.sifted_settings
+        criteria = []
+        for item in settings:
+            if not isinstance(item, tuple):
+                item = (item.method, item.string, item.column)
+            criteria.append(item)
+
+        groups = [[c for c in criteria[:3] if c[1]], [c for c in criteria[3:] if c[1]]]
+        if rows is None:
+            rows = range(len(self.rows))
+
+        result = []
+        for row in rows:
+            for group in groups:
+                if group and not any(self.match(row, *c) for c in group):
+                    break
+            else:
+                result.append(row)
+        return result
+
+    def sort(self, sort_columns=None, rows=None):
+        """
+        Returns rows sorted by sort_columns, by default Bin.sort_columns. Each entry is a
+        [direction, title] pair, the first is the primary key.
+        """
+        if sort_columns is None:
+            sort_columns = self.bin.sort_columns
+        if rows is None:
+            rows = range(len(self.rows))
+
+        result = list(rows)
+        # stable sorts from the least significant key up
+        for direction, title in reversed(list(sort_columns)):
+            self.add_column(title)
+            keys = self.keys[title]
+            result.sort(key=keys.__getitem__, reverse=direction == SORT_DESCENDING)
+        return result
+
+    def view(self):
+        """
+        Returns the mobs of the bin as shown by the bin: sifted if Bin.sifted is set
+        and sorted by Bin.sort_columns.
+        """
+        rows = self.sift() if self.bin.sifted else None
+        return [self.mob(row) for row in self.sort(rows=rows)]
+
+def default_columns():
+    from .bin import default_bin_columns
+    return [column['title'] for column in default_bin_columns if column['title'].strip()]
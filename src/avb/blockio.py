@@ -0,0 +1,238 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import io
+import os
+import threading
+from collections import OrderedDict
+
+def positional_fd(f):
+    """
+    Returns the file descriptor to use for os.pread on f, or None if f must be
+    read with seek and read. Only read only files opened with io are used, their
+    buffer can not hold data that is not on disk yet.
+    """
+    if not hasattr(os, 'pread'):
+        return None
+    if not isinstance(f, (io.BufferedReader, io.FileIO)):
+        return None
+    try:
+        return f.fileno()
+    except (AttributeError, io.UnsupportedOperation, ValueError):
+        return None
+
+class ReaderStats(object):
+    __slots__ = ('requests', 'bytes_requested', 'reads', 'bytes_read', 'cache_hits', 'cache_misses')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.bytes_requested = 0
+        self.reads = 0
+        self.bytes_read = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __repr__(self):
+        s = "%s.%s"  % (self.__class__.__module__,
+                                self.__class__.__name__)
+        s += " " + " ".join("%s: %d" % item for item in self.as_dict().items())
+        return '<%s at 0x%x>' % (s, id(self))
+
+class FileReader(object):
+    """
+    Default reader used by AVBFile. Requests are positional reads with os.pread
+    where available, so threads can read concurrently without sharing the file
+    position. Otherwise every request is a seek followed by a read under a lock.
+    """
+    def __init__(self, f):
+        self.f = f
+        self.fd = positional_fd(f)
+        self.lock = threading.Lock()
+        self.stats = ReaderStats()
+
+    def read(self, pos, size):
+        stats = self.stats
+        stats.requests += 1
+        stats.bytes_requested += size
+        stats.reads += 1
+        stats.bytes_read += size
+
+        if self.fd is not None:
+            return os.pread(self.fd, size, pos)
+
+        f = self.f
+        with self.lock:
+            f.seek(pos)
+            return f.read(size)
+
+    def prefetch(self, ranges):
+        pass
+
+    def clear(self):
+        pass
+
+class BlockCacheReader(FileReader):
+    """
+    Reads the file in aligned blocks and keeps the most recently used blocks in memory.
+    Missing blocks of a request, or of the ranges passed to prefetch, are coalesced
+    into as few reads as possible. Requests are serialised with a lock.
+    """
+    def __init__(self, f, block_size=256*1024, cache_blocks=64):
+        super(BlockCacheReader, self).__init__(f)
+        self.lock = threading.RLock()
+        self.block_size = block_size
+        self.cache_blocks = cache_blocks
+        self.blocks = OrderedDict()
+
+    def load_blocks(self, first, last):
+        # read each run of missing blocks between first and last with a single read
+        blocks = self.blocks
+        stats = self.stats
+        block_size = self.block_size
+        loaded = {}
+
+        block = first
+        while block <= last:
+            if block in blocks:
+                blocks[block] = blocks.pop(block)
+                stats.cache_hits += 1
+                loaded[block] = blocks[block]
+                block += 1
+                continue
+
+            end = block
+            while end + 1 <= last and end + 1 not in blocks:
+                end += 1
+
+            stats.cache_misses += end - block + 1
+            stats.reads += 1
+            self.f.seek(block * block_size)
+            data = self.f.read((end - block + 1) * block_size)
+            stats.bytes_read += len(data)
+
+            for i in range(block, end + 1):
+                offset = (i - block) * block_size
+                loaded[i] = blocks[i] = data[offset:offset + block_size]
+            block = end + 1
+
+        while len(blocks) > self.cache_blocks:
+            blocks.popitem(last=False)
+
+        return loaded
+
+    def read(self, pos, size):
+        with self.lock:
+            return self.read_locked(pos, size)
+
+    def read_locked(self, pos, size):
+        stats = self.stats
+        stats.requests += 1
+        stats.bytes_requested += size
+        if size <= 0:
+            return b''
+
+        block_size = self.block_size
+        first = pos // block_size
+        last = (pos + size - 1) // block_size
+
+        # requests larger than the cache bypass it
+        if last - first + 1 > self.cache_blocks:
+            stats.reads += 1
+            self.f.seek(pos)
+            data = self.f.read(size)
+            stats.bytes_read += len(data)
+            return data
+
+        loaded = self.load_blocks(first, last)
+        start = pos - first * block_size
+        if first == last:
+            return loaded[first][start:start + size]
+
+        data = b''.join(loaded[i] for i in range(first, last + 1))
+        return data[start:start + size]
+
+    def prefetch(self, ranges):
+        """
+        Loads the blocks covering a list of (pos, size) ranges.
+        """
+        block_size = self.block_size
+        wanted = set()
+        for pos, size in ranges:
+            if size <= 0:
+                continue
+            wanted.update(range(pos // block_size, (pos + size - 1) // block_size + 1))
+
+        wanted = sorted(wanted)[:self.cache_blocks]
+        with self.lock:
+            start = 0
+            while start < len(wanted):
+                end = start
+                while end + 1 < len(wanted) and wanted[end + 1] == wanted[end] + 1:
+                    end += 1
+                self.load_blocks(wanted[start], wanted[end])
+                start = end + 1
+
+    def clear(self):
+        with self.lock:
+            self.blocks.clear()
+
+class MemoryFile(object):
+    """
+    Read only file object over a buffer, such as a mmap or shared memory block.
+    """
+    def __init__(self, buf):
+        self.view = memoryview(buf)
+        self.pos = 0
+        self.closed = False
+
+    def read(self, size=-1):
+        end = len(self.view) if size is None or size < 0 else min(self.pos + size, len(self.view))
+        data = self.view[self.pos:end].tobytes()
+        self.pos = max(self.pos, end)
+        return data
+
+    def readinto(self, b):
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            pos += self.pos
+        elif whence == os.SEEK_END:
+            pos += len(self.view)
+        self.pos = pos
+        return pos
+
+    def tell(self):
+        return self.pos
+
+    def close(self):
+        self.view.release()
+        self.closed = True
+
+class MemoryReader(FileReader):
+    """
+    Reader for a MemoryFile, requests are slices of its buffer and need no lock.
+    """
+    def __init__(self, f):
+        super(MemoryReader, self).__init__(f)
+        self.view = f.view
+
+    def read(self, pos, size):
+        stats = self.stats
+        stats.requests += 1
+        stats.bytes_requested += size
+        stats.reads += 1
+        stats.bytes_read += size
+        return self.view[pos:pos + size].tobytes()
@@ -0,0 +1,91 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+# (module, class name, class_id) of every registered class, class_id is None for
+# helper classes. The registries in utils import a class module the first time
+# one of its classes is looked up. Must match the register_class and
+# register_helper_class calls, tests/test_create.py checks it.
+CLASS_TABLE = (
+    ('core', 'AVBRefList', None),
+    ('attributes', 'Attributes', b'ATTR'),
+    ('attributes', 'ParameterList', b'PRLS'),
+    ('attributes', 'TimeCrumbList', b'TMCS'),
+    ('bin', 'BinViewSetting', b'BVst'),
+    ('bin', 'BinItem', None),
+    ('bin', 'SiftItem', None),
+    ('bin', 'Bin', b'ABIN'),
+    ('bin', 'BinFirst', b'BINF'),
+    ('components', 'Sequence', b'SEQU'),
+    ('components', 'SourceClip', b'SCLP'),
+    ('components', 'Timecode', b'TCCP'),
+    ('components', 'Edgecode', b'ECCP'),
+    ('components', 'TrackRef', b'TRKR'),
+    ('components', 'ParamControlPoint', None),
+    ('components', 'ParamControlPointProperty', None),
+    ('components', 'ParamClip', b'PRCL'),
+    ('components', 'ControlPoint', None),
+    ('components', 'ControlPointProperty', None),
+    ('components', 'ControlClip', b'CTRL'),
+    ('components', 'Filler', b'FILL'),
+    ('trackgroups', 'Track', None),
+    ('trackgroups', 'TrackGroup', b'TRKG'),
+    ('trackgroups', 'TrackEffect', b'TKFX'),
+    ('trackgroups', 'PanVolumeEffect', b'PVOL'),
+    ('trackgroups', 'ASPIPlugin', None),
+    ('trackgroups', 'ASPIPluginChunk', None),
+    ('trackgroups', 'AudioSuitePluginEffect', b'ASPI'),
+    ('trackgroups', 'EqualizerBand', None),
+    ('trackgroups', 'EqualizerMultiBand', b'EQMB'),
+    ('trackgroups', 'CaptureMask', b'MASK'),
+    ('trackgroups', 'StrobeEffect', b'STRB'),
+    ('trackgroups', 'MotionEffect', b'SPED'),
+    ('trackgroups', 'Repeat', b'REPT'),
+    ('trackgroups', 'EssenceGroup', b'RSET'),
+    ('trackgroups', 'TransitionEffect', b'TNFX'),
+    ('trackgroups', 'Selector', b'SLCT'),
+    ('trackgroups', 'Composition', b'CMPO'),
+    ('essence', 'MediaDescriptor', b'MDES'),
+    ('essence', 'TapeDescriptor', b'MDTP'),
+    ('essence', 'FilmDescriptor', b'MDFM'),
+    ('essence', 'NagraDescriptor', b'MDNG'),
+    ('essence', 'MediaFileDescriptor', b'MDFL'),
+    ('essence', 'MultiDescriptor', b'MULD'),
+    ('essence', 'WaveDescriptor', b'WAVE'),
+    ('essence', 'AIFCDescriptor', b'AIFC'),
+    ('essence', 'PCMADescriptor', b'PCMA'),
+    ('essence', 'MPGADescriptor', b'MPGA'),
+    ('essence', 'DIDDescriptor', b'DIDD'),
+    ('essence', 'CDCIDescriptor', b'CDCI'),
+    ('essence', 'MPGIDescriptor', b'MPGI'),
+    ('essence', 'JPEGDescriptor', b'JPED'),
+    ('essence', 'RGBADescriptor', b'RGBA'),
+    ('essence', 'DataDescriptor', b'DATD'),
+    ('essence', 'ANCDataDescriptor', b'ANCD'),
+    ('misc', 'MacFileLocator', b'FILE'),
+    ('misc', 'WinFileLocator', b'WINF'),
+    ('misc', 'URLLocator', b'URLL'),
+    ('misc', 'GraphicEffect', b'GRFX'),
+    ('misc', 'ShapeList', b'SHLP'),
+    ('misc', 'ColorCorrectionEffect', b'CCFX'),
+    ('misc', 'EffectParam', None),
+    ('misc', 'EffectParamList', b'FXPS'),
+    ('misc', 'CFUserParam', b'AVUP'),
+    ('misc', 'ParameterItem', b'PRIT'),
+    ('misc', 'MSMLocator', b'MSML'),
+    ('misc', 'Position', b'APOS'),
+    ('misc', 'BOBPosition', b'ABOB'),
+    ('misc', 'DIDPosition', b'DIDP'),
+    ('misc', 'MPGPosition', b'MPGP'),
+    ('misc', 'BinRef', b'MCBR'),
+    ('misc', 'MobRef', b'MCMR'),
+    ('misc', 'Marker', b'TMBC'),
+    ('misc', 'TrackerManager', b'TKMN'),
+    ('misc', 'TrackerDataSlot', b'TKDS'),
+    ('misc', 'TrackerParameterSlot', b'TKPS'),
+    ('misc', 'TrackerData', b'TKDA'),
+    ('misc', 'TrackerParameter', b'TKPA'),
+)
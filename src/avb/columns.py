@@ -0,0 +1,433 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import array
+import struct
+
+def numpy_dtype_char(typecode):
+    return {'b': 'i1', 'B': 'u1', 'h': 'i2', 'H': 'u2', 'i': 'i4', 'I': 'u4', 'q': 'i8', 'd': 'f8'}[typecode]
+
+class Columns(object):
+    """
+    Column oriented view of a list of fixed size records. Each field is stored in its
+    own array.array. Variable length fields are stored flat with an offset table,
+    the values of row i are values[offsets[i]:offsets[i+1]].
+    """
+    fields = []
+    variable_fields = []
+
+    def __init__(self):
+        self.count = 0
+        self.columns = {}
+        for name, typecode in self.fields:
+            self.columns[name] = array.array(str(typecode))
+        for name, typecode in self.variable_fields:
+            self.columns[name] = array.array(str(typecode))
+            self.columns[name + '_offsets'] = array.array(str('I'), [0])
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def keys(self):
+        return self.columns.keys()
+
+    def variable(self, name, i):
+        """
+        Returns the values of variable length field name for row i.
+        """
+        offsets = self.columns[name + '_offsets']
+        return self.columns[name][offsets[i]:offsets[i+1]]
+
+    def row(self, i):
+        """
+        Returns row i as a dict.
+        """
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+
+        result = {}
+        for name, typecode in self.fields:
+            result[name] = self.columns[name][i]
+        for name, typecode in self.variable_fields:
+            result[name] = self.variable(name, i).tolist()
+        return result
+
+    def rows(self):
+        for i in range(self.count):
+            yield self.row(i)
+
+    def as_numpy(self):
+        """
+        Returns the fixed size fields as a numpy record array, numpy is imported on demand.
+        """
+        import numpy
+
+        dtype = numpy.dtype([(str(name), numpy_dtype_char(typecode)) for name, typecode in self.fields])
+        result = numpy.empty(self.count, dtype=dtype)
+        for name, typecode in self.fields:
+            result[name] = numpy.frombuffer(self.columns[name], dtype=numpy_dtype_char(typecode))
+        return result
+
+EFFECT_PARAM_FIELDS = [
+    ('percent_time', 'i'),
+    ('level', 'i'),
+    ('pos_x', 'i'),
+    ('floor_x', 'i'),
+    ('ceil_x', 'i'),
+    ('pos_y', 'i'),
+    ('floor_y', 'i'),
+    ('ceil_y', 'i'),
+    ('scale_x', 'i'),
+    ('scale_y', 'i'),
+    ('crop_left', 'i'),
+    ('crop_right', 'i'),
+    ('crop_top', 'i'),
+    ('crop_bottom', 'i'),
+    ('box_0', 'i'),
+    ('box_1', 'i'),
+    ('box_2', 'i'),
+    ('box_3', 'i'),
+    ('box_xscale', 'B'),
+    ('box_yscale', 'B'),
+    ('box_xpos', 'B'),
+    ('box_ypos', 'B'),
+    ('border_width', 'i'),
+    ('border_soft', 'i'),
+    ('splill_gain2', 'h'),
+    ('splill_gain', 'h'),
+    ('splill_soft2', 'h'),
+    ('splill_soft', 'h'),
+    ('enable_key_flags', 'b'),
+]
+
+# layout of the fixed size part of each EffectParam in a FXPS chunk
+EFFECT_PARAM_FORMAT = '18i4B2i4hb'
+
+class EffectParamColumns(Columns):
+    """
+    Columns of the EffectParams of a EffectParamList. The box list is split into
+    box_0 to box_3, bools are stored as 0 or 1. colors and user_param are variable
+    length fields, selected follows them in the chunk and is stored as a column.
+    """
+    fields = EFFECT_PARAM_FIELDS + [('selected', 'B')]
+    variable_fields = [('colors', 'i'), ('user_param', 'B')]
+
+    orig_length = None
+    window_offset = None
+    keyframe_size = None
+
+    @classmethod
+    def from_params(cls, params):
+        self = cls()
+        columns = self.columns
+        fields = [(name, columns[name]) for name, typecode in EFFECT_PARAM_FIELDS]
+        colors = columns['colors']
+        colors_offsets = columns['colors_offsets']
+        user_param = columns['user_param']
+        user_param_offsets = columns['user_param_offsets']
+        selected = columns['selected']
+
+        for p in params:
+            data = p.property_data
+            box = data['box']
+            for name, column in fields:
+                if name.startswith('box_') and name[4:].isdigit():
+                    column.append(box[int(name[4:])])
+                else:
+                    column.append(int(data[name]))
+
+            colors.extend(data['colors'])
+            colors_offsets.append(len(colors))
+            user_param.extend(bytearray(data['user_param']))
+            user_param_offsets.append(len(user_param))
+            selected.append(int(data['selected']))
+            self.count += 1
+
+        return self
+
+    @classmethod
+    def from_chunk(cls, data, byte_order='little'):
+        """
+        Parses the parameters of a FXPS chunk without creating EffectParam objects.
+        """
+        self = cls()
+        prefix = '<' if byte_order == 'little' else '>'
+        header = struct.Struct(str(prefix + 'BB4i'))
+        fixed = struct.Struct(str(prefix + EFFECT_PARAM_FORMAT))
+        s32 = struct.Struct(str(prefix + 'i'))
+
+        data = bytes(data)
+        pos = 0
+        tag, version, orig_length, window_offset, count, keyframe_size = header.unpack_from(data, pos)
+        if (tag, version) != (0x02, 0x12):
+            raise ValueError("unexpected FXPS header")
+        pos += header.size
+
+        self.orig_length = orig_length
+        self.window_offset = window_offset
+        self.keyframe_size = keyframe_size
+
+        columns = self.columns
+        fields = [columns[name] for name, typecode in EFFECT_PARAM_FIELDS]
+        colors = columns['colors']
+        colors_offsets = columns['colors_offsets']
+        user_param = columns['user_param']
+        user_param_offsets = columns['user_param_offsets']
+        selected = columns['selected']
+
+        bools = [i for i, (name, typecode) in enumerate(EFFECT_PARAM_FIELDS) if typecode == 'B']
+        color_format = prefix + '%di'
+        for i in range(count):
+            values = list(fixed.unpack_from(data, pos))
+            for j in bools:
+                values[j] = 1 if values[j] == 0x01 else 0
+            for column, value in zip(fields, values):
+                column.append(value)
+            pos += fixed.size
+
+            color_count = s32.unpack_from(data, pos)[0]
+            pos += 4
+            if color_count < 0:
+                raise ValueError("negative FXPS color count")
+            colors.extend(struct.unpack_from(str(color_format % color_count), data, pos))
+            pos += color_count * 4
+            colors_offsets.append(len(colors))
+
+            param_size = s32.unpack_from(data, pos)[0]
+            pos += 4
+            if param_size < 0:
+                raise ValueError("negative FXPS user param size")
+            user_param.extend(bytearray(data[pos:pos + param_size]))
+            pos += param_size
+            user_param_offsets.append(len(user_param))
+
+            selected.append(1 if data[pos:pos+1] == b'\x01' else 0)
+            pos += 1
+
+        if data[pos:pos+1] != b'\x03':
+            raise ValueError("FXPS chunk not terminated")
+
+        self.count = count
+        return self
+
+class ChunkCursor(object):
+    """
+    Minimal reader over raw chunk data, used to fill columns without creating objects.
+    """
+    def __init__(self, data, byte_order='little'):
+        self.data = bytes(data)
+        self.pos = 0
+        self.prefix = '<' if byte_order == 'little' else '>'
+        self.structs = {}
+
+    def unpack(self, fmt):
+        st = self.structs.get(fmt, None)
+        if st is None:
+            st = self.structs[fmt] = struct.Struct(str(self.prefix + fmt))
+        value = st.unpack_from(self.data, self.pos)[0]
+        self.pos += st.size
+        return value
+
+    def read_u8(self):
+        return self.unpack('B')
+
+    def read_s16(self):
+        return self.unpack('h')
+
+    def read_u32(self):
+        return self.unpack('I')
+
+    def read_s32(self):
+        return self.unpack('i')
+
+    def read_double(self):
+        return self.unpack('d')
+
+    def read_bool(self):
+        return self.read_u8() == 0x01
+
+    def read(self, size):
+        if size < 0:
+            raise ValueError("negative size")
+        data = self.data[self.pos:self.pos + size]
+        self.pos += size
+        return data
+
+    def read_assert_tag(self, *tags):
+        for tag in tags:
+            value = self.read_u8()
+            if value != tag:
+                raise ValueError("%d != %d at %d" % (value, tag, self.pos - 1))
+
+    def iter_ext(self):
+        while self.data[self.pos:self.pos+1] == b'\x01':
+            self.pos += 1
+            yield self.read_u8()
+
+    def read_end(self):
+        self.read_assert_tag(0x03)
+        if self.pos != len(self.data):
+            raise ValueError("%d trailing bytes" % (len(self.data) - self.pos))
+
+class ChunkColumns(Columns):
+    """
+    Columns with one row per chunk, the first column is the object index of the chunk.
+    """
+    class_id = None
+
+    def append_variable(self, name, values):
+        column = self.columns[name]
+        column.extend(values)
+        self.columns[name + '_offsets'].append(len(column))
+
+    def append_chunk(self, index, data, byte_order='little'):
+        f = ChunkCursor(data, byte_order)
+        row = self.read_row(f)
+        f.read_end()
+
+        self.columns['index'].append(index)
+        for name, typecode in self.fields[1:]:
+            self.columns[name].append(row[name])
+        for name, typecode in self.variable_fields:
+            self.append_variable(name, row[name])
+        self.count += 1
+
+    def read_row(self, f):
+        raise NotImplementedError()
+
+class TrackerDataColumns(ChunkColumns):
+    """
+    TrackerData (TKDA) chunks. Missing optional values are -1, NaN for filter_amount
+    and 0 for clip5 and clip6.
+    """
+    class_id = b'TKDA'
+    fields = [
+        ('index', 'I'),
+        ('clip_version', 'I'),
+        ('offset_tracking', 'q'),
+        ('smoothing', 'q'),
+        ('jitter_removal', 'q'),
+        ('filter_amount', 'd'),
+        ('clip5', 'I'),
+        ('clip6', 'I'),
+    ]
+    variable_fields = [('settings', 'B'), ('clips', 'I')]
+
+    def read_row(self, f):
+        row = {'offset_tracking': -1, 'smoothing': -1, 'jitter_removal': -1,
+               'filter_amount': float('nan'), 'clip5': 0, 'clip6': 0}
+        f.read_assert_tag(0x02, 0x01)
+        row['settings'] = bytearray(f.read(f.read_s16()))
+        row['clip_version'] = f.read_u32()
+        row['clips'] = [f.read_u32() for i in range(f.read_s16())]
+
+        names = {0x01: 'offset_tracking', 0x02: 'smoothing', 0x03: 'jitter_removal',
+                 0x05: 'clip5', 0x06: 'clip6'}
+        for tag in f.iter_ext():
+            if tag == 0x04:
+                f.read_assert_tag(75)
+                row['filter_amount'] = f.read_double()
+            elif tag in names:
+                f.read_assert_tag(72)
+                row[names[tag]] = f.read_u32()
+            else:
+                raise ValueError("TKDA: unknown ext tag 0x%02X %d" % (tag, tag))
+        return row
+
+class TrackerDataSlotColumns(ChunkColumns):
+    """
+    TrackerDataSlot (TKDS) chunks, track_fg is -1 when missing.
+    """
+    class_id = b'TKDS'
+    fields = [('index', 'I'), ('track_fg', 'b')]
+    variable_fields = [('tracker_data', 'I')]
+
+    def read_row(self, f):
+        row = {'track_fg': -1}
+        f.read_assert_tag(0x02, 0x01)
+        row['tracker_data'] = [f.read_u32() for i in range(f.read_s32())]
+        for tag in f.iter_ext():
+            if tag == 0x01:
+                f.read_assert_tag(66)
+                row['track_fg'] = int(f.read_bool())
+            else:
+                raise ValueError("TKDS: unknown ext tag 0x%02X %d" % (tag, tag))
+        return row
+
+class TrackerParameterSlotColumns(ChunkColumns):
+    """
+    TrackerParameterSlot (TKPS) chunks.
+    """
+    class_id = b'TKPS'
+    fields = [('index', 'I')]
+    variable_fields = [('settings', 'B'), ('params', 'I')]
+
+    def read_row(self, f):
+        f.read_assert_tag(0x02, 0x01)
+        settings = bytearray(f.read(f.read_s16()))
+        params = [f.read_u32() for i in range(f.read_s32())]
+        return {'settings': settings, 'params': params}
+
+class TrackerParameterColumns(ChunkColumns):
+    """
+    TrackerParameter (TKPA) chunks.
+    """
+    class_id = b'TKPA'
+    fields = [('index', 'I')]
+    variable_fields = [('settings', 'B')]
+
+    def read_row(self, f):
+        f.read_assert_tag(0x02, 0x01)
+        return {'settings': bytearray(f.read(f.read_s16()))}
+
+class TrackerColumns(object):
+    """
+    Columns of all the tracker chunks of a file, one table per class. References
+    between the tables are object indices matching their index columns.
+    """
+    tables = [
+        ('data', TrackerDataColumns),
+        ('data_slots', TrackerDataSlotColumns),
+        ('param_slots', TrackerParameterSlotColumns),
+        ('params', TrackerParameterColumns),
+    ]
+
+    def __init__(self):
+        self.by_class_id = {}
+        for name, table_class in self.tables:
+            table = table_class()
+            setattr(self, name, table)
+            self.by_class_id[table_class.class_id] = table
+
+    @classmethod
+    def from_chunks(cls, chunks, byte_order='little'):
+        """
+        Fills the tables from (index, class_id, data) tuples, other classes are skipped.
+        """
+        self = cls()
+        for index, class_id, data in chunks:
+            table = self.by_class_id.get(class_id, None)
+            if table is not None:
+                table.append_chunk(index, data, byte_order)
+        return self
+
+    def __len__(self):
+        return sum(len(table) for table in self.by_class_id.values())
+
+    def as_numpy(self):
+        """
+        Returns a dict of numpy record arrays, one per table.
+        """
+        return dict((name, getattr(self, name).as_numpy()) for name, table_class in self.tables)
@@ -41,24 +41,24 @@ class Component(core.AVBObject):
         ctx.read_assert_tag(f, 0x03)
 
         # bob == bytes of binary or bag of bits?
-        self.left_bob  = ctx.read_object_ref(self.root, f)
-        self.right_bob = ctx.read_object_ref(self.root, f)
+        self.left_bob  = ctx.read_object_index(self.root, f)
+        self.right_bob = ctx.read_object_index(self.root, f)
 
         self.media_kind_id = ctx.read_s16(f)
         self.edit_rate = ctx.read_exp10_encoded_float(f)
         self.name = ctx.read_string(f) or None
         self.effect_id = ctx.read_string(f) or None
 
-        self.attributes = ctx.read_object_ref(self.root, f)
-        self.session_attrs = ctx.read_object_ref(self.root, f)
+        self.attributes = ctx.read_object_index(self.root, f)
+        self.session_attrs = ctx.read_object_index(self.root, f)
 
-        self.precomputed = ctx.read_object_ref(self.root, f)
+        self.precomputed = ctx.read_object_index(self.root, f)
 
         for tag in ctx.iter_ext(f):
 
             if tag == 0x01:
                 ctx.read_assert_tag(f, 72)
-                self.param_list = ctx.read_object_ref(self.root, f)
+                self.param_list = ctx.read_object_index(self.root, f)
             else:
                 raise ValueError("%s: unknown ext tag 0x%02X %d" % (str(self.class_id), tag,tag))
 
@@ -160,7 +160,7 @@ class Sequence(Component):
         count = ctx.read_u32(f)
         self.components = AVBRefList.__new__(AVBRefList, root=self.root, parent=self)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             # print ref
             self.components.append(ref)
 
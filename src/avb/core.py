@@ -33,21 +33,203 @@ class AVBPropertyDef(object):
         return '<%s at 0x%x>' % (s, id(self))
 
 class AVBPropertyData(OrderedDict):
-    __slots__ = ()
-    def deref(self, value):
+    """
+    Property storage of an object. When a layout is set, reference properties are
+    stored as plain object indices of root like AVBPropertySlots does.
+    """
+    __slots__ = ('root', 'layout')
+
+    def __new__(cls, *args, **kwargs):
+        self = super(AVBPropertyData, cls).__new__(cls, *args, **kwargs)
+        self.root = None
+        self.layout = None
+        return self
+
+    def is_ref(self, key):
+        layout = self.layout
+        if layout is None:
+            return False
+        i = layout.offsets.get(key, None)
+        return i is not None and bool(layout.refs & (1 << i))
+
+    def deref(self, value, key=None):
         if isinstance(value, utils.AVBObjectRef):
             return value.value
+        if key is not None and isinstance(value, INT_FORMAT) and self.is_ref(key):
+            return utils.deref_index(self.root, value)
         return value
 
+    def get_ref(self, key):
+        value = super(AVBPropertyData, self).get(key, None)
+        if isinstance(value, INT_FORMAT) and self.is_ref(key):
+            return utils.AVBObjectRef(self.root, value)
+        if isinstance(value, utils.AVBObjectRef):
+            return value
+        return None
+
     def __getitem__(self, key):
-        return self.deref(super(AVBPropertyData, self).__getitem__(key))
+        return self.deref(super(AVBPropertyData, self).__getitem__(key), key)
+
+    def __setitem__(self, key, value):
+        if isinstance(value, utils.AVBObjectRef) and value.root is self.root and self.is_ref(key):
+            value = value.index
+        super(AVBPropertyData, self).__setitem__(key, value)
 
     def items(self):
         for key, value in super(AVBPropertyData, self).items():
-            yield key, self.deref(value)
+            yield key, self.deref(value, key)
+
+    def values(self):
+        return [self.deref(value, key) for key, value in super(AVBPropertyData, self).items()]
+
+    def get(self, key, default=None):
+        value = super(AVBPropertyData, self).get(key, sentinel)
+        if value is sentinel:
+            return default
+        return self.deref(value, key)
+
+class AVBPropertyLayout(object):
+    """
+    Fixed slot offsets for the properties of a class, computed once from its propertydefs.
+    """
+    __slots__ = ('names', 'offsets', 'refs')
+    def __init__(self, propertydefs):
+        names = []
+        self.refs = 0
+        for pdef in propertydefs:
+            if pdef.name in names:
+                continue
+            if pdef.type == 'reference':
+                self.refs |= 1 << len(names)
+            names.append(pdef.name)
+        self.names = tuple(names)
+        self.offsets = dict((name, i) for i, name in enumerate(names))
+
+    @staticmethod
+    def from_class(classobj):
+        layout = classobj.__dict__.get('property_layout', None)
+        if layout is None:
+            propertydefs = list(classobj.propertydefs)
+            if classobj.propertydefs_dict:
+                propertydefs.extend(classobj.propertydefs_dict.values())
+            layout = AVBPropertyLayout(propertydefs)
+            classobj.property_layout = layout
+        return layout
+
+class AVBPropertySlots(object):
+    """
+    Compact alternative to AVBPropertyData. Values are kept in a fixed size slot list
+    indexed by the class's AVBPropertyLayout, a bitmap records which slots are set.
+    Reference properties are stored as plain object indices.
+    Behaves like a mapping so it can be used anywhere property_data is.
+    """
+    __slots__ = ('root', 'layout', 'slots', 'present')
+
+    def __init__(self, layout, root=None):
+        self.root = root
+        self.layout = layout
+        self.slots = [None] * len(layout.names)
+        self.present = 0
+
+    def deref(self, value, i=None):
+        if isinstance(value, utils.AVBObjectRef):
+            return value.value
+        if i is not None and self.layout.refs & (1 << i) and isinstance(value, INT_FORMAT):
+            return utils.deref_index(self.root, value)
+        return value
+
+    def get_ref(self, key):
+        i = self.layout.offsets.get(key, None)
+        if i is None or not self.present & (1 << i):
+            return None
+        value = self.slots[i]
+        if self.layout.refs & (1 << i) and isinstance(value, INT_FORMAT):
+            return utils.AVBObjectRef(self.root, value)
+        if isinstance(value, utils.AVBObjectRef):
+            return value
+        return None
+
+    def offset(self, key):
+        i = self.layout.offsets.get(key, None)
+        if i is None:
+            raise KeyError(key)
+        return i
 
-    def get(self, *args, **kwargs):
-        return self.deref(super(AVBPropertyData, self).get(*args, **kwargs))
+    def __getitem__(self, key):
+        i = self.offset(key)
+        if not self.present & (1 << i):
+            raise KeyError(key)
+        return self.deref(self.slots[i], i)
+
+    def __setitem__(self, key, value):
+        i = self.offset(key)
+        if isinstance(value, utils.AVBObjectRef) and self.layout.refs & (1 << i) and value.root is self.root:
+            value = value.index
+        self.slots[i] = value
+        self.present |= 1 << i
+
+    def __delitem__(self, key):
+        i = self.offset(key)
+        if not self.present & (1 << i):
+            raise KeyError(key)
+        self.slots[i] = None
+        self.present &= ~(1 << i)
+
+    def __contains__(self, key):
+        i = self.layout.offsets.get(key, None)
+        if i is None:
+            return False
+        return bool(self.present & (1 << i))
+
+    def __iter__(self):
+        present = self.present
+        for i, name in enumerate(self.layout.names):
+            if present & (1 << i):
+                yield name
+
+    def __len__(self):
+        return bin(self.present).count('1')
+
+    def get(self, key, default=None):
+        i = self.layout.offsets.get(key, None)
+        if i is None or not self.present & (1 << i):
+            return default
+        return self.deref(self.slots[i], i)
+
+    def pop(self, key, default=sentinel):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        if default is sentinel:
+            raise KeyError(key)
+        return default
+
+    def keys(self):
+        return list(self)
+
+    def values(self):
+        present = self.present
+        return [self.deref(value, i) for i, value in enumerate(self.slots) if present & (1 << i)]
+
+    def items(self):
+        slots = self.slots
+        present = self.present
+        for i, name in enumerate(self.layout.names):
+            if present & (1 << i):
+                yield name, self.deref(slots[i], i)
+
+    def update(self, data):
+        # copies values as stored, references are not resolved
+        for key, value in dict.items(data):
+            self[key] = value
+
+    def clear(self):
+        self.slots = [None] * len(self.layout.names)
+        self.present = 0
+
+# number of AVBRefList items read at a time when AVBFile.prefetch_refs is set
+PREFETCH_WINDOW = 256
 
 @utils.register_helper_class
 class AVBRefList(list):
@@ -112,7 +294,7 @@ class AVBRefList(list):
 
     def deref(self, value):
         if isinstance(value, INT_FORMAT):
-            return utils.AVBObjectRef(self.root, value).value
+            return utils.deref_index(self.root, value)
 
         if isinstance(value, utils.AVBObjectRef):
             return value.value
@@ -129,7 +311,52 @@ class AVBRefList(list):
         super(AVBRefList, self).__delitem__(index)
         self.mark_modified()
 
+    def __reduce__(self):
+        from . import transfer
+        return transfer.reduce_object(self)
+
+    def __copy__(self):
+        obj = self.__class__.__new__(self.__class__, root=self.root, parent=self.parent)
+        list.extend(obj, list.__iter__(self))
+        return obj
+
+    def __deepcopy__(self, memo):
+        return self.copy(self.root)
+
+    def prefetch(self, start=0, stop=None):
+        """
+        Reads the objects referenced by items start to stop in one pass through
+        AVBFile.read_objects and returns them in list order. The list keeps its
+        indices, the objects stay in the weak object cache only as long as the
+        caller holds on to them.
+        """
+        root = self.root
+        values = super(AVBRefList, self).__getitem__(slice(start, stop))
+        if root is None or root.debug_copy_refs or getattr(root, 'f', None) is None:
+            return [self.deref(value) for value in values]
+
+        indices = []
+        for i, value in enumerate(values):
+            if isinstance(value, utils.AVBObjectRef):
+                value = value.index
+            if isinstance(value, INT_FORMAT) and value > 0:
+                indices.append((i, value))
+
+        if indices:
+            objects = root.read_objects([index for i, index in indices])
+            for (i, index), obj in zip(indices, objects):
+                values[i] = obj
+        return [self.deref(value) for value in values]
+
     def __iter__(self):
+        # prefetching is opt-in, only one window of objects is held at a time
+        if getattr(self.root, 'prefetch_refs', False):
+            start = 0
+            while start < len(self):
+                for value in self.prefetch(start, start + PREFETCH_WINDOW):
+                    yield value
+                start += PREFETCH_WINDOW
+            return
         for value in super(AVBRefList, self).__iter__():
             yield self.deref(value)
 
@@ -171,8 +398,14 @@ class AVBObject(object):
 
     def __new__(cls, *args, **kwargs):
         self = super(AVBObject, cls).__new__(cls)
-        self.root = kwargs.get("root", None)
-        self.property_data = AVBPropertyData()
+        self.root = root = kwargs.get("root", None)
+        layout = AVBPropertyLayout.from_class(cls)
+        if getattr(root, 'compact', False):
+            self.property_data = AVBPropertySlots(layout, root)
+        else:
+            self.property_data = data = AVBPropertyData()
+            data.root = root
+            data.layout = layout
         return self
 
     def __init__(self, *args, **kwargs):
@@ -190,6 +423,18 @@ class AVBObject(object):
             if item.name == name:
                 return item
 
+    def get_ref(self, name):
+        """
+        Returns the AVBObjectRef stored for a reference property or None.
+        """
+        data = self.property_data
+        get_ref = getattr(data, 'get_ref', None)
+        if get_ref is not None:
+            return get_ref(name)
+        value = dict.get(data, name, None)
+        if isinstance(value, utils.AVBObjectRef):
+            return value
+
     def get(self, key, default):
         for property_key, value in self.property_data.items():
             if property_key == key:
@@ -218,6 +463,22 @@ class AVBObject(object):
     def write(self, f):
         pass
 
+    def __reduce__(self):
+        # pickles a detached copy of the object and everything it references, see transfer.py
+        from . import transfer
+        return transfer.reduce_object(self)
+
+    def __copy__(self):
+        # copy.copy and copy.deepcopy stay within root, only pickling detaches
+        obj = self.__class__.__new__(self.__class__, root=self.root)
+        obj.property_data = self.property_data
+        if hasattr(self, 'instance_id'):
+            obj.instance_id = self.instance_id
+        return obj
+
+    def __deepcopy__(self, memo):
+        return self.copy(self.root)
+
     def copy(self, root):
         obj = root.create.from_name(self.__class__.__name__)
         for key, value in self.property_data.items():
@@ -34,9 +34,9 @@ class MediaDescriptor(core.AVBObject):
 
         self.mob_kind = ctx.read_u8(f)
         self.locator = []
-        self.locator = ctx.read_object_ref(self.root, f)
+        self.locator = ctx.read_object_index(self.root, f)
         self.intermediate = ctx.read_bool(f)
-        self.physical_media = ctx.read_object_ref(self.root, f)
+        self.physical_media = ctx.read_object_index(self.root, f)
 
         # print('sss', self.locator)
         # print(peek_data(f).encode('hex'))
@@ -55,7 +55,7 @@ class MediaDescriptor(core.AVBObject):
                 self.wchar = bytearray(f.read(size))
             elif tag == 0x03:
                 ctx.read_assert_tag(f, 72)
-                self.attributes = ctx.read_object_ref(self.root, f)
+                self.attributes = ctx.read_object_index(self.root, f)
             else:
                 raise ValueError("%s: unknown ext tag 0x%02X %d" % (str(self.class_id), tag,tag))
 
@@ -100,6 +100,7 @@ class MediaDescriptor(core.AVBObject):
 @utils.register_class
 class TapeDescriptor(MediaDescriptor):
     class_id = b'MDTP'
+    propertydefs_dict = {}
     propertydefs = MediaDescriptor.propertydefs + [
         AVBPropertyDef('cframe', 'OMFI:MDTP:CFrame', "int16",  0)
     ]
@@ -126,6 +127,7 @@ class TapeDescriptor(MediaDescriptor):
 @utils.register_class
 class FilmDescriptor(MediaDescriptor):
     class_id = b'MDFM'
+    propertydefs_dict = {}
     __slots__ = ()
 
     def read(self, f):
@@ -146,6 +148,7 @@ class FilmDescriptor(MediaDescriptor):
 @utils.register_class
 class NagraDescriptor(MediaDescriptor):
     class_id = b'MDNG'
+    propertydefs_dict = {}
     __slots__ = ()
 
     def read(self, f):
@@ -166,6 +169,7 @@ class NagraDescriptor(MediaDescriptor):
 @utils.register_class
 class MediaFileDescriptor(MediaDescriptor):
     class_id = b'MDFL'
+    propertydefs_dict = {}
     propertydefs = MediaDescriptor.propertydefs + [
         AVBPropertyDef('edit_rate',   'EdRate',               'fexp10', 25),
         AVBPropertyDef('length',      'OMFI:MDFL:Length',     'int32',   0),
@@ -205,6 +209,7 @@ class MediaFileDescriptor(MediaDescriptor):
 @utils.register_class
 class MultiDescriptor(MediaFileDescriptor):
     class_id = b'MULD'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('descriptors', 'OMFI:MULD:Descriptors', "ref_list"),
     ]
@@ -219,7 +224,7 @@ class MultiDescriptor(MediaFileDescriptor):
         count = ctx.read_s32(f)
         self.descriptors = AVBRefList.__new__(AVBRefList, root=self.root, parent=self)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.descriptors.append(ref)
 
         ctx.read_assert_tag(f, 0x03)
@@ -240,6 +245,7 @@ class MultiDescriptor(MediaFileDescriptor):
 @utils.register_class
 class WaveDescriptor(MediaFileDescriptor):
     class_id = b'WAVE'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('summary',   'OMFI:WAVD:Summary',   'bytes'),
     ]
@@ -272,6 +278,7 @@ class WaveDescriptor(MediaFileDescriptor):
 @utils.register_class
 class AIFCDescriptor(MediaFileDescriptor):
     class_id = b'AIFC'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('summary',   'OMFI:AIFD:Summary',   'bytes'),
         AVBPropertyDef('data_pos',  'OMFI:AIFD:MC:DataPos', 'int32'),
@@ -320,6 +327,7 @@ class AIFCDescriptor(MediaFileDescriptor):
 @utils.register_class
 class PCMADescriptor(MediaFileDescriptor):
     class_id = b'PCMA'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('channels',                    'OMFI:MDAU:NumChannels',               'uint16'),
         AVBPropertyDef('quantization_bits',           'OMFI:MDAU:BitsPerSample',             'uint16'),
@@ -439,6 +447,7 @@ class PCMADescriptor(MediaFileDescriptor):
 @utils.register_class
 class MPGADescriptor(MediaFileDescriptor):
     class_id = b'MPGA'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('channels',                    'OMFI:MDAU:NumChannels',               'uint16'),
         AVBPropertyDef('quantization_bits',           'OMFI:MDAU:BitsPerSample',             'uint16'),
@@ -520,6 +529,7 @@ class MPGADescriptor(MediaFileDescriptor):
 @utils.register_class
 class DIDDescriptor(MediaFileDescriptor):
     class_id = b'DIDD'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef('stored_height',              'OMFI:DIDD:StoredHeight',                            'int32',    1080),
         AVBPropertyDef('stored_width',               'OMFI:DIDD:StoredWidth',                             'int32',    1920),
@@ -601,7 +611,7 @@ class DIDDescriptor(MediaFileDescriptor):
 
         self.did_image_size = ctx.read_s32(f)
 
-        self.next_did_desc = ctx.read_object_ref(self.root, f)
+        self.next_did_desc = ctx.read_object_index(self.root, f)
 
         self.compress_method = ctx.read_fourcc(f)
 
@@ -985,6 +995,7 @@ class DIDDescriptor(MediaFileDescriptor):
 @utils.register_class
 class CDCIDescriptor(DIDDescriptor):
     class_id = b'CDCI'
+    propertydefs_dict = {}
     propertydefs = DIDDescriptor.propertydefs + [
         AVBPropertyDef('horizontal_subsampling', 'OMFI:CDCI:HorizontalSubsampling',         'uint32',   2),
         AVBPropertyDef('vertical_subsampling',   'OMFI:CDCI:VerticalSubsampling',           'uint32',   1),
@@ -1065,6 +1076,7 @@ class CDCIDescriptor(DIDDescriptor):
 @utils.register_class
 class MPGIDescriptor(CDCIDescriptor):
     class_id = b'MPGI'
+    propertydefs_dict = {}
     propertydefs = CDCIDescriptor.propertydefs + [
         AVBPropertyDef('mpeg_version',     "OMFI:MPGI:MPEGVersion",        "uint8"),
         AVBPropertyDef('profile',          "OMFI:MPGI:ProfileAndLevel",    "uint8"),
@@ -1123,6 +1135,7 @@ class MPGIDescriptor(CDCIDescriptor):
 @utils.register_class
 class JPEGDescriptor(CDCIDescriptor):
     class_id = b'JPED'
+    propertydefs_dict = {}
     propertydefs = CDCIDescriptor.propertydefs + [
         AVBPropertyDef('jpeg_table_id',           "OMFI:JPED:JPEGTableID",           "int32"),
         AVBPropertyDef('jpeg_frame_index_offset', "OMFI:JPED:OffsetToFrameIndexes",  "uint64"),
@@ -1184,6 +1197,7 @@ def encode_pixel_layout(ctx, layout):
 @utils.register_class
 class RGBADescriptor(DIDDescriptor):
     class_id = b'RGBA'
+    propertydefs_dict = {}
     propertydefs = DIDDescriptor.propertydefs + [
         AVBPropertyDef('pixel_layout',       'OMFI:RGBA:PixelLayout',          'list'),
         AVBPropertyDef('palette',            'OMFI:RGBA:Palette',              'list'),
@@ -1316,6 +1330,7 @@ class RGBADescriptor(DIDDescriptor):
 @utils.register_class
 class DataDescriptor(MediaFileDescriptor):
     class_id = b'DATD'
+    propertydefs_dict = {}
     propertydefs = MediaFileDescriptor.propertydefs + [
         AVBPropertyDef("is_offset_to_frame_indexes_valid", "OMFI:DATD:IsOffsetToFrameIndexesValid", 'bool'),
         AVBPropertyDef("offset_to_frame_indexes",          "OMFI:DATD:OffsetToFrameIndexes",        'uint64'),
@@ -1352,6 +1367,7 @@ class DataDescriptor(MediaFileDescriptor):
 @utils.register_class
 class ANCDataDescriptor(DataDescriptor):
     class_id = b'ANCD'
+    propertydefs_dict = {}
     propertydefs = DataDescriptor.propertydefs + [
         AVBPropertyDef("manifest_element_count",  "OMFI:ANCD:ManifestElementCount",  'int32'),
     ]
@@ -11,7 +11,7 @@ import struct
 import io
 import os
 import binascii
-import traceback
+import threading
 import array
 from weakref import WeakValueDictionary
 import struct
@@ -19,6 +19,10 @@ import struct
 from . import utils
 from .core import walk_references
 from .ioctx import AVBIOContext
+from .blockio import FileReader
+from . import refscan
+from . import instrument
+from .refscan import ReferenceIndex
 
 
 try:
@@ -26,6 +30,18 @@ try:
 except:
     READERS = {}
 
+LOCATOR_FIELDS = {
+    b'FILE': ('path', 'path_posix', 'path_utf8', 'path2_utf8'),
+    b'WINF': ('path', 'path_posix', 'path_utf8', 'path2_utf8'),
+    b'MSML': ('last_known_volume', 'last_known_volume_utf8', 'domain_type', 'mob_id'),
+}
+
+def locator_fields(index, locator):
+    fields = {'class_id': locator.class_id, 'index': index}
+    for name in LOCATOR_FIELDS[locator.class_id]:
+        fields[name] = locator.property_data.get(name, None)
+    return fields
+
 class AVBChunk(object):
     __slots__ = ('root', 'class_id', 'pos', 'size')
     def __init__(self, root, class_id, pos, size):
@@ -35,8 +51,11 @@ class AVBChunk(object):
         self.size = size
 
     def read(self):
-        self.root.f.seek(self.pos)
-        return self.root.f.read(self.size)
+        reader = getattr(self.root, 'reader', None)
+        if reader is None:
+            self.root.f.seek(self.pos)
+            return self.root.f.read(self.size)
+        return reader.read(self.pos, self.size)
 
     def hex(self):
         ctx = self.root.ictx
@@ -71,14 +90,9 @@ class AVBFactory(object):
             raise ValueError("could not find class for: " + name)
 
         # obj = classobj(None, *args, **kwargs)
-        obj = classobj.__new__(classobj)
-        obj.root = self.root
+        obj = classobj.__new__(classobj, root=self.root)
         if hasattr(obj, "class_id") and obj.class_id:
-            self.root.next_object_id += 1
-            obj.instance_id = self.root.next_object_id
-
-            self.root.modified_objects[obj.instance_id] = obj
-            self.root.object_cache[obj.instance_id] = obj
+            self.root.add_object(obj)
 
         obj.__init__(*args, **kwargs)
 
@@ -100,24 +114,48 @@ def is_fileobject_like(fileobject):
     return True
 
 class AVBFile(object):
-    def __init__(self, fileobject=None, buffering=io.DEFAULT_BUFFER_SIZE, use_ext=True):
+    def __init__(self, fileobject=None, buffering=io.DEFAULT_BUFFER_SIZE, use_ext=True, compact=False, reader=None, stats=None, index=None):
 
+        # store object properties in fixed slot layouts instead of OrderedDicts
+        self.compact = compact
         self.check_refs = True
         self.debug_copy_refs = False
-        self.reading = False
+        # read AVBRefList items in coalesced windows when the list is iterated, see AVBRefList.prefetch
+        self.prefetch_refs = False
+        # decode state is per thread, objects can be read from several threads at once
+        self.decode_state = threading.local()
 
         self.create = AVBFactory(self)
         self.object_cache = WeakValueDictionary()
+        self.cache_lock = threading.RLock()
         self.modified_objects = {}
+        # incremented on every modification, lets caches built from objects detect changes
+        self.modification_count = 0
+        # modification_count after the last modification of each object in modified_objects
+        self.modification_counts = {}
         self.next_object_id = 0
 
         self.octx = None
         self.ictx = None
 
+        # decoded strings shared by all objects read from this file
+        self.string_table = {}
+        self.ref_index = None
+        # objects restored from a snapshot, kept alive while the file is open
+        self.pinned_objects = None
+
+        self.reader = None
+        # FileStats collecting while instrumentation is enabled, see instrument.py
+        self.stats = None
         if fileobject is None:
             self.setup_empty()
+            if stats is not None:
+                instrument.enable(self, stats)
             return
 
+        if stats is not None:
+            start = instrument.clock()
+
         if is_fileobject_like(fileobject):
             self.f = fileobject
         else:
@@ -127,11 +165,11 @@ class AVBFile(object):
         file_bytes = f.read(2)
         self.fast_readers = {}
         if file_bytes == LE_BYTE_ORDER:
-            ctx = AVBIOContext('little')
+            ctx = AVBIOContext('little', self.string_table)
             if use_ext:
                 self.fast_readers = READERS
         elif file_bytes == BE_BYTE_ORDER:
-            ctx = AVBIOContext('big')
+            ctx = AVBIOContext('big', self.string_table)
         else:
             raise ValueError("not a avb file")
 
@@ -154,7 +192,7 @@ class AVBFile(object):
         v  = ctx.read_u32(f)
         assert v in (0x49494949, 0x4D4D4D4D)
 
-        self.last_save = ctx.read_datetime(f)
+        self.last_save_timestamp = ctx.read_timestamp(f)
 
         # skip 4 bytes
         f.read(4)
@@ -169,15 +207,31 @@ class AVBFile(object):
 
         self.root_chunk = AVBChunk(self, b'OBJD', pos, f.tell() - pos)
 
-        self.object_positions = array.array(str('L'), [0 for i in range(num_objects+1)])
+        if index is None:
+            self.object_positions = array.array(str('L'), [0 for i in range(num_objects+1)])
+
+            for i in range(num_objects):
+                self.object_positions[i+1] = f.tell()
+                class_id = f.read(4)
+                size = ctx.read_u32(f)
+
+                f.seek(size, os.SEEK_CUR)
+
+            self.objects_end = f.tell()
+        else:
+            # (object_positions, objects_end) from an earlier scan of the same file, see shm.py
+            self.object_positions, self.objects_end = index
+            if len(self.object_positions) != num_objects + 1:
+                raise ValueError("index does not match file")
+
         self.next_object_id = len(self.object_positions)
 
-        for i in range(num_objects):
-            self.object_positions[i+1] = f.tell()
-            class_id = f.read(4)
-            size = ctx.read_u32(f)
+        # all object data is read through a reader, for example blockio.BlockCacheReader
+        self.reader = (reader or FileReader)(f)
 
-            f.seek(size, os.SEEK_CUR)
+        if stats is not None:
+            stats.header_time += instrument.clock() - start
+            instrument.enable(self, stats)
 
         self.content = self.read_object(self.root_index)
 
@@ -189,11 +243,45 @@ class AVBFile(object):
 
         self.update_save_time()
 
+    @property
+    def reading(self):
+        return getattr(self.decode_state, 'reading', False)
+
+    @reading.setter
+    def reading(self, value):
+        self.decode_state.reading = value
+
+    @property
+    def last_save(self):
+        return utils.timestamp_to_datetime(self.last_save_timestamp)
+
+    @last_save.setter
+    def last_save(self, value):
+        self.last_save_timestamp = utils.datetime_to_timestamp(value)
+
     def update_save_time(self):
         self.last_save = datetime.datetime.now()
 
     def add_modified(self, obj):
         self.modified_objects[obj.instance_id] = obj
+        self.modification_count += 1
+        self.modification_counts[obj.instance_id] = self.modification_count
+
+    def add_object(self, obj):
+        with self.cache_lock:
+            self.next_object_id += 1
+            obj.instance_id = self.next_object_id
+
+            self.modified_objects[obj.instance_id] = obj
+            self.object_cache[obj.instance_id] = obj
+            self.modification_count += 1
+            self.modification_counts[obj.instance_id] = self.modification_count
+
+    def modified_indices(self, count):
+        """
+        Returns the indices of the objects modified or added after modification_count was count.
+        """
+        return [index for index, value in self.modification_counts.items() if value > count]
 
     def write_header(self, f):
 
@@ -219,7 +307,7 @@ class AVBFile(object):
         else:
             ctx.write_u32(f, 0x4D4D4D4D)
 
-        ctx.write_datetime(f, self.last_save)
+        ctx.write_datetime(f, self.last_save_timestamp)
         ctx.write_u32(f, 0)
 
         ctx.write_fourcc(f, b'ATob')
@@ -246,18 +334,21 @@ class AVBFile(object):
 
         object_pos = self.object_positions[index]
 
-        f = self.f
-        f.seek(object_pos)
+        class_id, size = self.unpack_chunk_header(self.reader.read(object_pos, 8))
 
+        chunk = AVBChunk(self, class_id, object_pos + 8, size)
+        return chunk
+
+    def unpack_chunk_header(self, header):
         if self.ictx.byte_order == 'little':
-            class_id, size = struct.unpack(b"<4sI", f.read(8))
-            class_id = class_id[::-1]
-        else:
-            class_id, size = struct.unpack(b">4sI", f.read(8))
+            class_id, size = struct.unpack(b"<4sI", header)
+            return class_id[::-1], size
+        return struct.unpack(b">4sI", header)
 
-        pos = f.tell()
-        chunk = AVBChunk(self, class_id, pos, size)
-        return chunk
+    def object_end(self, index):
+        if index + 1 < len(self.object_positions):
+            return self.object_positions[index + 1]
+        return self.objects_end
 
     def read_object(self, index):
         if index == 0:
@@ -267,25 +358,115 @@ class AVBFile(object):
         if object_instance is not None:
             return object_instance
 
-        object_pos = self.object_positions[index]
+        class_id, data = self.read_chunk_data(index)
+        return self.decode_object(index, class_id, data)
 
-        f = self.f
-        f.seek(object_pos)
-
-        if self.ictx.byte_order == 'little':
-            class_id, size = struct.unpack(b"<4sI", f.read(8))
-            class_id = class_id[::-1]
+    def read_chunk_data(self, index):
+        object_pos = self.object_positions[index]
+        buf = self.reader.read(object_pos, self.object_end(index) - object_pos)
+
+        class_id, size = self.unpack_chunk_header(buf[:8])
+        data = bytearray(buf[8:8+size])
+        assert len(data) == size
+        return class_id, data
+
+    def iter_chunk_data(self, indices=None, max_gap=64*1024, max_read=16*1024*1024, class_ids=None):
+        """
+        Yields (index, class_id, data) for the chunks at indices, or all chunks if
+        indices is None, in file order. Neighbouring chunks are coalesced into a single read.
+        If class_ids is set only chunks of those classes are yielded, indices of objects
+        created after the file was read are skipped.
+        """
+        positions = getattr(self, 'object_positions', None)
+        if positions is None:
+            # created with avb.open(), there are no chunks
+            return
+        if indices is None:
+            pending = list(range(1, len(positions)))
         else:
-            class_id, size = struct.unpack(b">4sI", f.read(8))
-
-        data = bytearray(size)
-        bytes_read = f.readinto(data)
-        assert bytes_read == size
-
+            count = len(positions)
+            pending = sorted(set(index for index in indices if 0 < index < count), key=positions.__getitem__)
+
+        start = 0
+        while start < len(pending):
+            end = start + 1
+            read_pos = positions[pending[start]]
+            read_end = self.object_end(pending[start])
+            while end < len(pending):
+                next_end = self.object_end(pending[end])
+                if positions[pending[end]] - read_end > max_gap or next_end - read_pos > max_read:
+                    break
+                read_end = next_end
+                end += 1
+
+            buf = self.reader.read(read_pos, read_end - read_pos)
+
+            for index in pending[start:end]:
+                offset = positions[index] - read_pos
+                class_id, size = self.unpack_chunk_header(buf[offset:offset+8])
+                if class_ids is not None and class_id not in class_ids:
+                    continue
+                data = bytearray(buf[offset+8:offset+8+size])
+                assert len(data) == size
+                yield index, class_id, data
+
+            start = end
+
+    def read_objects(self, indices, max_gap=64*1024, max_read=16*1024*1024):
+        """
+        Reads multiple objects at once. Chunks not already cached are read in file
+        order, neighbouring chunks are coalesced into a single read. The chunks are
+        still decoded one at a time. Returns a list of objects in the order of indices.
+        """
+        objects = {}
+        pending = set()
+        for index in indices:
+            if index <= 0 or index in objects:
+                continue
+            obj = self.object_cache.get(index, None)
+            if obj is None:
+                pending.add(index)
+            else:
+                objects[index] = obj
+
+        for index, class_id, data in self.iter_chunk_data(pending, max_gap, max_read):
+            objects[index] = self.decode_object(index, class_id, data)
+
+        return [objects.get(index, None) for index in indices]
+
+    def reference_index(self, rebuild=False):
+        """
+        Returns the ReferenceIndex of the file, scanning every chunk on first use.
+        The index describes the file on disk, unsaved modifications are not included.
+        Raises ValueError for files without chunks, like files created with avb.open().
+        """
+        if getattr(self, 'object_positions', None) is None:
+            raise ValueError("file has no chunks to index")
+        if rebuild or self.ref_index is None:
+            self.ref_index = ReferenceIndex(self)
+        return self.ref_index
+
+    def referrers(self, index):
+        """
+        Returns the indices of the objects that reference the object at index.
+        """
+        return self.reference_index().referrers(index)
+
+    def unreachable_objects(self):
+        """
+        Returns the indices of the objects that can not be reached from the root object.
+        Raises ValueError if the references of a reachable object of an unknown class
+        would have to be followed.
+        """
+        return self.reference_index().unreachable(self.root_index)
+
+    def decode_object(self, index, class_id, data):
         obj_class = utils.AVBClaseID_dict.get(class_id, None)
         if obj_class:
+            state = self.decode_state
+            reading = getattr(state, 'reading', False)
             try:
-                self.reading = True
+                state.reading = True
                 # NOTE: objects read from file do not run __init__
                 object_instance = obj_class.__new__(obj_class, root=self)
 
@@ -302,18 +483,25 @@ class AVBFile(object):
                     object_instance.read(r)
                     # print(len(r.read()))
                     assert len(r.read()) == 0
-                self.object_cache[index] = object_instance
                 object_instance.instance_id = index
+
+                # another thread may have decoded the same object meanwhile, the first one wins
+                with self.cache_lock:
+                    cached = self.object_cache.get(index, None)
+                    if cached is not None:
+                        return cached
+                    self.object_cache[index] = object_instance
                 return object_instance
             except:
                 pos = self.object_positions[index] + 8
                 chunk = AVBChunk(self, class_id, pos, len(data))
                 print(chunk.class_id)
                 print(chunk.hex())
+                import traceback
                 print(traceback.format_exc())
                 raise
             finally:
-                self.reading = False
+                state.reading = reading
 
         else:
             pos = self.object_positions[index] + 8
@@ -369,6 +557,211 @@ class AVBFile(object):
         finally:
             self.octx = None
 
+    def write_compacted(self, path):
+        """
+        Writes only the chunks reachable from the root object. Reachability is found
+        with the reference index and the chunks are copied verbatim in file order
+        with their object indices renumbered, no objects are kept. Chunks without a
+        native reader or offset scanner are decoded to find their indices, see
+        refscan.ref_offsets. The file is written in its original byte order.
+        Raises ValueError if a reachable chunk has an unknown class, its indices
+        could not be renumbered.
+        Returns a dict with the object and byte counts before and after.
+        """
+        if self.modified_objects:
+            raise ValueError("file has unsaved modifications, use write instead")
+
+        index = self.reference_index()
+        reachable = index.reachable(self.root_index)
+        count = len(self.object_positions)
+        for i in index.unknown:
+            if reachable[i]:
+                raise ValueError("object %d has unknown class %r, the file can not be compacted"
+                                 % (i, index.class_ids[i]))
+
+        mapping = array.array(str('L'), [0]) * count
+        order = []
+        for i in range(1, count):
+            if reachable[i]:
+                order.append(i)
+                mapping[i] = len(order)
+
+        bytes_reclaimed = 0
+        for i in range(1, count):
+            if not reachable[i]:
+                bytes_reclaimed += self.object_end(i) - self.object_positions[i]
+
+        byte_order = self.ictx.byte_order
+        ctx = AVBIOContext(byte_order)
+        self.octx = ctx
+        try:
+            with io.open(path, 'wb') as f:
+                count_pos = self.write_header(f)
+                for i, class_id, data in self.iter_chunk_data(order):
+                    offsets = refscan.ref_offsets(self, class_id, data)
+                    refscan.remap_refs(byte_order, data, offsets, mapping)
+
+                    ctx.write_fourcc(f, class_id)
+                    ctx.write_u32(f, len(data))
+                    f.write(data)
+
+                size = f.tell()
+                f.seek(count_pos)
+                ctx.write_u32(f, len(order))
+                ctx.write_u32(f, mapping[self.root_index])
+                f.seek(size)
+        finally:
+            self.octx = None
+
+        return {
+            'objects_before': count - 1,
+            'objects_written': len(order),
+            'objects_dropped': count - 1 - len(order),
+            'bytes_before': self.objects_end,
+            'bytes_written': size,
+            'bytes_reclaimed': bytes_reclaimed,
+        }
+
+    def iter_locators(self):
+        """
+        Yields (mob_id, fields) for every media locator in the file, in file order.
+        fields is a dict with the locator's class_id, index and path or volume
+        properties. mob_id is the id of the mob owning the locator through its
+        descriptor, or None. Mobs, descriptors and locators are read in a single
+        pass over their chunks, only the locators are decoded. Files without chunks,
+        like files created with avb.open(), are walked from their mobs.
+        """
+        from .essence import MediaDescriptor
+        from .query import chunk_values, has_chunks
+
+        if not has_chunks(self):
+            for item in self.iter_memory_locators():
+                yield item
+            return
+
+        descriptors = set(class_id for class_id, classobj in utils.AVBClaseID_dict.items()
+                          if issubclass(classobj, MediaDescriptor))
+        class_ids = set(LOCATOR_FIELDS) | descriptors | set([b'CMPO'])
+
+        referrers = {}
+        mob_ids = {}
+        locators = []
+        for i, class_id, data in self.iter_chunk_data(class_ids=class_ids):
+            if class_id in LOCATOR_FIELDS:
+                locator = self.object_cache.get(i, None)
+                if locator is None:
+                    locator = self.decode_object(i, class_id, data)
+                locators.append(locator_fields(i, locator))
+                continue
+
+            if class_id == b'CMPO':
+                mob_ids[i] = chunk_values(self, i, class_id, data, ['mob_id'])[0]
+            for ref in refscan.chunk_refs(self, class_id, data):
+                referrers.setdefault(ref, []).append(i)
+
+        for fields in locators:
+            # nearest mobs above the locator, through its descriptors
+            owners = set()
+            seen = set([fields['index']])
+            stack = [fields['index']]
+            while stack:
+                for ref in referrers.get(stack.pop(), ()):
+                    if ref in seen:
+                        continue
+                    seen.add(ref)
+                    if ref in mob_ids:
+                        owners.add(ref)
+                    else:
+                        stack.append(ref)
+
+            for owner in sorted(owners) or [None]:
+                yield mob_ids.get(owner, None), dict(fields)
+
+    def iter_memory_locators(self):
+        # the locators of every mob, through walking their decoded objects
+        owners = {}
+        for mob in self.content.mobs:
+            for obj in walk_references(mob):
+                if getattr(obj, 'class_id', None) in LOCATOR_FIELDS:
+                    mob_ids = owners.setdefault(obj.instance_id, [])
+                    if mob.mob_id not in mob_ids:
+                        mob_ids.append(mob.mob_id)
+
+        for i, obj in sorted(self.modified_objects.items()):
+            if getattr(obj, 'class_id', None) in LOCATOR_FIELDS:
+                fields = locator_fields(i, obj)
+                for mob_id in owners.get(i, None) or [None]:
+                    yield mob_id, dict(fields)
+
+    def tracker_columns(self):
+        """
+        Reads all tracker chunks (TKDA, TKDS, TKPS and TKPA) into a TrackerColumns
+        in a single pass over the file, without creating objects.
+        The columns describe the file on disk, unsaved modifications are not included,
+        the columns of a file created with avb.open() are empty.
+        """
+        from .columns import TrackerColumns
+        if self.ictx is None:
+            return TrackerColumns()
+        class_ids = set(table_class.class_id for name, table_class in TrackerColumns.tables)
+        return TrackerColumns.from_chunks(self.iter_chunk_data(class_ids=class_ids), self.ictx.byte_order)
+
+    def effect_param_columns(self):
+        """
+        Yields (index, EffectParamColumns) for every effect parameter list (FXPS) in
+        the file, in file order. Lists are parsed straight from the chunk data without
+        creating objects, lists with unsaved modifications are read from their objects.
+        """
+        from .columns import EffectParamColumns
+        for i, class_id, data in self.iter_chunk_data(class_ids=[b'FXPS']):
+            obj = self.modified_objects.get(i, None)
+            if obj is not None:
+                yield i, obj.param_columns()
+            else:
+                yield i, EffectParamColumns.from_chunk(data, self.ictx.byte_order)
+
+        # lists created after the file was read, or in a file created with avb.open()
+        count = len(getattr(self, 'object_positions', None) or [])
+        for i, obj in sorted(self.modified_objects.items()):
+            if i >= count and getattr(obj, 'class_id', None) == b'FXPS':
+                yield i, obj.param_columns()
+
+    def select(self, class_id=None, where=None, indices=None):
+        """
+        Yields the objects of class_id, a class id or a list of them, matching where
+        in file order. Simple predicates are tested against the raw chunk data by the
+        native readers, only matching objects are decoded. See avb.query.
+        """
+        from .query import select
+        return select(self, class_id, where, indices)
+
+    def save_snapshot(self, path, source=None):
+        """
+        Decodes every object and saves them to path, see avb.load_snapshot.
+        """
+        from .snapshot import save_snapshot
+        save_snapshot(self, path, source)
+
+    def enable_stats(self, stats=None):
+        """
+        Enables instrumentation and returns the FileStats object collecting
+        decode and encode timings, cache and reader counters.
+        """
+        return instrument.enable(self, stats)
+
+    def disable_stats(self):
+        """
+        Disables instrumentation and returns the collected FileStats.
+        """
+        return instrument.disable(self)
+
+    def profile(self, stats=None):
+        """
+        Returns a context manager that enables instrumentation for the duration
+        of the block, yielding the FileStats object.
+        """
+        return instrument.Instrument(self, stats)
+
     def chunks(self):
         for i in range(len(self.object_positions)):
             yield self.read_chunk(i)
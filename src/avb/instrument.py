@@ -0,0 +1,251 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import time
+
+try:
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+class ClassStats(object):
+    __slots__ = ('decode_count', 'decode_time', 'encode_count', 'encode_time',
+                 'fast_path', 'slow_path', 'bytes_decoded')
+
+    def __init__(self):
+        self.decode_count = 0
+        self.decode_time = 0.0
+        self.encode_count = 0
+        self.encode_time = 0.0
+        self.fast_path = 0
+        self.slow_path = 0
+        self.bytes_decoded = 0
+
+    def as_dict(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+class FileStats(object):
+    """
+    Counters and cumulative timings collected while instrumentation is enabled on
+    an AVBFile. Times are in seconds. Reader counters are relative to when the
+    stats were enabled.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.classes = {}
+        self.header_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.bytes_read = 0
+        self.seeks = 0
+        self.read_requests = 0
+
+    def class_stats(self, class_id):
+        s = self.classes.get(class_id, None)
+        if s is None:
+            s = ClassStats()
+            self.classes[class_id] = s
+        return s
+
+    def totals(self):
+        total = ClassStats()
+        for s in self.classes.values():
+            for name in ClassStats.__slots__:
+                setattr(total, name, getattr(total, name) + getattr(s, name))
+        return total
+
+    def as_dict(self):
+        d = self.totals().as_dict()
+        d.update(header_time=self.header_time,
+                 cache_hits=self.cache_hits,
+                 cache_misses=self.cache_misses,
+                 bytes_read=self.bytes_read,
+                 seeks=self.seeks,
+                 read_requests=self.read_requests)
+        d['classes'] = dict((class_id.decode('ascii', 'replace'), s.as_dict())
+                            for class_id, s in self.classes.items())
+        return d
+
+    def report(self):
+        """
+        Returns a text table of the per class counters, slowest classes first.
+        """
+        lines = ["%-4s %8s %10s %8s %10s %8s %8s" % (
+                 'id', 'decoded', 'dec_time', 'encoded', 'enc_time', 'fast', 'slow')]
+        items = sorted(self.classes.items(), key=lambda item: -(item[1].decode_time + item[1].encode_time))
+        for class_id, s in items:
+            lines.append("%-4s %8d %10.6f %8d %10.6f %8d %8d" % (
+                         class_id.decode('ascii', 'replace'), s.decode_count, s.decode_time,
+                         s.encode_count, s.encode_time, s.fast_path, s.slow_path))
+        lines.append("header: %.6f cache hits: %d misses: %d bytes read: %d seeks: %d" % (
+                     self.header_time, self.cache_hits, self.cache_misses, self.bytes_read, self.seeks))
+        return "\n".join(lines)
+
+    def __repr__(self):
+        s = "%s.%s"  % (self.__class__.__module__,
+                                self.__class__.__name__)
+        total = self.totals()
+        s += " decoded: %d encoded: %d cache hits: %d misses: %d" % (
+             total.decode_count, total.encode_count, self.cache_hits, self.cache_misses)
+        return '<%s at 0x%x>' % (s, id(self))
+
+class ReaderProbe(object):
+    """
+    Wraps the reader of an AVBFile, counting read requests and bytes read.
+    seeks counts the reads the reader issues on the underlying file, each one a
+    random access whether done with os.pread or a seek followed by a read. Reads
+    served from a block cache are not counted. Readers without stats only report
+    requests and bytes.
+    """
+    def __init__(self, reader, stats):
+        self.reader = reader
+        self.stats = stats
+        self.reader_stats = getattr(reader, 'stats', None)
+
+    def read(self, pos, size):
+        stats = self.stats
+        reader_stats = self.reader_stats
+        if reader_stats is None:
+            data = self.reader.read(pos, size)
+            stats.read_requests += 1
+            stats.bytes_read += len(data)
+            return data
+
+        reads = reader_stats.reads
+        bytes_read = reader_stats.bytes_read
+        data = self.reader.read(pos, size)
+        stats.read_requests += 1
+        stats.seeks += reader_stats.reads - reads
+        stats.bytes_read += reader_stats.bytes_read - bytes_read
+        return data
+
+    def __getattr__(self, name):
+        return getattr(self.reader, name)
+
+# The wrappers below are installed as instance attributes, shadowing the methods
+# of the class. Disabling removes them again so uninstrumented files run the
+# plain methods without any checks.
+
+def instrumented_read_object(root, stats, read_object):
+    object_cache = root.object_cache
+
+    def wrapper(index):
+        if index > 0:
+            if index in object_cache:
+                stats.cache_hits += 1
+            else:
+                stats.cache_misses += 1
+        return read_object(index)
+    return wrapper
+
+def instrumented_read_objects(root, stats, read_objects):
+    object_cache = root.object_cache
+
+    def wrapper(indices, *args, **kwargs):
+        indices = list(indices)
+        for index in set(indices):
+            if index > 0:
+                if index in object_cache:
+                    stats.cache_hits += 1
+                else:
+                    stats.cache_misses += 1
+        return read_objects(indices, *args, **kwargs)
+    return wrapper
+
+def instrumented_decode_object(root, stats, decode_object):
+
+    def wrapper(index, class_id, data):
+        s = stats.class_stats(class_id)
+        if class_id in root.fast_readers:
+            s.fast_path += 1
+        else:
+            s.slow_path += 1
+        start = clock()
+        try:
+            return decode_object(index, class_id, data)
+        finally:
+            s.decode_time += clock() - start
+            s.decode_count += 1
+            s.bytes_decoded += len(data)
+    return wrapper
+
+def instrumented_write_object(root, stats, write_object):
+
+    def wrapper(f, obj):
+        s = stats.class_stats(obj.class_id)
+        start = clock()
+        try:
+            return write_object(f, obj)
+        finally:
+            s.encode_time += clock() - start
+            s.encode_count += 1
+    return wrapper
+
+WRAPPERS = (
+    ('read_object', instrumented_read_object),
+    ('read_objects', instrumented_read_objects),
+    ('decode_object', instrumented_decode_object),
+    ('write_object', instrumented_write_object),
+)
+
+def enable(root, stats=None):
+    """
+    Installs instrumentation on root and returns the FileStats collecting into.
+    If root is already instrumented its current stats are returned.
+    """
+    if root.stats is not None:
+        return root.stats
+
+    if stats is None:
+        stats = FileStats()
+
+    for name, wrap in WRAPPERS:
+        setattr(root, name, wrap(root, stats, getattr(root, name)))
+
+    if root.reader is not None:
+        root.reader = ReaderProbe(root.reader, stats)
+
+    root.stats = stats
+    return stats
+
+def disable(root):
+    """
+    Removes instrumentation from root, returns the collected FileStats.
+    """
+    stats = root.stats
+    if stats is None:
+        return None
+
+    for name, wrap in WRAPPERS:
+        root.__dict__.pop(name, None)
+
+    if isinstance(root.reader, ReaderProbe):
+        root.reader = root.reader.reader
+
+    root.stats = None
+    return stats
+
+class Instrument(object):
+    """
+    Context manager enabling instrumentation on an AVBFile for the duration of
+    the block. Instrumentation already enabled on the file is left in place.
+    """
+    def __init__(self, root, stats=None):
+        self.root = root
+        self.stats = stats
+        self.owner = False
+
+    def __enter__(self):
+        self.owner = self.root.stats is None
+        self.stats = enable(self.root, self.stats)
+        return self.stats
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.owner:
+            disable(self.root)
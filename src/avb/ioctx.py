@@ -5,22 +5,25 @@ from __future__ import (
     division,
     )
 
-import time
 from datetime import datetime
-from struct import (pack, unpack)
+from struct import (pack, unpack, calcsize)
 from uuid import UUID
 
+from . import utils
 from .utils import AVBObjectRef
-from .mobid import MobID
+from .mobid import FrozenMobID
 
 exp10_pretty = {
 5994: (59940, -3),
 }
 
 class AVBIOContext(object):
-    def __init__(self, byte_order='little'):
+    def __init__(self, byte_order='little', string_table=None):
         self.byte_order = byte_order
 
+        # optional dict used to intern decoded strings, keyed by raw bytes
+        self.string_table = string_table
+
         if byte_order == 'little':
             self.read_u16  = self.read_u16le
             self.write_u16 = self.write_u16le
@@ -92,7 +95,7 @@ class AVBIOContext(object):
 
     @staticmethod
     def datetime_to_timestamp(d):
-        return int(time.mktime(d.timetuple()))
+        return utils.datetime_to_timestamp(d)
 
     @staticmethod
     def read_u8(f):
@@ -157,7 +160,16 @@ class AVBIOContext(object):
 
         s = f.read(size)
         s = s.strip(b'\x00')
-        return s.decode(encoding)
+
+        table = self.string_table
+        if table is None:
+            return s.decode(encoding)
+
+        key = s if encoding == 'macroman' else (encoding, s)
+        value = table.get(key, None)
+        if value is None:
+            value = table[key] = s.decode(encoding)
+        return value
 
     def write_string(self, f, s, encoding = 'macroman'):
         s = s or b""
@@ -173,12 +185,14 @@ class AVBIOContext(object):
         self.write_u16(f, size)
         f.write(data)
 
-    def read_object_ref(self, root, f):
+    def read_object_index(self, root, f):
         index = self.read_u32(f)
-        ref =  AVBObjectRef(root, index)
-        if not root.check_refs or ref.valid:
-            return ref
-        raise ValueError("bad index: %d" % index)
+        if root.check_refs and index >= len(root.object_positions):
+            raise ValueError("bad index: %d" % index)
+        return index
+
+    def read_object_ref(self, root, f):
+        return AVBObjectRef(root, self.read_object_index(root, f))
 
     def write_object_ref(self, root, f, value):
         if value is None:
@@ -192,6 +206,37 @@ class AVBIOContext(object):
 
         self.write_u32(f, index)
 
+    def record_format(self, fields, count):
+        prefix = '<' if self.byte_order == 'little' else '>'
+        return str(prefix + fields * count)
+
+    def read_record_table(self, root, f, fields, count, ref_fields=()):
+        """
+        Reads count packed records of the struct codes in fields with a single unpack
+        and returns one tuple per field. Fields in ref_fields are object indices.
+        """
+        fmt = self.record_format(fields, count)
+        values = unpack(fmt, f.read(calcsize(fmt)))
+        step = len(fields)
+        columns = [values[i::step] for i in range(step)]
+        if root.check_refs:
+            object_count = len(root.object_positions)
+            for i in ref_fields:
+                for index in columns[i]:
+                    if index >= object_count:
+                        raise ValueError("bad index: %d" % index)
+        return columns
+
+    def write_record_table(self, f, fields, columns):
+        """
+        Inverse of read_record_table, packs the columns with a single pack.
+        """
+        count = len(columns[0]) if columns else 0
+        values = [None] * (count * len(fields))
+        for i, column in enumerate(columns):
+            values[i::len(fields)] = column
+        f.write(pack(self.record_format(fields, count), *values))
+
     def read_uuid(self, f):
         data = b''
         self.read_assert_tag(f, 72)
@@ -229,27 +274,19 @@ class AVBIOContext(object):
             f.write(value.bytes[8:])
 
     def read_mob_id(self, f):
-        m = MobID()
         self.read_assert_tag(f, 65)
         smpte_label_len = self.read_s32(f)
         assert smpte_label_len == 12
 
-        m.SMPTELabel = [self.read_u8(f) for i in range(12)]
-
-        self.read_assert_tag(f, 68)
-        m.length = self.read_u8(f)
+        data = bytearray(f.read(12))
 
-        self.read_assert_tag(f, 68)
-        m.instanceHigh = self.read_u8(f)
+        # length, instanceHigh, instanceMid, instanceLow
+        for i in range(4):
+            self.read_assert_tag(f, 68)
+            data.append(self.read_u8(f))
 
-        self.read_assert_tag(f, 68)
-        m.instanceMid = self.read_u8(f)
-
-        self.read_assert_tag(f, 68)
-        m.instanceLow = self.read_u8(f)
-
-        m.material = self.read_uuid(f)
-        return m
+        data += self.read_uuid(f).bytes_le
+        return FrozenMobID(bytes_le=data)
 
     def write_mob_id(self, f, m):
 
@@ -287,7 +324,12 @@ class AVBIOContext(object):
     def read_datetime(self, f):
         return datetime.fromtimestamp(self.read_u32(f))
 
+    def read_timestamp(self, f):
+        # raw u32 seconds since the epoch, see utils.timestamp_to_datetime
+        return self.read_u32(f)
+
     def write_datetime(self, f, value):
+        # value can be a datetime or a raw timestamp
         self.write_u32(f, self.datetime_to_timestamp(value))
 
     def read_rect(self, f):
@@ -11,6 +11,7 @@ from . core import AVBPropertyDef, AVBRefList
 from . import mobid
 from . utils import peek_data
 from . parameter_uuids import PARAMETER_UUIDS
+from . columns import EffectParamColumns
 
 class FileLocator(core.AVBObject):
     class_id = b'FILE'
@@ -323,6 +324,25 @@ class EffectParamList(core.AVBObject):
 
         ctx.read_assert_tag(f, 0x03)
 
+    def param_columns(self):
+        """
+        Returns the parameters as EffectParamColumns. Unmodified lists are parsed
+        straight from the chunk data without creating EffectParam objects.
+        """
+        root = self.root
+        index = self.instance_id
+        if getattr(root, 'reader', None) and index and index not in root.modified_objects \
+                and 0 < index < len(root.object_positions):
+            class_id, data = root.read_chunk_data(index)
+            if class_id == self.class_id:
+                return EffectParamColumns.from_chunk(data, root.ictx.byte_order)
+
+        columns = EffectParamColumns.from_params(self.parameters)
+        columns.orig_length = self.orig_length
+        columns.window_offset = self.window_offset
+        columns.keyframe_size = self.keyframe_size
+        return columns
+
     def write(self, f):
         super(EffectParamList, self).write(f)
         ctx = self.root.octx
@@ -471,7 +491,7 @@ class ParameterItem(core.AVBObject):
 
         self.name = ctx.read_string(f)
         self.enable = ctx.read_bool(f)
-        self.control_track = ctx.read_object_ref(self.root, f)
+        self.control_track = ctx.read_object_index(self.root, f)
 
         for tag in ctx.iter_ext(f):
             if tag == 0x01:
@@ -898,7 +918,7 @@ class Marker(MobRef):
         ctx.read_assert_tag(f, 0x03)
 
         self.comp_offset = ctx.read_s32(f)
-        self.attributes = ctx.read_object_ref(self.root, f)
+        self.attributes = ctx.read_object_index(self.root, f)
         # print(self.comp_offset, self.attributes)
 
         version = ctx.read_s16(f)
@@ -958,8 +978,8 @@ class TrackerManager(core.AVBObject):
         ctx.read_assert_tag(f, 0x02)
         ctx.read_assert_tag(f, 0x01)
 
-        self.data_slots = ctx.read_object_ref(self.root, f)
-        self.param_slots = ctx.read_object_ref(self.root, f)
+        self.data_slots = ctx.read_object_index(self.root, f)
+        self.param_slots = ctx.read_object_index(self.root, f)
 
         ctx.read_assert_tag(f, 0x03)
 
@@ -993,7 +1013,7 @@ class TrackerDataSlot(core.AVBObject):
         count = ctx.read_s32(f)
         self.tracker_data = AVBRefList.__new__(AVBRefList, root=self.root, parent=self)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.tracker_data.append(ref)
 
         for tag in ctx.iter_ext(f):
@@ -1047,7 +1067,7 @@ class TrackerParameterSlot(core.AVBObject):
         assert count >= 0
         self.params = AVBRefList.__new__(AVBRefList, root=self.root, parent=self)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.params.append(ref)
 
         ctx.read_assert_tag(f, 0x03)
@@ -1097,7 +1117,7 @@ class TrackerData(core.AVBObject):
         count = ctx.read_s16(f)
         self.clips = AVBRefList.__new__(AVBRefList, root=self.root, parent=self)
         for i in range(count):
-            ref = ctx.read_object_ref(self.root, f)
+            ref = ctx.read_object_index(self.root, f)
             self.clips.append(ref)
 
         for tag in ctx.iter_ext(f):
@@ -1115,10 +1135,10 @@ class TrackerData(core.AVBObject):
                 self.filter_amount = ctx.read_double(f)
             elif tag == 0x05:
                 ctx.read_assert_tag(f, 72)
-                self.clip5 = ctx.read_object_ref(self.root, f)
+                self.clip5 = ctx.read_object_index(self.root, f)
             elif tag == 0x06:
                 ctx.read_assert_tag(f, 72)
-                self.clip6 = ctx.read_object_ref(self.root, f)
+                self.clip6 = ctx.read_object_index(self.root, f)
             else:
                 raise ValueError("%s: unknown ext tag 0x%02X %d" % (str(self.class_id), tag,tag))
 
@@ -0,0 +1,243 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+from collections import OrderedDict
+
+from . import utils
+from . import refscan
+from .core import walk_references
+from .components import SourceClip
+from .query import chunk_values, has_chunks, is_stored
+
+def mob_references(mob):
+    """
+    Returns the unique mob_ids referenced by SourceClips in mob, in walk order.
+    """
+    result = []
+    seen = set()
+    for obj in walk_references(mob):
+        if isinstance(obj, SourceClip):
+            mob_id = obj.property_data.get('mob_id', None)
+            if mob_id and mob_id not in seen:
+                seen.add(mob_id)
+                result.append(mob_id)
+    return result
+
+def chunk_mob_references(root, index):
+    """
+    Returns the unique mob_ids referenced by SourceClips in the mob at index, in the
+    order of mob_references. Follows the object indices stored in the chunk data,
+    only the mob_ids of SourceClips are read, the mob itself is not decoded.
+    """
+    result = []
+    seen = set()
+    visited = set()
+    stack = [index]
+    while stack:
+        index = stack.pop()
+        if index <= 0 or index in visited:
+            continue
+        visited.add(index)
+
+        if not is_stored(root, index):
+            mob_ids = mob_references(root.read_object(index))
+        else:
+            class_id, data = root.read_chunk_data(index)
+            if class_id == SourceClip.class_id:
+                mob_ids = chunk_values(root, index, class_id, data, ['mob_id'])
+            else:
+                mob_ids = []
+                if class_id in utils.AVBClaseID_dict:
+                    stack.extend(reversed(refscan.chunk_refs(root, class_id, data)))
+
+        for mob_id in mob_ids:
+            if mob_id and mob_id not in seen:
+                seen.add(mob_id)
+                result.append(mob_id)
+    return result
+
+def chunk_mob_ids(root, indices):
+    """
+    Returns an OrderedDict of the mob_ids of the mobs at indices to their index,
+    read from the chunk data without decoding the mobs.
+    """
+    indices = list(indices)
+    mob_ids = {}
+    stored = set(index for index in indices if is_stored(root, index))
+    for index, class_id, data in root.iter_chunk_data(stored):
+        mob_ids[index] = chunk_values(root, index, class_id, data, ['mob_id'])[0]
+
+    result = OrderedDict()
+    for index in indices:
+        if index in mob_ids:
+            result[mob_ids[index]] = index
+        elif index > 0:
+            result[root.read_object(index).mob_id] = index
+    return result
+
+class MobIndexMap(object):
+    """
+    mob_id to mob mapping of a graph built from chunk data. Only indices are kept,
+    mobs are read from root when they are looked up.
+    """
+    def __init__(self, root, indices):
+        self.root = root
+        self.indices = indices
+
+    def __getitem__(self, mob_id):
+        return self.root.read_object(self.indices[mob_id])
+
+    def get(self, mob_id, default=None):
+        index = self.indices.get(mob_id, None)
+        if index is None:
+            return default
+        return self.root.read_object(index)
+
+    def __contains__(self, mob_id):
+        return mob_id in self.indices
+
+    def __iter__(self):
+        return iter(self.indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def items(self):
+        for mob_id in self.indices:
+            yield mob_id, self[mob_id]
+
+class MobGraph(object):
+    """
+    Dependency graph of the mobs in a bin. Every mob is walked once to find the mobs
+    its SourceClips reference, closures are computed from the graph and cached.
+    """
+    def __init__(self, mobs=()):
+        self.mobs = {}
+        self.edges = {}
+        self.reverse_edges = {}
+        self.closures = {}
+        self.order = None
+        self.item_count = None
+        self.modification_count = None
+
+        for mob in mobs:
+            self.mobs[mob.mob_id] = mob
+
+        for mob_id, mob in self.mobs.items():
+            self.add_edges(mob_id, mob_references(mob))
+
+    @classmethod
+    def from_chunks(cls, root, indices):
+        """
+        Builds the graph of the mobs at indices in root from their chunk data, see
+        chunk_mob_references. The graph holds indices, mobs are read when looked up.
+        """
+        graph = cls()
+        graph.mobs = MobIndexMap(root, chunk_mob_ids(root, indices))
+        for mob_id, index in graph.mobs.indices.items():
+            graph.add_edges(mob_id, chunk_mob_references(root, index))
+        return graph
+
+    def add_edges(self, mob_id, refs):
+        self.reverse_edges.setdefault(mob_id, [])
+        edges = [ref for ref in refs if ref in self.mobs]
+        self.edges[mob_id] = edges
+        for ref in edges:
+            self.reverse_edges.setdefault(ref, []).append(mob_id)
+
+    def index_of(self, mob_id):
+        """
+        Returns the object index of mob_id.
+        """
+        if isinstance(self.mobs, MobIndexMap):
+            return self.mobs.indices[mob_id]
+        return self.mobs[mob_id].instance_id
+
+    def __contains__(self, mob_id):
+        return mob_id in self.mobs
+
+    def __len__(self):
+        return len(self.mobs)
+
+    def dependencies(self, mob_id):
+        """
+        Returns the mobs directly referenced by mob_id.
+        """
+        return [self.mobs[ref] for ref in self.edges[mob_id]]
+
+    def referrers(self, mob_id):
+        """
+        Returns the mobs that directly reference mob_id.
+        """
+        return [self.mobs[ref] for ref in self.reverse_edges.get(mob_id, [])]
+
+    def postorder(self, mob_ids):
+        # iterative depth first walk, every mob is emitted after its dependencies
+        edges = self.edges
+        closures = self.closures
+        result = []
+        visited = set()
+        for start in mob_ids:
+            if start in visited:
+                continue
+
+            cached = closures.get(start, None)
+            if cached is not None:
+                for mob_id in cached:
+                    if mob_id not in visited:
+                        visited.add(mob_id)
+                        result.append(mob_id)
+                visited.add(start)
+                result.append(start)
+                continue
+
+            visited.add(start)
+            stack = [(start, iter(edges.get(start, ())))]
+            while stack:
+                mob_id, children = stack[-1]
+                for child in children:
+                    if child not in visited:
+                        visited.add(child)
+                        stack.append((child, iter(edges[child])))
+                        break
+                else:
+                    stack.pop()
+                    result.append(mob_id)
+        return result
+
+    def closure_ids(self, mob_ids):
+        """
+        Returns the mob_ids that mob_ids depend on, every mob before the mobs
+        depending on it. The mob_ids themselves are not included.
+        """
+        mob_ids = list(mob_ids)
+        targets = set(mob_ids)
+        return [mob_id for mob_id in self.postorder(mob_ids) if mob_id not in targets]
+
+    def closure(self, mob_id):
+        """
+        Returns all the mobs mob_id depends on, dependencies first.
+        """
+        ids = self.closures.get(mob_id, None)
+        if ids is None:
+            ids = tuple(self.closure_ids([mob_id]))
+            self.closures[mob_id] = ids
+        return [self.mobs[ref] for ref in ids]
+
+    def closure_of(self, mobs):
+        """
+        Returns the union of the closures of mobs with a single walk, dependencies first.
+        """
+        return [self.mobs[ref] for ref in self.closure_ids(mob.mob_id for mob in mobs)]
+
+    def topological_order(self):
+        """
+        Returns all mobs, every mob after the mobs it depends on.
+        """
+        if self.order is None:
+            self.order = self.postorder(list(self.mobs))
+        return [self.mobs[mob_id] for mob_id in self.order]
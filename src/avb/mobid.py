@@ -135,6 +135,7 @@ from __future__ import (
     division,
     )
 
+import sys
 import uuid
 import struct
 from .utils import (int_from_bytes, bytes_from_int,
@@ -340,23 +341,27 @@ class MobID(object):
         return NotImplemented
 
     def __lt__(self, other):
+        # big endian byte order compares like the int
         if isinstance(other, MobID):
-            return self.int < other.int
+            return self.bytes_le < other.bytes_le
         return NotImplemented
 
     def __le__(self, other):
+        # big endian byte order compares like the int
         if isinstance(other, MobID):
-            return self.int <= other.int
+            return self.bytes_le <= other.bytes_le
         return NotImplemented
 
     def __gt__(self, other):
+        # big endian byte order compares like the int
         if isinstance(other, MobID):
-            return self.int > other.int
+            return self.bytes_le > other.bytes_le
         return NotImplemented
 
     def __ge__(self, other):
+        # big endian byte order compares like the int
         if isinstance(other, MobID):
-            return self.int >= other.int
+            return self.bytes_le >= other.bytes_le
         return NotImplemented
 
     def __hash__(self):
@@ -473,6 +478,67 @@ class MobID(object):
     def __repr__(self):
         return str(self.urn)
 
+    def frozen(self):
+        """
+        Returns an immutable FrozenMobID with the same value.
+        """
+        return FrozenMobID(bytes_le=self.bytes_le)
+
+if sys.version_info.major < 3:
+    # bytes is str and indexing it yields characters, the fields are read from a bytearray
+    frozen_bytes = bytearray
+else:
+    frozen_bytes = bytes
+
+class FrozenMobID(MobID):
+    """
+    Immutable MobID backed by bytes, hash and urn are computed once.
+    MobIDs read from files are FrozenMobIDs, compares equal to and hashes like a MobID
+    of the same value.
+    """
+    __slots__ = ('hash_value', 'urn_value')
+
+    def __init__(self, mobid=None, bytes_le=None, int=None):
+        if bytes_le is None:
+            m = MobID(mobid, int=int)
+            bytes_le = m.bytes_le
+
+        bytes_le = frozen_bytes(bytes_le)
+        assert len(bytes_le) == 32
+        object.__setattr__(self, 'bytes_le', bytes_le)
+        object.__setattr__(self, 'hash_value', hash(bytes(bytes_le)))
+        object.__setattr__(self, 'urn_value', None)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("FrozenMobID is immutable")
+
+    def __eq__(self, other):
+        if isinstance(other, MobID):
+            return self.bytes_le == other.bytes_le
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, MobID):
+            return self.bytes_le != other.bytes_le
+        return NotImplemented
+
+    def __hash__(self):
+        return self.hash_value
+
+    @property
+    def urn(self):
+        urn = self.urn_value
+        if urn is None:
+            urn = MobID.urn.fget(self)
+            object.__setattr__(self, 'urn_value', urn)
+        return urn
+
+    def frozen(self):
+        return self
+
+    def __reduce__(self):
+        return (FrozenMobID, (None, self.bytes_le))
+
 if __name__ == "__main__":
 
     t = "urn:smpte:umid:060a2b34.01010101.01010f00.13000000.060e2b34.7f7f2a80.4fa5c20f.4e301e50"
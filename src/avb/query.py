@@ -0,0 +1,230 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import datetime
+import operator
+
+from . import utils
+
+try:
+    from ._ext import match_chunk, chunk_properties
+except:
+    match_chunk = None
+    chunk_properties = None
+
+MISSING = object()
+
+def has_chunks(root):
+    # files created with avb.open() have no chunks, all of their objects are in memory
+    return getattr(root, 'f', None) is not None and getattr(root, 'object_positions', None) is not None
+
+def is_stored(root, index):
+    # objects with unsaved modifications have to be read as objects
+    return (has_chunks(root) and 0 < index < len(root.object_positions)
+            and index not in root.modified_objects)
+
+def memory_object(root, index):
+    obj = root.modified_objects.get(index, None)
+    if obj is None:
+        obj = root.object_cache.get(index, None)
+    return obj
+
+OPERATORS = {
+    '==':         operator.eq,
+    '!=':         operator.ne,
+    '<':          operator.lt,
+    '<=':         operator.le,
+    '>':          operator.gt,
+    '>=':         operator.ge,
+    'in':         lambda value, arg: value in arg,
+    'contains':   lambda value, arg: arg in value,
+    'icontains':  lambda value, arg: arg.lower() in value.lower(),
+    'startswith': lambda value, arg: value.startswith(arg),
+    'endswith':   lambda value, arg: value.endswith(arg),
+}
+
+# fields computed from a stored property, rewritten so they can be tested on the raw data
+MOB_TYPE_IDS = {'CompositionMob': 1, 'MasterMob': 2, 'SourceMob': 3}
+FIELD_ALIASES = {
+    'mob_type': ('mob_type_id', MOB_TYPE_IDS),
+}
+
+def normalize(value):
+    # dates are stored as raw timestamps, see Composition.last_modified
+    if isinstance(value, datetime.datetime):
+        return utils.datetime_to_timestamp(value)
+    return value
+
+class Predicate(object):
+    """
+    Tests a single scalar property, for example Predicate('usage_code', '==', 0).
+    Datetimes are compared as timestamps.
+    """
+    __slots__ = ('name', 'op', 'value', 'func')
+
+    def __init__(self, name, op, value):
+        if op not in OPERATORS:
+            raise ValueError("unknown operator: %r" % (op,))
+
+        alias = FIELD_ALIASES.get(name, None)
+        if alias and op in ('==', '!=', 'in'):
+            name, mapping = alias
+            if op == 'in':
+                value = [mapping.get(item, item) for item in value]
+            else:
+                value = mapping.get(value, value)
+
+        if op == 'in':
+            value = [normalize(item) for item in value]
+        else:
+            value = normalize(value)
+
+        self.name = name
+        self.op = op
+        self.value = value
+        self.func = OPERATORS[op]
+
+    def __call__(self, value):
+        try:
+            return bool(self.func(normalize(value), self.value))
+        except (TypeError, AttributeError):
+            # None or a value of the wrong type never matches
+            return False
+
+    def test_object(self, obj):
+        return self(field_value(obj, self.name))
+
+    def __repr__(self):
+        return "Predicate(%r, %r, %r)" % (self.name, self.op, self.value)
+
+def field_value(obj, name):
+    # stored properties are compared as stored, like the native readers see them
+    if name in getattr(obj, 'propertydefs_dict', ()):
+        return obj.property_data.get(name, None)
+    try:
+        return getattr(obj, name)
+    except (AttributeError, ValueError):
+        return None
+
+def chunk_values(root, index, class_id, data, names):
+    """
+    Returns the values of the stored properties names of the chunk at index. Chunks
+    with a native reader are parsed without creating the object, others are decoded.
+    """
+    obj = root.object_cache.get(index, None)
+    if obj is None and chunk_properties and class_id in getattr(root, 'fast_readers', {}) and class_id != b'ATTR':
+        values = chunk_properties(class_id, data, [name.encode('utf-8') for name in names], MISSING)
+        if not any(value is MISSING for value in values):
+            return values
+    if obj is None:
+        obj = root.decode_object(index, class_id, data)
+    return [field_value(obj, name) for name in names]
+
+def parse_where(where):
+    """
+    Returns the list of predicates of where. where can be a dict of field values to
+    test for equality, a (name, op, value) tuple, a Predicate, a callable taking the
+    object or a list of those. All predicates have to match.
+    """
+    if where is None:
+        return []
+    if isinstance(where, dict):
+        return [Predicate(name, '==', value) for name, value in sorted(where.items())]
+    if isinstance(where, Predicate) or callable(where):
+        return [where]
+    if isinstance(where, tuple) and len(where) == 3 and where[1] in OPERATORS:
+        return [Predicate(*where)]
+
+    predicates = []
+    for item in where:
+        if isinstance(item, tuple):
+            predicates.append(Predicate(*item))
+        elif isinstance(item, Predicate) or callable(item):
+            predicates.append(item)
+        else:
+            raise TypeError("invalid predicate: %r" % (item,))
+    return predicates
+
+def match_object(obj, predicates):
+    for predicate in predicates:
+        if isinstance(predicate, Predicate):
+            if not predicate.test_object(obj):
+                return False
+        elif not predicate(obj):
+            return False
+    return True
+
+def select(root, class_id=None, where=None, indices=None):
+    """
+    Yields the objects of root of class_id matching where, see parse_where.
+    Chunks of classes with a native reader are tested before they are decoded,
+    predicates on fields the reader does not see and callables are tested on
+    the decoded object. Modified and created objects are tested as they are in
+    memory, modified objects in file order with the chunks, created ones last.
+    """
+    if isinstance(class_id, bytes):
+        class_ids = set([class_id])
+    elif class_id is None:
+        class_ids = None
+    else:
+        class_ids = set(class_id)
+
+    predicates = parse_where(where)
+    native = [(p.name.encode('utf-8'), p) for p in predicates if isinstance(p, Predicate)]
+    callables = [p for p in predicates if not isinstance(p, Predicate)]
+    fast_readers = getattr(root, 'fast_readers', {})
+    chunks = has_chunks(root)
+
+    if indices is None:
+        memory = set(root.modified_objects)
+        stored = None if chunks else []
+    else:
+        indices = set(indices)
+        stored = set(index for index in indices if is_stored(root, index))
+        memory = indices - stored
+
+    count = len(root.object_positions) if chunks else 0
+    positions = root.object_positions if chunks else None
+    # modified objects stored in the file, by file position
+    in_file = sorted((index for index in memory if 0 < index < count), key=lambda index: positions[index])
+    created = sorted(index for index in memory if index >= count)
+
+    def matching(index):
+        obj = memory_object(root, index)
+        if obj is None or not getattr(obj, 'class_id', None):
+            return None
+        if class_ids is not None and obj.class_id not in class_ids:
+            return None
+        if match_object(obj, predicates):
+            return obj
+
+    if stored is None or stored:
+        for index, chunk_class_id, data in root.iter_chunk_data(stored, class_ids=class_ids):
+            while in_file and positions[in_file[0]] < positions[index]:
+                obj = matching(in_file.pop(0))
+                if obj is not None:
+                    yield obj
+            if index in memory or chunk_class_id not in utils.AVBClaseID_dict:
+                continue
+            obj = root.object_cache.get(index, None)
+            remaining = predicates
+            if obj is None:
+                if native and match_chunk and chunk_class_id in fast_readers:
+                    result = match_chunk(chunk_class_id, data, native, MISSING)
+                    if result is False:
+                        continue
+                    if result is True:
+                        remaining = callables
+                obj = root.decode_object(index, chunk_class_id, data)
+            if match_object(obj, remaining):
+                yield obj
+
+    # modified objects after the last chunk and objects created after the file was read
+    for index in in_file + created:
+        obj = matching(index)
+        if obj is not None:
+            yield obj
@@ -0,0 +1,211 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import io
+import struct
+
+from . import utils
+from . import refscan
+from .mobgraph import mob_references
+from .query import has_chunks
+
+class RawCopySource(object):
+    """
+    Stand-in root for decoding raw copies after copy_objects, the source file is not
+    needed. Object indices in the copied chunk data resolve to the copies in memo.
+    """
+    check_refs = False
+    debug_copy_refs = False
+    compact = False
+    reading = True
+
+    def __init__(self, source, memo):
+        self.ictx = source.ictx
+        self.fast_readers = getattr(source, 'fast_readers', {})
+        self.string_table = getattr(source, 'string_table', None)
+        self.memo = memo
+
+    def read_object(self, index):
+        obj = self.memo.get(index, None)
+        if isinstance(obj, AVBRawObject):
+            return obj.decoded()
+        return obj
+
+    def add_modified(self, obj):
+        pass
+
+    def decode(self, class_id, data):
+        obj_class = utils.AVBClaseID_dict[class_id]
+        obj = obj_class.__new__(obj_class, root=self)
+        if class_id == b'ATTR':
+            obj.__init__(obj)
+
+        reader = self.fast_readers.get(class_id, None)
+        if reader:
+            reader(self, obj, data)
+        else:
+            obj.read(io.BytesIO(data))
+        return obj
+
+class AVBRawObject(object):
+    """
+    Undecoded copy of a chunk from another file. The chunk data is written verbatim,
+    only the object indices at ref_offsets are rewritten to point at the copies in refs.
+    Attribute access is forwarded to the object decoded from the copied data, see decoded.
+    """
+    __slots__ = ('root', 'class_id', 'instance_id', 'byte_order', 'data', 'ref_offsets', 'refs',
+                 'source', 'source_index', 'view', '__weakref__')
+
+    def __init__(self, root, class_id, byte_order, data, ref_offsets, source, source_index):
+        self.root = root
+        self.class_id = class_id
+        self.instance_id = None
+        self.byte_order = byte_order
+        self.data = data
+        self.ref_offsets = ref_offsets
+        self.refs = []
+        self.source = source
+        self.source_index = source_index
+        self.view = None
+
+    @property
+    def property_data(self):
+        # exposes the copied references to walk_references
+        return dict(enumerate(self.refs))
+
+    def decoded(self):
+        """
+        Returns the object decoded from the copied chunk data, decoded once on first use.
+        Its references resolve to the decoded copies, the source file may be closed.
+        """
+        if self.view is None:
+            self.view = self.source.decode(self.class_id, self.data)
+        return self.view
+
+    def __getattr__(self, name):
+        return getattr(self.decoded(), name)
+
+    def write(self, f):
+        ctx = self.root.octx
+        if ctx.byte_order != self.byte_order:
+            raise ValueError("raw copy of %s can only be written %s endian" % (str(self.class_id), self.byte_order))
+
+        if ctx.byte_order == 'little':
+            pack_into = struct.Struct(str('<I')).pack_into
+        else:
+            pack_into = struct.Struct(str('>I')).pack_into
+
+        data = bytearray(self.data)
+        root = self.root
+        for offset, obj in zip(self.ref_offsets, self.refs):
+            if obj is None:
+                index = 0
+            elif obj.instance_id not in root.ref_mapping:
+                raise Exception("object not written yet")
+            else:
+                index = root.ref_mapping[obj.instance_id]
+            pack_into(data, offset, index)
+
+        f.write(data)
+
+    def __repr__(self):
+        s = "%s.%s"  % (self.__class__.__module__,
+                                self.__class__.__name__)
+        s = str(self.class_id) + " " + s
+        s += " source idx: %d" % self.source_index
+        return '<%s at 0x%x>' % (s, id(self))
+
+def copy_objects(source, indices, root, memo=None):
+    """
+    Copies the objects at indices in source, and everything they reference, into root.
+    Chunks are copied as AVBRawObjects without being decoded, objects with unsaved
+    modifications in source and the objects of sources without chunks, like files
+    created with avb.open(), are copied with AVBObject.copy instead.
+    memo maps source indices to copies and can be shared between calls.
+    Returns the copies in the order of indices.
+    """
+    if memo is None:
+        memo = {}
+
+    if not has_chunks(source):
+        for index in indices:
+            if index > 0 and index not in memo:
+                memo[index] = source.read_object(index).copy(root)
+        return [memo.get(index, None) for index in indices]
+
+    byte_order = source.ictx.byte_order
+    context = RawCopySource(source, memo)
+    stack = [index for index in indices if index > 0]
+    copied = []
+
+    while stack:
+        index = stack.pop()
+        if index in memo:
+            continue
+
+        if index in source.modified_objects:
+            memo[index] = source.read_object(index).copy(root)
+            continue
+
+        class_id, data = source.read_chunk_data(index)
+        offsets = refscan.ref_offsets(source, class_id, data)
+        refs = refscan.unpack_refs(byte_order, data, offsets)
+
+        obj = AVBRawObject(root, class_id, byte_order, bytes(data), offsets, context, index)
+        root.add_object(obj)
+        memo[index] = obj
+        copied.append((obj, refs))
+
+        for ref in refs:
+            if ref > 0 and ref not in memo:
+                stack.append(ref)
+
+    for obj, refs in copied:
+        obj.refs = [memo[ref] if ref > 0 else None for ref in refs]
+
+    return [memo.get(index, None) for index in indices]
+
+def copy_mobs(mobs, root, dependants=True):
+    """
+    Raw copies mobs into root, with dependants the mobs they depend on are copied too.
+    Dependencies are looked up in the mob graph of the bin of each source file, which
+    is built from the chunk data, the dependencies are copied without being decoded.
+    Mobs of sources without chunks are copied with AVBObject.copy, see copy_objects.
+    Returns the copied mobs, each dependency before the mobs using it.
+    """
+    order = []
+    seen = set()
+    graphs = {}
+
+    for mob in mobs:
+        source = mob.root
+        indices = []
+        if dependants:
+            if id(source) not in graphs:
+                content = getattr(source, 'content', None)
+                graphs[id(source)] = content.mob_graph() if hasattr(content, 'mob_graph') else None
+            graph = graphs[id(source)]
+            if graph is not None:
+                if mob.mob_id in graph:
+                    ids = graph.closure_ids([mob.mob_id])
+                else:
+                    ids = graph.postorder([ref for ref in mob_references(mob) if ref in graph])
+                indices = [graph.index_of(mob_id) for mob_id in ids]
+
+        indices.append(mob.instance_id)
+        for index in indices:
+            key = (id(source), index)
+            if key not in seen:
+                seen.add(key)
+                order.append((source, index))
+
+    memos = {}
+    result = []
+    for source, index in order:
+        memo = memos.setdefault(id(source), {})
+        result.extend(copy_objects(source, [index], root, memo))
+    return result
@@ -0,0 +1,271 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import io
+import array
+import struct
+
+from . import utils
+from .ioctx import AVBIOContext
+
+try:
+    from ._ext import read_ref_offsets as native_ref_offsets
+except:
+    native_ref_offsets = None
+
+class RefRecordingContext(AVBIOContext):
+    """
+    Input context that records the position of every object index it reads.
+    """
+    def __init__(self, byte_order='little'):
+        super(RefRecordingContext, self).__init__(byte_order)
+        self.offsets = []
+
+    def read_object_index(self, root, f):
+        self.offsets.append(f.tell())
+        return self.read_u32(f)
+
+    def read_record_table(self, root, f, fields, count, ref_fields=()):
+        start = f.tell()
+        size = struct.calcsize(str('<' + fields))
+        for i in ref_fields:
+            offset = start + struct.calcsize(str('<' + fields[:i]))
+            self.offsets.extend(offset + n * size for n in range(count))
+        return super(RefRecordingContext, self).read_record_table(root, f, fields, count, ref_fields)
+
+class RefScanRoot(object):
+    """
+    Stand-in root for decoding a single chunk without touching the file it came from.
+    """
+    def __init__(self, byte_order='little'):
+        self.check_refs = False
+        self.debug_copy_refs = True
+        self.reading = True
+        self.ictx = RefRecordingContext(byte_order)
+
+def python_ref_offsets(class_id, data, byte_order='little'):
+    # decodes the chunk in isolation and records where its indices were read
+    obj_class = utils.AVBClaseID_dict.get(class_id, None)
+    if not obj_class:
+        raise NotImplementedError(class_id)
+
+    root = RefScanRoot(byte_order)
+    obj = obj_class.__new__(obj_class, root=root)
+    if class_id == b'ATTR':
+        obj.__init__(obj)
+
+    obj.read(io.BytesIO(data))
+    return sorted(root.ictx.offsets)
+
+def no_ref_offsets(data, byte_order='little'):
+    return []
+
+def component_ref_offsets(data, byte_order='little'):
+    # left_bob, right_bob, media_kind_id and edit_rate have fixed sizes, the name and
+    # effect_id strings are followed by attributes, session_attrs and precomputed
+    prefix = '<' if byte_order == 'little' else '>'
+    unpack_u16 = struct.Struct(str(prefix + 'H')).unpack_from
+    unpack_u8 = struct.Struct(str('B')).unpack_from
+
+    offsets = [2, 6]
+    pos = 18
+    for i in range(2):
+        size = unpack_u16(data, pos)[0]
+        pos += 2
+        if size < 65535:
+            pos += size
+    offsets.extend([pos, pos + 4, pos + 8])
+    pos += 12
+
+    # param_list ext
+    while unpack_u8(data, pos)[0] == 0x01:
+        tag = unpack_u8(data, pos + 1)[0]
+        if tag != 0x01:
+            raise ValueError("unknown component ext tag 0x%02X" % tag)
+        offsets.append(pos + 3)
+        pos += 7
+    return offsets
+
+# offset scanners for classes without a native reader, they parse only as much of
+# the chunk as needed to find its indices
+SCANNERS = {
+    # locators, bin refs and pictures store no object indices
+    b'FILE': no_ref_offsets,
+    b'WINF': no_ref_offsets,
+    b'URLL': no_ref_offsets,
+    b'MSML': no_ref_offsets,
+    b'MCBR': no_ref_offsets,
+    b'GRFX': no_ref_offsets,
+    # clips whose only indices are in the Component header
+    b'TCCP': component_ref_offsets,
+    b'ECCP': component_ref_offsets,
+    b'CTRL': component_ref_offsets,
+}
+
+def ref_offsets(root, class_id, data):
+    """
+    Returns the offsets of the object indices stored in the chunk data.
+    Uses the native readers when root can use them or an offset scanner from
+    SCANNERS, chunks of other classes are decoded in isolation.
+    """
+    if native_ref_offsets and class_id in root.fast_readers:
+        return native_ref_offsets(class_id, data)
+    scanner = SCANNERS.get(class_id, None)
+    if scanner is not None:
+        return scanner(data, root.ictx.byte_order)
+    return python_ref_offsets(class_id, data, root.ictx.byte_order)
+
+def unpack_refs(byte_order, data, offsets):
+    if byte_order == 'little':
+        unpack_from = struct.Struct(str('<I')).unpack_from
+    else:
+        unpack_from = struct.Struct(str('>I')).unpack_from
+    return [unpack_from(data, offset)[0] for offset in offsets]
+
+def remap_refs(byte_order, data, offsets, mapping):
+    """
+    Rewrites the object indices at offsets in data through mapping, indices missing
+    from mapping become 0.
+    """
+    if byte_order == 'little':
+        st = struct.Struct(str('<I'))
+    else:
+        st = struct.Struct(str('>I'))
+    unpack_from = st.unpack_from
+    pack_into = st.pack_into
+    size = len(mapping)
+    for offset in offsets:
+        index = unpack_from(data, offset)[0]
+        pack_into(data, offset, mapping[index] if index < size else 0)
+
+def chunk_refs(root, class_id, data):
+    """
+    Returns the object indices referenced by the chunk data, in chunk order.
+    """
+    return unpack_refs(root.ictx.byte_order, data, ref_offsets(root, class_id, data))
+
+class ReferenceIndex(object):
+    """
+    Outgoing and incoming object references of every chunk in a file, stored as
+    flat arrays. Built from the chunk data without keeping any objects, see ref_offsets
+    for which chunks are decoded to find their references. The references of chunks
+    of unknown classes can not be read, their indices are listed in unknown.
+    """
+    def __init__(self, root):
+        count = len(root.object_positions)
+        self.class_ids = [None] * count
+        self.class_ids[0] = root.root_chunk.class_id
+        self.unknown = []
+
+        refs_start = array.array(str('L'), [0]) * (count + 1)
+        refs = array.array(str('L'))
+
+        for index, class_id, data in root.iter_chunk_data():
+            self.class_ids[index] = class_id
+            refs_start[index] = len(refs)
+            if class_id in utils.AVBClaseID_dict:
+                refs.extend(ref for ref in chunk_refs(root, class_id, data) if 0 < ref < count)
+            else:
+                self.unknown.append(index)
+            refs_start[index + 1] = len(refs)
+
+        # counting sort of the edges by target for the reverse lookup
+        referrers_start = array.array(str('L'), [0]) * (count + 1)
+        for ref in refs:
+            referrers_start[ref + 1] += 1
+        for index in range(count):
+            referrers_start[index + 1] += referrers_start[index]
+
+        fill = array.array(str('L'), referrers_start)
+        referrers = array.array(str('L'), [0]) * len(refs)
+        for index in range(1, count):
+            for i in range(refs_start[index], refs_start[index + 1]):
+                ref = refs[i]
+                referrers[fill[ref]] = index
+                fill[ref] += 1
+
+        self.refs_start = refs_start
+        self.refs = refs
+        self.unknown_indices = frozenset(self.unknown)
+        self.referrers_start = referrers_start
+        self.referrers_list = referrers
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def references(self, index):
+        """
+        Returns the indices referenced by the object at index, in chunk order.
+        None if the class of the chunk is unknown.
+        """
+        if self.is_unknown(index):
+            return None
+        return self.refs[self.refs_start[index]:self.refs_start[index + 1]].tolist()
+
+    def is_unknown(self, index):
+        return index in self.unknown_indices
+
+    def referrers(self, index):
+        """
+        Returns the indices of the objects referencing the object at index, ascending.
+        Chunks of unknown classes may reference it too, see unknown.
+        """
+        referrers = self.referrers_list[self.referrers_start[index]:self.referrers_start[index + 1]]
+        return sorted(set(referrers))
+
+    def find_referrers(self, index, class_ids):
+        """
+        Follows referrers upwards from index and returns the nearest indices
+        whose class_id is in class_ids, ascending.
+        """
+        found = set()
+        seen = set([index])
+        stack = [index]
+        while stack:
+            for ref in self.referrers(stack.pop()):
+                if ref in seen:
+                    continue
+                seen.add(ref)
+                if self.class_ids[ref] in class_ids:
+                    found.add(ref)
+                else:
+                    stack.append(ref)
+        return sorted(found)
+
+    def reachable(self, root_index):
+        """
+        Returns a bytearray flagging every index reachable from root_index.
+        """
+        refs_start = self.refs_start
+        refs = self.refs
+        seen = bytearray(len(self.class_ids))
+        if not 0 < root_index < len(seen):
+            return seen
+
+        seen[root_index] = 1
+        stack = [root_index]
+        while stack:
+            index = stack.pop()
+            for i in range(refs_start[index], refs_start[index + 1]):
+                ref = refs[i]
+                if not seen[ref]:
+                    seen[ref] = 1
+                    stack.append(ref)
+        return seen
+
+    def unreachable(self, root_index):
+        """
+        Returns the indices that can not be reached from root_index, ascending.
+        Raises ValueError if a reachable chunk has an unknown class, any object
+        could be referenced by it.
+        """
+        seen = self.reachable(root_index)
+        for index in self.unknown:
+            if seen[index]:
+                raise ValueError("object %d has unknown class %r, its references can not be followed"
+                                 % (index, self.class_ids[index]))
+        return [index for index in range(1, len(seen)) if not seen[index]]
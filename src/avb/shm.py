@@ -0,0 +1,226 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import os
+import sys
+import struct
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+from .file import AVBFile
+from .blockio import MemoryFile, MemoryReader
+from .mobid import FrozenMobID
+
+# Layout of a shared block, all offsets are from the start of the block:
+#
+#   header
+#   object positions    u64 * object_count
+#   class ids           4 bytes * object_count
+#   mob ids             32 bytes * mob_count, big endian, sorted
+#   mob indices         u32 * mob_count, object index of the mob id at the same position
+#   file data           data_size bytes, the unmodified .avb file
+
+MAGIC = b'PYAVBSHM'
+VERSION = 1
+HEADER = struct.Struct(str('<8sIIIQQQQQQQ'))
+MOB_ID_SIZE = 32
+
+def align(value, alignment=8):
+    return (value + alignment - 1) // alignment * alignment
+
+def mob_id_key(mob_id):
+    # bytes_le sorts like the big endian int of the MobID
+    return bytes(mob_id.bytes_le)
+
+# names of the blocks published by this process and not yet unlinked
+published_names = set()
+
+def create_shared_memory(name, size):
+    if shared_memory is None:
+        raise RuntimeError("multiprocessing.shared_memory requires python 3.8 or newer")
+    shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+    published_names.add(shm.name)
+    return shm
+
+def attach_shared_memory(name):
+    if shared_memory is None:
+        raise RuntimeError("multiprocessing.shared_memory requires python 3.8 or newer")
+    # attaching processes must not unlink the block when they exit
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    shm = shared_memory.SharedMemory(name=name)
+    # older versions register every attached block with the resource tracker, which
+    # unlinks it when the process exits. The tracker keeps a single entry per name,
+    # so a block published by this process keeps the one of its owner.
+    if getattr(shared_memory, '_USE_POSIX', False) and shm.name not in published_names:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+class SharedBin(object):
+    """
+    The offset index, class ids, mob id index and raw bytes of an AVBFile in a
+    multiprocessing.shared_memory block. One process publishes the block, workers
+    attach to it and open the file from it without scanning or copying it.
+    Files opened from the block must be closed before the block is closed.
+    """
+    def __init__(self, shm, owner=False):
+        self.shm = shm
+        self.owner = owner
+        self.views = []
+
+        buf = self.shm.buf[:HEADER.size].tobytes()
+        (magic, version, self.object_count, self.mob_count, self.objects_end,
+         positions_offset, class_ids_offset, mob_ids_offset, mob_index_offset,
+         data_offset, data_size) = HEADER.unpack(buf)
+        if magic != MAGIC:
+            raise ValueError("not a shared avb block")
+        if version != VERSION:
+            raise ValueError("unsupported shared avb block version %d" % version)
+
+        self.object_positions = self.view(positions_offset, self.object_count * 8, 'Q')
+        self.class_ids = self.view(class_ids_offset, self.object_count * 4)
+        self.mob_ids = self.view(mob_ids_offset, self.mob_count * MOB_ID_SIZE)
+        self.mob_indices = self.view(mob_index_offset, self.mob_count * 4, 'I')
+        self.data = self.view(data_offset, data_size)
+
+    def view(self, offset, size, format=None):
+        # every view derived from the block has to be released before it can be closed
+        views = [self.shm.buf[offset:offset + size]]
+        views.append(views[-1].toreadonly())
+        if format:
+            views.append(views[-1].cast(format))
+        self.views.extend(views)
+        return views[-1]
+
+    @classmethod
+    def publish(cls, f, name=None):
+        """
+        Copies the index and data of the AVBFile f into a new shared memory block.
+        The mobs of the bin are read once to build the mob id index.
+        """
+        if f.f is None:
+            raise ValueError("file has no data on disk")
+        if f.modified_objects:
+            raise ValueError("file has unsaved modifications")
+
+        f.f.seek(0, os.SEEK_END)
+        data_size = f.f.tell()
+        data = f.reader.read(0, data_size)
+
+        positions = f.object_positions
+        object_count = len(positions)
+
+        class_ids = bytearray(object_count * 4)
+        for i in range(1, object_count):
+            pos = positions[i]
+            class_id, size = f.unpack_chunk_header(data[pos:pos + 8])
+            class_ids[i * 4:i * 4 + 4] = class_id
+
+        mobs = sorted((mob_id_key(mob.mob_id), mob.instance_id) for mob in f.content.mobs)
+
+        positions_offset = align(HEADER.size)
+        class_ids_offset = align(positions_offset + object_count * 8)
+        mob_ids_offset = align(class_ids_offset + object_count * 4)
+        mob_index_offset = align(mob_ids_offset + len(mobs) * MOB_ID_SIZE)
+        data_offset = align(mob_index_offset + len(mobs) * 4)
+        size = data_offset + data_size
+
+        shm = create_shared_memory(name, size)
+        buf = shm.buf
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, object_count, len(mobs), f.objects_end,
+                         positions_offset, class_ids_offset, mob_ids_offset, mob_index_offset,
+                         data_offset, data_size)
+        struct.pack_into(str('<%dQ' % object_count), buf, positions_offset, *positions)
+        buf[class_ids_offset:class_ids_offset + len(class_ids)] = class_ids
+        for i, (key, index) in enumerate(mobs):
+            offset = mob_ids_offset + i * MOB_ID_SIZE
+            buf[offset:offset + MOB_ID_SIZE] = key
+        struct.pack_into(str('<%dI' % len(mobs)), buf, mob_index_offset, *[index for key, index in mobs])
+        buf[data_offset:data_offset + data_size] = data
+        del buf
+
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Attaches to a block published by another process.
+        """
+        return cls(attach_shared_memory(name))
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def open(self, **kwargs):
+        """
+        Returns an AVBFile reading from the shared block, the offset index is not rebuilt.
+        """
+        return AVBFile(MemoryFile(self.data), reader=MemoryReader,
+                       index=(self.object_positions, self.objects_end), **kwargs)
+
+    def class_id(self, index):
+        return self.class_ids[index * 4:index * 4 + 4].tobytes()
+
+    def indices(self, class_ids):
+        """
+        Returns the object indices of all chunks with a class id in class_ids.
+        """
+        class_ids = set(class_ids)
+        return [i for i in range(1, self.object_count) if self.class_id(i) in class_ids]
+
+    def mob_index(self, mob_id):
+        """
+        Returns the object index of the mob with mob_id, or None.
+        """
+        key = mob_id_key(mob_id)
+        mob_ids = self.mob_ids
+        lo = 0
+        hi = self.mob_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if mob_ids[mid * MOB_ID_SIZE:(mid + 1) * MOB_ID_SIZE].tobytes() < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.mob_count and mob_ids[lo * MOB_ID_SIZE:(lo + 1) * MOB_ID_SIZE].tobytes() == key:
+            return self.mob_indices[lo]
+        return None
+
+    def iter_mob_ids(self):
+        for i in range(self.mob_count):
+            key = self.mob_ids[i * MOB_ID_SIZE:(i + 1) * MOB_ID_SIZE].tobytes()
+            yield FrozenMobID(bytes_le=key), self.mob_indices[i]
+
+    def close(self):
+        for v in reversed(self.views):
+            v.release()
+        self.views = []
+        self.object_positions = self.class_ids = self.mob_ids = self.mob_indices = self.data = None
+        self.shm.close()
+
+    def unlink(self):
+        published_names.discard(self.shm.name)
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        if self.owner:
+            self.unlink()
+
+def publish(f, name=None):
+    return SharedBin.publish(f, name)
+
+def attach(name):
+    return SharedBin.attach(name)
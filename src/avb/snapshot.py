@@ -0,0 +1,343 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import os
+import sys
+import array
+import uuid
+import marshal
+import datetime
+from collections import OrderedDict
+
+from . import utils
+from .core import AVBObject, AVBPropertyData, AVBPropertySlots, AVBRefList
+from .mobid import MobID, FrozenMobID
+from .bin import BinItemList, object_index
+
+if sys.version_info.major < 3:
+    SCALAR_TYPES = (bool, int, long, float, str, unicode)
+else:
+    SCALAR_TYPES = (bool, int, float, str, bytes)
+
+MAGIC = b'PYAVBSNP'
+VERSION = 3
+
+# Values that are not plain scalars are encoded as tuples starting with one of these tags
+REF = 0
+MOBID = 1
+UUID = 2
+DATETIME = 3
+BYTEARRAY = 4
+TUPLE = 5
+LIST = 6
+DICT = 7
+OBJECT = 8
+REFLIST = 9
+PROPDATA = 10
+ITEMTABLE = 11
+
+def chunk_index(root, value):
+    """
+    Returns the object index of value if it is an object stored in its own chunk of root.
+    """
+    if getattr(value, 'class_id', None) is None or getattr(value, 'root', None) is not root:
+        return None
+    return getattr(value, 'instance_id', None)
+
+class Encoder(object):
+    """
+    Converts decoded objects to nested tuples of builtin types that marshal can store.
+    References are kept as object indices, see encode_ref.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def encode_ref(self, index):
+        return (REF, index)
+
+    def encode_items(self, items):
+        keys = []
+        values = []
+        for key, value in items:
+            keys.append(key)
+            values.append(self.encode(value))
+        return keys, values
+
+    def encode_properties(self, obj):
+        data = obj.property_data
+        if isinstance(data, AVBPropertySlots):
+            keys = []
+            values = []
+            refs = data.layout.refs
+            present = data.present
+            for i, name in enumerate(data.layout.names):
+                if present & (1 << i):
+                    value = data.slots[i]
+                    keys.append(name)
+                    if refs & (1 << i) and isinstance(value, int) and not isinstance(value, bool):
+                        values.append(self.encode_ref(value))
+                    else:
+                        values.append(self.encode(value))
+            return keys, values
+
+        is_ref = getattr(data, 'is_ref', None)
+        if is_ref is None:
+            return self.encode_items(dict.items(data))
+        keys = []
+        values = []
+        for key, value in dict.items(data):
+            keys.append(key)
+            if isinstance(value, int) and not isinstance(value, bool) and is_ref(key):
+                values.append(self.encode_ref(value))
+            else:
+                values.append(self.encode(value))
+        return keys, values
+
+    def encode_ref_item(self, value):
+        # AVBRefList entries read from the file are plain indices
+        if isinstance(value, int) and not isinstance(value, bool):
+            return self.encode_ref(value)
+        return self.encode(value)
+
+    def encode_object(self, obj):
+        """
+        Encodes the contents of an object stored in its own chunk.
+        """
+        if isinstance(obj, dict):
+            return self.encode_items(dict.items(obj))
+        if isinstance(obj, list):
+            return [self.encode_ref_item(item) for item in list.__iter__(obj)]
+        return self.encode_properties(obj)
+
+    def encode(self, value):
+        if value is None or isinstance(value, SCALAR_TYPES):
+            return value
+
+        if isinstance(value, utils.AVBObjectRef):
+            return self.encode_ref(value.index)
+
+        index = chunk_index(self.root, value)
+        if index is not None:
+            return self.encode_ref(index)
+
+        if isinstance(value, AVBRefList):
+            return (REFLIST, value.__class__.__name__,
+                    [self.encode_ref_item(item) for item in list.__iter__(value)])
+        if isinstance(value, AVBObject):
+            keys, values = self.encode_properties(value)
+            return (OBJECT, value.__class__.__name__, keys, values)
+        if isinstance(value, MobID):
+            return (MOBID, bytes(value.bytes_le))
+        if isinstance(value, uuid.UUID):
+            return (UUID, value.bytes)
+        if isinstance(value, datetime.datetime):
+            return (DATETIME, value.year, value.month, value.day,
+                    value.hour, value.minute, value.second, value.microsecond)
+        if isinstance(value, bytearray):
+            return (BYTEARRAY, bytes(value))
+        if isinstance(value, tuple):
+            return (TUPLE, [self.encode(item) for item in value])
+        if isinstance(value, BinItemList):
+            columns = value.columns()
+            return (ITEMTABLE, [self.encode_ref(index) for index in columns[0]]) + tuple(columns[1:])
+        if isinstance(value, list):
+            return (LIST, [self.encode(item) for item in value])
+        if isinstance(value, AVBPropertyData):
+            return (PROPDATA,) + self.encode_items(dict.items(value))
+        if isinstance(value, dict):
+            return (DICT,) + self.encode_items(dict.items(value))
+
+        raise TypeError("can not encode %s" % type(value))
+
+class Decoder(object):
+    """
+    Inverse of Encoder, rebuilds values for objects of root. References become
+    AVBObjectRefs, see decode_ref, and are stored as plain indices where the
+    readers store them that way.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def decode_ref(self, index):
+        return utils.AVBObjectRef(self.root, index)
+
+    def decode_index(self, value):
+        if isinstance(value, utils.AVBObjectRef) and value.root is self.root:
+            return value.index
+        return value
+
+    def decode_ref_items(self, obj, items):
+        list.extend(obj, [self.decode_index(self.decode(item, obj)) for item in items])
+
+    def set_properties(self, obj, keys, values):
+        # both property stores keep reference properties of root as plain indices
+        data = obj.property_data
+        for key, value in zip(keys, values):
+            data[key] = self.decode(value, obj)
+
+    def fill_object(self, obj, body):
+        """
+        Restores the contents of an object stored in its own chunk from encode_object.
+        """
+        if isinstance(obj, dict):
+            OrderedDict.__init__(obj)
+            keys, values = body
+            for key, value in zip(keys, values):
+                OrderedDict.__setitem__(obj, key, self.decode(value, obj))
+        elif isinstance(obj, list):
+            self.decode_ref_items(obj, body)
+        else:
+            self.set_properties(obj, body[0], body[1])
+
+    def decode(self, value, parent=None):
+        if not isinstance(value, tuple):
+            return value
+
+        tag = value[0]
+        if tag == REF:
+            return self.decode_ref(value[1])
+        if tag == MOBID:
+            return FrozenMobID(bytes_le=value[1])
+        if tag == UUID:
+            return uuid.UUID(bytes=value[1])
+        if tag == DATETIME:
+            return datetime.datetime(*value[1:])
+        if tag == BYTEARRAY:
+            return bytearray(value[1])
+        if tag == TUPLE:
+            return tuple(self.decode(item, parent) for item in value[1])
+        if tag == LIST:
+            return [self.decode(item, parent) for item in value[1]]
+        if tag == ITEMTABLE:
+            mobs = [object_index(self.decode(ref)) for ref in value[1]]
+            return BinItemList.from_columns(self.root, [mobs] + list(value[2:]))
+        if tag == OBJECT:
+            cls = utils.AVBClassName_dict[value[1]]
+            # tracks mark the track group they are stored in as modified
+            obj = cls.__new__(cls, root=self.root, owner=parent)
+            self.set_properties(obj, value[2], value[3])
+            return obj
+        if tag == REFLIST:
+            cls = utils.AVBClassName_dict[value[1]]
+            obj = cls.__new__(cls, root=self.root, parent=parent)
+            self.decode_ref_items(obj, value[2])
+            return obj
+        if tag == PROPDATA:
+            result = AVBPropertyData()
+            for key, item in zip(value[1], value[2]):
+                OrderedDict.__setitem__(result, key, self.decode(item, parent))
+            return result
+        if tag == DICT:
+            return dict((key, self.decode(item, parent)) for key, item in zip(value[1], value[2]))
+
+        raise ValueError("unknown snapshot tag %r" % (tag,))
+
+def source_info(path):
+    st = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': st.st_size, 'mtime': st.st_mtime}
+
+def save_snapshot(root, path, source=None):
+    """
+    Decodes every object of root and writes them to path.
+    """
+    if source is None:
+        source = getattr(root.f, 'name', None)
+    if not source or not os.path.exists(source):
+        raise ValueError("snapshot needs the path of the source file")
+    if root.modified_objects:
+        raise ValueError("file has unsaved modifications")
+
+    encoder = Encoder(root)
+    objects = []
+    indices = [i for i in range(1, len(root.object_positions))
+               if root.read_chunk(i).class_id in utils.AVBClaseID_dict]
+    for obj in root.read_objects(indices):
+        objects.append((obj.instance_id, obj.class_id, encoder.encode_object(obj)))
+
+    payload = {
+        'source': source_info(source),
+        'byte_order': root.ictx.byte_order,
+        'object_positions': root.object_positions.tostring() if sys.version_info.major < 3
+                            else root.object_positions.tobytes(),
+        'positions_typecode': root.object_positions.typecode,
+        'objects_end': root.objects_end,
+        'objects': objects,
+    }
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(bytearray([VERSION]))
+        f.write(marshal.dumps(payload))
+
+def read_payload(path):
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("not a pyavb snapshot")
+        version = bytearray(f.read(1))
+        if not version or version[0] != VERSION:
+            raise ValueError("unsupported snapshot version")
+        return marshal.loads(f.read())
+
+def load_snapshot(path, source=None, **kwargs):
+    """
+    Opens the source file of the snapshot at path with all objects restored from
+    the snapshot. Falls back to a normal parse of source if it changed after the
+    snapshot was saved or the snapshot can not be read.
+    """
+    from .file import AVBFile
+
+    try:
+        payload = read_payload(path)
+    except (IOError, OSError, ValueError, EOFError, TypeError):
+        if source is None:
+            raise
+        return AVBFile(source, **kwargs)
+
+    info = payload['source']
+    if source is None:
+        source = info['path']
+
+    current = source_info(source)
+    if current['size'] != info['size'] or current['mtime'] != info['mtime']:
+        return AVBFile(source, **kwargs)
+
+    positions = array.array(str(payload['positions_typecode']))
+    if sys.version_info.major < 3:
+        positions.fromstring(payload['object_positions'])
+    else:
+        positions.frombytes(payload['object_positions'])
+
+    root = AVBFile(source, index=(positions, payload['objects_end']), **kwargs)
+    restore_objects(root, payload['objects'])
+    return root
+
+def restore_objects(root, objects):
+    # create every instance first so references can be resolved from the cache,
+    # the root keeps them alive while it is open
+    decoder = Decoder(root)
+    cache = root.object_cache
+    restored = []
+    pinned = []
+    for index, class_id, body in objects:
+        obj = cache.get(index, None)
+        if obj is None:
+            cls = utils.AVBClaseID_dict[class_id]
+            obj = cls.__new__(cls, root=root)
+            obj.instance_id = index
+            cache[index] = obj
+            restored.append((obj, body))
+        pinned.append(obj)
+
+    reading = root.reading
+    root.reading = True
+    try:
+        for obj, body in restored:
+            decoder.fill_object(obj, body)
+    finally:
+        root.reading = reading
+
+    root.pinned_objects = pinned
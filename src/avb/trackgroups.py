@@ -5,6 +5,7 @@ from __future__ import (
     division,
     )
 import datetime
+import weakref
 
 from . import core
 from .core import AVBPropertyDef, walk_references
@@ -42,7 +43,21 @@ class Track(core.AVBObject):
         AVBPropertyDef('read_only',        '__OMFI:TRAK:ReadOnly',     'bool'),
         AVBPropertyDef('lock_number',      'OMFI:TRAK:LockNubmer',     'int16'),
     ]
-    __slots__ = ()
+    __slots__ = ('owner',)
+
+    def __new__(cls, *args, **kwargs):
+        self = super(Track, cls).__new__(cls, *args, **kwargs)
+        # the track group whose chunk stores the track, weak to keep the cache from holding on to it
+        owner = kwargs.get('owner', None)
+        self.owner = weakref.ref(owner) if owner is not None else None
+        return self
+
+    def mark_modified(self):
+        owner = self.owner() if self.owner is not None else None
+        if owner is not None:
+            owner.mark_modified()
+        else:
+            super(Track, self).mark_modified()
 
     @property
     def media_kind(self):
@@ -118,26 +133,26 @@ class TrackGroup(Component):
 
         for i in range(track_count):
             # print(peek_data(f).encode("hex"))
-            track = Track.__new__(Track, root=self.root)
+            track = Track.__new__(Track, root=self.root, owner=self)
             flags = ctx.read_u16(f)
 
             if flags & TRACK_LABEL_FLAG:
                 track.index = ctx.read_s16(f)
 
             if flags & TRACK_ATTRIBUTES_FLAG:
-                track.attributes = ctx.read_object_ref(self.root, f)
+                track.attributes = ctx.read_object_index(self.root, f)
 
             if flags & TRACK_SESSION_ATTR_FLAG:
-                track.session_attr = ctx.read_object_ref(self.root, f)
+                track.session_attr = ctx.read_object_index(self.root, f)
 
             if flags & TRACK_COMPONENT_FLAG:
-                track.component = ctx.read_object_ref(self.root, f)
+                track.component = ctx.read_object_index(self.root, f)
 
             if flags & TRACK_FILLER_PROXY_FLAG:
-                track.filler_proxy = ctx.read_object_ref(self.root, f)
+                track.filler_proxy = ctx.read_object_index(self.root, f)
 
             if flags & TRACK_BOB_DATA_FLAG:
-                track.bob_data = ctx.read_object_ref(self.root, f)
+                track.bob_data = ctx.read_object_index(self.root, f)
 
             if flags & TRACK_CONTROL_CODE_FLAG:
                 track.control_code = ctx.read_s16(f)
@@ -227,9 +242,19 @@ class TrackGroup(Component):
 
     def dependant_mobs(self):
         """
-            Yields all mobs that this mob is dependant on in depth first order.
+            Yields all mobs that this mob is dependant on in depth first order,
+            every mob after the mobs it depends on. Uses the mob graph of the bin
+            if one is cached, otherwise only the mobs of this mob are walked.
         """
 
+        content = getattr(self.root, 'content', None)
+        graph = content.cached_mob_graph() if hasattr(content, 'cached_mob_graph') else None
+        if graph is not None:
+            if graph.mobs.get(self.mob_id, None) is self:
+                for mob in graph.closure(self.mob_id):
+                    yield mob
+                return
+
         visited = set()
         stack = [self]
 
@@ -292,14 +317,14 @@ class TrackEffect(TrackGroup):
         self.info_is_reversed = ctx.read_s8(f)
         self.info_aspect_on = ctx.read_bool(f)
 
-        self.keyframes = ctx.read_object_ref(self.root, f)
+        self.keyframes = ctx.read_object_index(self.root, f)
         self.info_force_software = ctx.read_bool(f)
         self.info_never_hardware = ctx.read_bool(f)
 
         for tag in ctx.iter_ext(f):
             if tag == 0x02:
                 ctx.read_assert_tag(f, 72)
-                self.trackman = ctx.read_object_ref(self.root, f)
+                self.trackman = ctx.read_object_index(self.root, f)
             else:
                 raise ValueError("%s: unknown ext tag 0x%02X %d" % (str(self.class_id), tag,tag))
 
@@ -794,7 +819,7 @@ class MotionEffect(TimeWarp):
                 self.offset_adjust = ctx.read_double(f)
             elif tag == 0x02:
                 ctx.read_assert_tag(f, 72)
-                self.source_param_list = ctx.read_object_ref(self.root, f)
+                self.source_param_list = ctx.read_object_index(self.root, f)
             elif tag == 0x03:
                 ctx.read_assert_tag(f, 66)
                 self.new_source_calculation = ctx.read_bool(f)
@@ -935,14 +960,14 @@ class TransitionEffect(TrackGroup):
         self.info_is_reversed = ctx.read_s8(f)
         self.info_aspect_on = ctx.read_bool(f)
 
-        self.keyframes = ctx.read_object_ref(self.root, f)
+        self.keyframes = ctx.read_object_index(self.root, f)
         self.info_force_software = ctx.read_bool(f)
         self.info_never_hardware = ctx.read_bool(f)
 
         for tag in ctx.iter_ext(f):
             if tag == 0x01:
                 ctx.read_assert_tag(f, 72)
-                self.trackman = ctx.read_object_ref(self.root, f)
+                self.trackman = ctx.read_object_index(self.root, f)
             else:
                 raise ValueError("%s: unknown ext tag 0x%02X %d" % (str(self.class_id), tag,tag))
 
@@ -1055,6 +1080,30 @@ class Composition(TrackGroup):
         self.last_modified = now
         self.creation_time = now
 
+    # dates are kept as raw timestamps, the datetime is only built when accessed
+
+    def date_property(self, name):
+        value = self.property_data.get(name, None)
+        if value is None:
+            raise AttributeError("'%s' has no attribute '%s'" % (self.__class__.__name__, name))
+        return utils.timestamp_to_datetime(value)
+
+    @property
+    def last_modified(self):
+        return self.date_property('last_modified')
+
+    @property
+    def creation_time(self):
+        return self.date_property('creation_time')
+
+    @property
+    def last_modified_timestamp(self):
+        return utils.datetime_to_timestamp(self.property_data.get('last_modified', None))
+
+    @property
+    def creation_timestamp(self):
+        return utils.datetime_to_timestamp(self.property_data.get('creation_time', None))
+
     def read(self, f):
         super(Composition, self).read(f)
         ctx = self.root.ictx
@@ -1063,17 +1112,17 @@ class Composition(TrackGroup):
 
         mob_id_lo = ctx.read_u32(f)
         mob_id_hi = ctx.read_u32(f)
-        self.last_modified = ctx.read_datetime(f)
+        self.last_modified = ctx.read_timestamp(f)
 
         self.mob_type_id = ctx.read_u8(f)
         self.usage_code =  ctx.read_s32(f)
-        self.descriptor = ctx.read_object_ref(self.root, f)
+        self.descriptor = ctx.read_object_index(self.root, f)
 
         for tag in ctx.iter_ext(f):
 
             if tag == 0x01:
                 ctx.read_assert_tag(f, 71)
-                self.creation_time = ctx.read_datetime(f)
+                self.creation_time = ctx.read_timestamp(f)
             elif tag == 0x02:
                 self.mob_id = ctx.read_mob_id(f)
             else:
@@ -1091,17 +1140,17 @@ class Composition(TrackGroup):
         hi = self.mob_id.material.time_mid + (self.mob_id.material.time_hi_version << 16)
         ctx.write_u32(f, lo)
         ctx.write_u32(f, hi)
-        ctx.write_datetime(f, self.last_modified)
+        ctx.write_datetime(f, self.last_modified_timestamp)
 
         ctx.write_u8(f, self.mob_type_id)
         ctx.write_s32(f, self.usage_code)
         ctx.write_object_ref(self.root, f, self.descriptor)
 
-        if hasattr(self, 'creation_time'):
+        if 'creation_time' in self.property_data:
             ctx.write_u8(f, 0x01)
             ctx.write_u8(f, 0x01)
             ctx.write_u8(f, 71)
-            ctx.write_datetime(f, self.creation_time)
+            ctx.write_datetime(f, self.creation_timestamp)
 
         if hasattr(self, 'mob_id'):
             ctx.write_u8(f, 0x01)
@@ -0,0 +1,156 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+
+import marshal
+import threading
+
+from . import utils
+from .core import walk_references
+from .snapshot import Encoder, Decoder, chunk_index, REF
+
+VERSION = 3
+
+# target root used by rehydrate, see target()
+state = threading.local()
+
+class SubtreeEncoder(Encoder):
+    """
+    Encodes references as indices into the list of objects of a subtree,
+    references leaving the subtree become null references.
+    """
+    def __init__(self, root, mapping):
+        super(SubtreeEncoder, self).__init__(root)
+        self.mapping = mapping
+
+    def encode_ref(self, index):
+        return (REF, self.mapping.get(index, 0))
+
+class SubtreeDecoder(Decoder):
+    """
+    Resolves subtree local references to the objects created on the target root.
+    """
+    def __init__(self, root, objects):
+        super(SubtreeDecoder, self).__init__(root)
+        self.objects = objects
+
+    def decode_ref(self, index):
+        if index <= 0:
+            return None
+        return self.objects[index - 1]
+
+def detach(obj):
+    """
+    Serializes obj and every object it references to bytes that do not depend on
+    the file obj was read from. Mobs referenced through SourceClips are not included,
+    they are kept as MobIDs. See attach.
+    """
+    root = obj.root
+    mapping = {}
+    objects = []
+    for item in walk_references(obj):
+        index = chunk_index(root, item)
+        if index is not None and index not in mapping:
+            objects.append(item)
+            mapping[index] = len(objects)
+
+    encoder = SubtreeEncoder(root, mapping)
+    indices = [item.instance_id for item in objects]
+    entries = [(item.class_id, encoder.encode_object(item)) for item in objects]
+    # the source only tells apart the files of objects detached in the same process
+    return marshal.dumps((VERSION, id(root), indices, entries, encoder.encode(obj)))
+
+def attach(data, root, memo=None):
+    """
+    Creates the objects serialized by detach as new objects of root and returns
+    the copy of the detached object. Objects found in memo, a dict filled by previous
+    calls for data detached in the same process, are reused instead of created again.
+    """
+    version, source, indices, entries, top = marshal.loads(data)
+    if version != VERSION:
+        raise ValueError("unsupported transfer version %d" % version)
+
+    objects = []
+    pending = []
+    for index, (class_id, body) in zip(indices, entries):
+        key = (source, index)
+        obj = memo.get(key, None) if memo is not None else None
+        if obj is None or obj.root is not root:
+            cls = utils.AVBClaseID_dict[class_id]
+            obj = cls.__new__(cls, root=root)
+            root.add_object(obj)
+            pending.append((obj, body))
+            if memo is not None:
+                memo[key] = obj
+        objects.append(obj)
+
+    decoder = SubtreeDecoder(root, objects)
+    reading = root.reading
+    root.reading = True
+    try:
+        for obj, body in pending:
+            decoder.fill_object(obj, body)
+        return decoder.decode(top)
+    finally:
+        root.reading = reading
+
+class target(object):
+    """
+    Context manager selecting the root unpickled objects are attached to in
+    the current thread. Without one the objects of each pickle stream are
+    attached to a new empty root shared by the stream.
+    """
+    def __init__(self, root):
+        self.root = root
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(state, 'root', None)
+        state.root = self.root
+        return self.root
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        state.root = self.previous
+
+class Stream(object):
+    """
+    Pickled along with every object. The pickler stores it once per stream, so
+    all objects of a stream are unpickled with the same Stream, which holds their
+    root and the objects already created in it.
+    """
+    def __init__(self):
+        self.root = None
+        self.memo = {}
+
+    def __reduce__(self):
+        return (Stream, ())
+
+    def target_root(self):
+        root = getattr(state, 'root', None)
+        if root is not None:
+            return root
+        if self.root is None:
+            from .file import AVBFile
+            self.root = AVBFile()
+        return self.root
+
+STREAM = Stream()
+
+def rehydrate(data, stream):
+    return attach(data, stream.target_root(), stream.memo)
+
+def rehydrate_ref(data, stream):
+    obj = rehydrate(data, stream)
+    return utils.AVBObjectRef(obj.root, obj.instance_id)
+
+def reduce_object(obj):
+    return (rehydrate, (detach(obj), STREAM))
+
+def reduce_ref(ref):
+    value = ref.value if ref.index > 0 else None
+    if value is None:
+        return (utils.AVBObjectRef, (None, 0))
+    return (rehydrate_ref, (detach(value), STREAM))
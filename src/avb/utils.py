@@ -6,10 +6,15 @@ from __future__ import (
 )
 
 import struct
+import time
+from datetime import datetime
 from io import BytesIO
 import os
 from uuid import UUID, uuid4
 from binascii import hexlify, unhexlify
+from importlib import import_module
+
+from .classtable import CLASS_TABLE
 
 class AVBObjectRef(object):
     __slots__ = ('root', 'index')
@@ -36,18 +41,46 @@ class AVBObjectRef(object):
 
     @property
     def valid(self):
-        if self.index >= len(self.root.object_positions):
+        positions = getattr(self.root, 'object_positions', None)
+        if positions is None:
+            # root without a file, only objects created in it exist
+            return self.index in self.root.object_cache
+        if self.index >= len(positions):
             return False
         return True
 
+    def __reduce__(self):
+        from . import transfer
+        return transfer.reduce_ref(self)
+
+    def __copy__(self):
+        return AVBObjectRef(self.root, self.index)
+
+    def __deepcopy__(self, memo):
+        value = self.value
+        if value is None:
+            return AVBObjectRef(self.root, 0)
+        return AVBObjectRef(self.root, value.copy(self.root).instance_id)
+
     def __repr__(self):
         s = "%s.%s"  % (self.__class__.__module__,
                                 self.__class__.__name__)
-        if self.root and self.index and self.valid:
+        if self.root and self.index and getattr(self.root, 'f', None) and self.valid:
             chunk = self.root.read_chunk(self.index)
             s += " %s idx: %d pos: %d" % (chunk.class_id, self.index, chunk.pos)
         return '<%s at 0x%x>' % (s, id(self))
 
+def deref_index(root, index):
+    """
+    Resolves a plain object index without allocating a AVBObjectRef.
+    """
+    if index <= 0:
+        return None
+    if root.debug_copy_refs:
+        return AVBObjectRef(root, index)
+
+    return root.read_object(index)
+
 def int_from_bytes(data, byte_order='big'):
     num = 0
     if byte_order == 'little':
@@ -93,12 +126,86 @@ def unpack_u32le_from(buffer, offset):
     value += buffer[offset+3] << 24
     return value
 
+def timestamp_to_datetime(value):
+    """
+    Converts a raw u32 timestamp as stored in the file to a local datetime.
+    datetime values and None are returned unchanged.
+    """
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromtimestamp(value)
+
+def datetime_to_timestamp(value):
+    """
+    Inverse of timestamp_to_datetime, ints are returned unchanged.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return int(time.mktime(value.timetuple()))
+    return int(value)
+
 def generate_uid():
     v = uuid4().int & (1<<64)-1
     return v
 
-AVBClaseID_dict = {}
-AVBClassName_dict = {}
+class ClassRegistry(dict):
+    """
+    Dictionary of registered classes that imports the module defining a class the
+    first time it is looked up. modules maps keys to module names, see classtable.py.
+    Iterating the registry imports every class module.
+    """
+    def __init__(self, modules):
+        super(ClassRegistry, self).__init__()
+        self.modules = modules
+
+    def load(self, key):
+        module = self.modules.get(key, None)
+        if module is None:
+            return False
+        import_module('.' + module, __package__)
+        return dict.__contains__(self, key)
+
+    def load_all(self):
+        for module in sorted(set(self.modules.values())):
+            import_module('.' + module, __package__)
+
+    def __missing__(self, key):
+        if self.load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        value = dict.get(self, key, None)
+        if value is None and self.load(key):
+            value = dict.__getitem__(self, key)
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or self.load(key)
+
+    def __iter__(self):
+        self.load_all()
+        return dict.__iter__(self)
+
+    def __len__(self):
+        self.load_all()
+        return dict.__len__(self)
+
+    def keys(self):
+        self.load_all()
+        return dict.keys(self)
+
+    def values(self):
+        self.load_all()
+        return dict.values(self)
+
+    def items(self):
+        self.load_all()
+        return dict.items(self)
+
+AVBClaseID_dict = ClassRegistry(dict((class_id, module) for module, name, class_id in CLASS_TABLE if class_id))
+AVBClassName_dict = ClassRegistry(dict((name, module) for module, name, class_id in CLASS_TABLE))
 def register_class(classobj):
     AVBClaseID_dict[classobj.class_id] = classobj
     AVBClassName_dict[classobj.__name__] = classobj
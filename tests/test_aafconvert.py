@@ -0,0 +1,56 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+import os
+import unittest
+import avb
+
+import avb.aafconvert
+
+test_file_01 = os.path.join(os.path.dirname(__file__), 'test_files', 'test_file_01.avb')
+
+result_dir = os.path.join(os.path.dirname(__file__), 'results')
+
+if not os.path.exists(result_dir):
+    os.makedirs(result_dir)
+
+class TestAAFConvert(unittest.TestCase):
+
+    def test_conversion_order(self):
+        with avb.open(test_file_01) as f:
+            order = avb.aafconvert.conversion_order(f.content)
+            # the order is found without keeping any mob alive
+            assert not any(obj.class_id == b'CMPO' for obj in f.object_cache.values())
+            mob_ids = [mob_id for mob_id, index in order]
+            assert len(mob_ids) == len(set(mob_ids))
+
+            toplevel = list(f.content.toplevel())
+            assert set(mob.mob_id for mob in toplevel).issubset(mob_ids)
+            for mob in toplevel:
+                pos = mob_ids.index(mob.mob_id)
+                for dep in mob.dependant_mobs():
+                    assert mob_ids.index(dep.mob_id) < pos
+
+            for mob_id, index in order:
+                assert f.read_object(index).mob_id == mob_id
+
+    @unittest.skipIf(avb.aafconvert.aaf2 is None, "pyaaf2 not installed")
+    def test_convert_file(self):
+        import aaf2
+        with avb.open(test_file_01) as a:
+            expected = len(avb.aafconvert.conversion_order(a.content))
+
+        for compact in (False, True):
+            result_file = os.path.join(result_dir, 'convert.aaf')
+            count = avb.aafconvert.convert_file(test_file_01, result_file, compact=compact)
+            assert count == expected
+
+            with aaf2.open(result_file, 'r') as f:
+                assert len(list(f.content.mobs)) == count
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import run
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_run(self):
+        params = dict(masters=4, sequences=1, components=8, effect_interval=2, keyframes=4, seed=0)
+        results = run.run(params, repeat=1)
+        timings = results['timings']
+        assert results['objects'] > 0
+        assert 'decode_ABIN' in timings
+        for name, value in timings.items():
+            assert isinstance(value, float), name
+            assert value >= 0, name
+
+if __name__ == "__main__":
+    unittest.main()
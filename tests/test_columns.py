@@ -0,0 +1,186 @@
+from __future__ import (
+    unicode_literals,
+    absolute_import,
+    print_function,
+    division,
+    )
+import os
+import io
+import unittest
+import avb
+
+import avb.misc
+from avb.columns import EffectParamColumns
+from avb.ioctx import AVBIOContext
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+test_file_01 = os.path.join(os.path.dirname(__file__), 'test_files', 'test_file_01.avb')
+
+def create_effect_params(f, count):
+    fxps = f.create.EffectParamList()
+    fxps.orig_length = 100
+    fxps.window_offset = -5
+    fxps.keyframe_size = 160
+    fxps.parameters = []
+
+    for i in range(count):
+        p = avb.misc.EffectParam.__new__(avb.misc.EffectParam, root=f)
+        for pdef in avb.misc.EffectParam.propertydefs:
+            if pdef.type == 'int32':
+                setattr(p, pdef.name, i * 1000 - 7)
+            elif pdef.type in ('int16', 'int8'):
+                setattr(p, pdef.name, -i)
+            elif pdef.type == 'bool':
+                setattr(p, pdef.name, i % 2 == 0)
+        p.box = [i, -i, i * 2, -i * 2]
+        p.colors = list(range(i % 3))
+        p.user_param = bytearray(b'x' * i)
+        fxps.parameters.append(p)
+
+    return fxps
+
+def create_tracker(f):
+    params = []
+    for i in range(3):
+        p = f.create.TrackerParameter()
+        p.settings = bytearray(b'param%d' % i)
+        params.append(p)
+
+    param_slot = f.create.TrackerParameterSlot()
+    param_slot.settings = bytearray(b'slot')
+    param_slot.params = params
+
+    data = []
+    for i in range(2):
+        d = f.create.TrackerData()
+        d.settings = bytearray(b'tracker%d' % i)
+        d.clip_version = i + 1
+        d.clips = []
+        if i:
+            d.smoothing = 3
+            d.filter_amount = 0.5
+        data.append(d)
+
+    data_slot = f.create.TrackerDataSlot()
+    data_slot.tracker_data = data
+    data_slot.track_fg = True
+
+    manager = f.create.TrackerManager()
+    manager.data_slots = data_slot
+    manager.param_slots = param_slot
+    return manager
+
+class TestColumns(unittest.TestCase):
+
+    def test_tracker_columns(self):
+        result_file = os.path.join(os.path.dirname(__file__), 'results', 'tracker_columns.avb')
+        if not os.path.exists(os.path.dirname(result_file)):
+            os.makedirs(os.path.dirname(result_file))
+
+        f = avb.file.AVBFile()
+        f.content.attributes['tracker'] = create_tracker(f)
+        # nothing is on disk yet
+        assert len(f.tracker_columns()) == 0
+        f.write(result_file)
+
+        with avb.open(result_file) as f:
+            columns = f.tracker_columns()
+            assert len(columns) == 7
+            assert len(f.object_cache) == 1
+            assert f.ref_index is None
+
+            manager = f.content.attributes['tracker']
+            data_slot = manager.data_slots
+            param_slot = manager.param_slots
+
+            assert list(columns.data_slots['index']) == [data_slot.instance_id]
+            assert list(columns.data_slots['track_fg']) == [1]
+            assert columns.data_slots.variable('tracker_data', 0).tolist() == \
+                [d.instance_id for d in data_slot.tracker_data]
+
+            for i, d in enumerate(data_slot.tracker_data):
+                row = columns.data.row(list(columns.data['index']).index(d.instance_id))
+                assert bytearray(row['settings']) == d.settings
+                assert row['clip_version'] == d.clip_version
+                assert row['smoothing'] == getattr(d, 'smoothing', -1)
+                assert row['offset_tracking'] == -1
+
+            assert columns.param_slots.variable('params', 0).tolist() == \
+                [p.instance_id for p in param_slot.params]
+            for p in param_slot.params:
+                row = columns.params.row(list(columns.params['index']).index(p.instance_id))
+                assert bytearray(row['settings']) == p.settings
+
+        with avb.open(test_file_01) as f:
+            assert len(f.tracker_columns()) == 0
+
+    def test_effect_params_from_chunk(self):
+        f = avb.file.AVBFile()
+        fxps = create_effect_params(f, 50)
+        expected = EffectParamColumns.from_params(fxps.parameters)
+
+        for byte_order in ('little', 'big'):
+            f.octx = AVBIOContext(byte_order)
+            buf = io.BytesIO()
+            fxps.write(buf)
+            columns = EffectParamColumns.from_chunk(buf.getvalue(), byte_order)
+
+            assert len(columns) == 50
+            assert columns.columns == expected.columns
+            assert columns.orig_length == 100
+            assert columns.window_offset == -5
+            assert columns.keyframe_size == 160
+
+        for i, p in enumerate(fxps.parameters):
+            row = columns.row(i)
+            assert row['level'] == p.level
+            assert row['box_2'] == p.box[2]
+            assert row['box_xpos'] == int(p.box_xpos)
+            assert row['colors'] == p.colors
+            assert bytearray(row['user_param']) == p.user_param
+
+    def test_effect_params_file(self):
+        with avb.open(test_file_01) as f:
+            for fxps in f.iter_class_ids([b'FXPS']):
+                columns = fxps.param_columns()
+                expected = EffectParamColumns.from_params(fxps.parameters)
+                assert columns.columns == expected.columns
+                assert columns.orig_length == fxps.orig_length
+                assert columns.keyframe_size == fxps.keyframe_size
+
+        with avb.open(test_file_01) as f:
+            # parsed from the chunks without decoding the lists
+            found = list(f.effect_param_columns())
+            assert found
+            assert not any(obj.class_id == b'FXPS' for obj in f.object_cache.values())
+            for index, columns in found:
+                fxps = f.read_object(index)
+                assert columns.columns == EffectParamColumns.from_params(fxps.parameters).columns
+                assert columns.orig_length == fxps.orig_length
+
+    def test_effect_params_new_file(self):
+        with avb.open() as f:
+            fxps = create_effect_params(f, 10)
+            found = list(f.effect_param_columns())
+            assert len(found) == 1
+            index, columns = found[0]
+            assert f.modified_objects[index] is fxps
+            assert columns.columns == fxps.param_columns().columns
+            assert len(columns) == 10
+
+    @unittest.skipIf(numpy is None, "numpy not installed")
+    def test_effect_params_numpy(self):
+        f = avb.file.AVBFile()
+        fxps = create_effect_params(f, 10)
+        columns = fxps.param_columns()
+        table = columns.as_numpy()
+        assert len(table) == 10
+        assert list(table['level']) == list(columns['level'])
+
+
+if __name__ == "__main__":
+    unittest.main()
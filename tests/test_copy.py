@@ -7,8 +7,13 @@ from __future__ import (
 import os
 import unittest
 import avb
+import avb.rawcopy
+import avb.transfer
+import copy
+import pickle
 
 from test_write import compare
+from test_create import create_mastermob
 
 test_file_01 = os.path.join(os.path.dirname(__file__), 'test_files', 'test_file_01.avb')
 
@@ -37,6 +42,66 @@ class TestWrite(unittest.TestCase):
                     assert mob_b
                     compare(mob_a, mob_b)
 
+    def test_pickle(self):
+        result_file = os.path.join(result_dir, 'pickle.avb')
+        with avb.open(test_file_01) as a:
+            data = [pickle.dumps(mob, pickle.HIGHEST_PROTOCOL) for mob in a.content.mobs]
+
+            track = list(a.content.mobs)[0].tracks[0]
+            new_track = pickle.loads(pickle.dumps(track))
+            assert new_track.root is not a
+            compare(track, new_track)
+
+            ref = list(a.content.mobs)[0].get_ref('attributes')
+            new_ref = pickle.loads(pickle.dumps(ref))
+            compare(ref.value, new_ref.value)
+
+        with avb.open() as b:
+            with avb.transfer.target(b):
+                for mob in [pickle.loads(item) for item in data]:
+                    assert mob.root is b
+                    b.content.add_mob(mob)
+            b.write(result_file)
+
+        with avb.open(test_file_01) as a:
+            with avb.open(result_file) as b:
+                for mob_a in a.content.mobs:
+                    mob_b = b.content.find_by_mob_id(mob_a.mob_id)
+                    assert mob_b
+                    compare(mob_a, mob_b)
+
+    def test_pickle_stream(self):
+        with avb.open(test_file_01) as a:
+            mob = next(a.content.compositionmobs())
+            component = mob.tracks[0].component
+            data = pickle.dumps([mob, component, list(a.content.mobs)[-1]])
+
+        # objects of one stream share a root and the objects they both reference
+        new_mob, new_component, other = pickle.loads(data)
+        assert new_mob.root is new_component.root is other.root
+        assert new_mob.tracks[0].component is new_component
+
+        assert pickle.loads(data)[0].root is not new_mob.root
+
+    def test_copy_module(self):
+        with avb.open(test_file_01) as a:
+            mob = next(a.content.compositionmobs())
+
+            # copy.copy and copy.deepcopy stay within the file
+            shallow = copy.copy(mob)
+            assert shallow.root is a
+            assert shallow.instance_id == mob.instance_id
+            assert shallow.property_data is mob.property_data
+
+            ref = copy.copy(mob.get_ref('attributes'))
+            assert ref.root is a and ref.index == mob.get_ref('attributes').index
+
+            deep = copy.deepcopy(mob)
+            assert deep.root is a
+            assert deep.instance_id != mob.instance_id
+            assert deep.tracks[0].component is not mob.tracks[0].component
+            compare(mob.tracks[0].component, deep.tracks[0].component)
+
     def test_copy_mastermob_depends(self):
         result_file = os.path.join(result_dir, 'copy_mastermobs.avb')
 
@@ -91,6 +156,92 @@ class TestWrite(unittest.TestCase):
                     mob_a = a.content.find_by_mob_id(mob_id)
                     mob_b = b.content.find_by_mob_id(mob_id)
                     compare(mob_a, mob_b)
+    def test_raw_copy_compositionmobs(self):
+        result_file = os.path.join(result_dir, 'raw_copy_compositionmob.avb')
+
+        mob_ids = set()
+        with avb.open(test_file_01) as a:
+            with avb.open() as b:
+                mobs = list(a.content.compositionmobs())
+                for new_mob in avb.rawcopy.copy_mobs(mobs, b):
+                    mob_ids.add(new_mob.mob_id)
+                    b.content.add_mob(new_mob)
+
+                b.write(result_file)
+
+        with avb.open(test_file_01) as a:
+            with avb.open(result_file) as b:
+                assert len(mob_ids) == len(list(b.content.mobs))
+                for mob_id in mob_ids:
+                    mob_a = a.content.find_by_mob_id(mob_id)
+                    mob_b = b.content.find_by_mob_id(mob_id)
+                    compare(mob_a, mob_b)
+
+    def test_raw_copy_modified(self):
+        result_file = os.path.join(result_dir, 'raw_copy_modified.avb')
+        with avb.open(test_file_01) as a:
+            with avb.open() as b:
+                for mob in a.content.mobs:
+                    mob.name = u"Cow"
+                new_mobs = avb.rawcopy.copy_mobs(a.content.mobs, b, dependants=False)
+                for new_mob in new_mobs:
+                    assert isinstance(new_mob, avb.trackgroups.Composition)
+                    b.content.add_mob(new_mob)
+                b.write(result_file)
+
+        with avb.open(result_file) as b:
+            for mob in b.content.mobs:
+                assert mob.name == u"Cow"
+
+    def test_raw_copy_closed_source(self):
+        result_file = os.path.join(result_dir, 'raw_copy_closed.avb')
+        with avb.open() as b:
+            with avb.open(test_file_01) as a:
+                mob = next(a.content.mastermobs())
+                mob_id = mob.mob_id
+                graph = a.content.mob_graph()
+                dependencies = [m.mob_id for m in graph.closure(mob_id)]
+                new_mobs = avb.rawcopy.copy_mobs([mob], b)
+
+            # copies are decoded from their own data once the source is closed
+            assert [m.mob_id for m in new_mobs] == dependencies + [mob_id]
+            new_mob = new_mobs[-1]
+            assert [t.component.class_id for t in new_mob.tracks]
+            for m in new_mobs:
+                b.content.add_mob(m)
+            b.write(result_file)
+
+        with avb.open(test_file_01) as a:
+            with avb.open(result_file) as b:
+                compare(a.content.find_by_mob_id(mob_id), b.content.find_by_mob_id(mob_id))
+
+    def test_raw_copy_new_file(self):
+        result_file = os.path.join(result_dir, 'raw_copy_new.avb')
+        with avb.open() as a:
+            mob = create_mastermob(a)
+            with avb.open() as b:
+                new_mobs = avb.rawcopy.copy_mobs([mob], b)
+                assert [m.mob_id for m in new_mobs] == [m.mob_id for m in reversed(list(a.content.mobs))]
+                assert all(m.root is b for m in new_mobs)
+                for new_mob in new_mobs:
+                    b.content.add_mob(new_mob)
+                b.write(result_file)
+
+            with avb.open(result_file) as b:
+                for mob_a in a.content.mobs:
+                    mob_b = b.content.find_by_mob_id(mob_a.mob_id)
+                    assert mob_b.name == mob_a.name
+                    assert len(mob_b.tracks) == len(mob_a.tracks)
+
+    def test_raw_copy_byte_order(self):
+        with avb.open(test_file_01) as a:
+            with avb.open() as b:
+                mob = next(a.content.mastermobs())
+                for new_mob in avb.rawcopy.copy_mobs([mob], b):
+                    b.content.add_mob(new_mob)
+
+                with self.assertRaises(ValueError):
+                    b.write(os.path.join(result_dir, 'raw_copy_be.avb'), byte_order='big')
 
 if __name__ == "__main__":
     unittest.main()
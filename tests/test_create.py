@@ -5,10 +5,13 @@ from __future__ import (
     division,
     )
 import os
+import sys
+import subprocess
 import unittest
 import avb
 
 import avb.utils
+from avb.classtable import CLASS_TABLE
 
 
 result_dir = os.path.join(os.path.dirname(__file__), 'results')
@@ -188,6 +191,67 @@ class TestCreate(unittest.TestCase):
 
             f.write(result_file)
 
+    def test_mob_graph(self):
+        # files created with avb.open() build the graph from the decoded mobs
+        with avb.open() as f:
+            mob = create_mastermob(f)
+            file_mob, tape_mob = list(f.content.mobs)[1:]
+            graph = f.content.mob_graph()
+            assert [m.mob_id for m in graph.closure(mob.mob_id)] == [tape_mob.mob_id, file_mob.mob_id]
+            assert set(m.mob_id for m in mob.dependant_mobs()) == set([file_mob.mob_id, tape_mob.mob_id])
+
+    def test_bin_table(self):
+        with avb.open() as f:
+            mob = create_mastermob(f)
+            table = f.content.table()
+            assert table.column('Name') == [m.name for m in f.content.mobs]
+            assert table.column('Tape') == [u"Example Tape"] * 3
+            mob.name = u"Renamed"
+            assert f.content.table().column('Name')[0] == u"Renamed"
+
+    def test_reference_index(self):
+        with avb.open() as f:
+            create_mastermob(f)
+            with self.assertRaises(ValueError):
+                f.reference_index()
+            with self.assertRaises(ValueError):
+                f.referrers(1)
+            with self.assertRaises(ValueError):
+                f.unreachable_objects()
+
+    def test_iter_locators(self):
+        with avb.open() as f:
+            create_mastermob(f)
+            file_mob = list(f.content.mobs)[1]
+            locator = f.create.MacFileLocator()
+            locator.path = u"media.mxf"
+            file_mob.descriptor.locator = locator
+            records = list(f.iter_locators())
+            assert [(mob_id, fields['index'], fields['path']) for mob_id, fields in records] == \
+                [(file_mob.mob_id, locator.instance_id, u"media.mxf")]
+
+    def test_class_table(self):
+        registered = set()
+        for name, classobj in avb.utils.AVBClassName_dict.items():
+            class_id = getattr(classobj, 'class_id', None)
+            if avb.utils.AVBClaseID_dict.get(class_id, None) is not classobj:
+                class_id = None
+            registered.add((classobj.__module__.split('.')[-1], name, class_id))
+        assert registered == set(CLASS_TABLE)
+        assert len(registered) == len(CLASS_TABLE)
+
+    def test_lazy_import(self):
+        code = "import sys, avb; print(' '.join(sorted(sys.modules)))"
+        src_dir = os.path.dirname(os.path.dirname(avb.__file__))
+        env = dict(os.environ, PYTHONPATH=src_dir)
+        modules = subprocess.check_output([sys.executable, '-c', code], env=env).decode('ascii').split()
+        for name in avb.LAZY_MODULES:
+            if sys.version_info >= (3, 7):
+                assert 'avb.' + name not in modules
+
+        assert 'SourceClip' in avb.utils.AVBClassName_dict
+        assert avb.utils.AVBClaseID_dict[b'SCLP'] is avb.components.SourceClip
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -5,10 +5,22 @@ from __future__ import (
     division,
     )
 import os
+import io
+import sys
+import time
+import subprocess
+import datetime
+import threading
 import unittest
 import avb
 
 import avb.utils
+import avb.refscan
+import avb.query
+import avb.instrument
+import avb.shm
+import avb.binview
+from avb.blockio import BlockCacheReader
 
 test_file_01 = os.path.join(os.path.dirname(__file__), 'test_files', 'test_file_01.avb')
 
@@ -29,6 +41,561 @@ class TestRead(unittest.TestCase):
                     item = f.read_object(i)
                     # print(item)
 
+    def test_read_compact(self):
+        with avb.open(test_file_01, compact=True) as f:
+            for i, chunk in enumerate(f.chunks()):
+                if chunk.class_id in  avb.utils.AVBClaseID_dict:
+                    item = f.read_object(i)
+                    if isinstance(item, avb.core.AVBObject):
+                        assert isinstance(item.property_data, avb.core.AVBPropertySlots)
+
+            for mob in f.content.mobs:
+                for track in mob.tracks:
+                    assert hasattr(track, 'component') == ('component' in track.property_data)
+                    assert not hasattr(track, 'filler_proxy') or 'filler_proxy' in track.property_data
+
+            assert not f.modified_objects
+
+    def test_interned_strings(self):
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext) as f:
+                seen = {}
+                objects = []
+                for i, chunk in enumerate(f.chunks()):
+                    if chunk.class_id in (b'SEQU', b'SCLP', b'FILL', b'TKFX', b'CMPO'):
+                        obj = f.read_object(i)
+                        objects.append(obj)
+                        for key in ('name', 'effect_id'):
+                            value = obj.property_data.get(key, None)
+                            if value:
+                                assert seen.setdefault(value, value) is value
+
+                assert seen
+                assert set(seen).issubset(set(f.string_table.values()))
+
+    def test_plain_references(self):
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext, compact=True) as f:
+                for i, chunk in enumerate(f.chunks()):
+                    if chunk.class_id not in avb.utils.AVBClaseID_dict:
+                        continue
+                    obj = f.read_object(i)
+                    if isinstance(obj, avb.components.Sequence):
+                        assert all(isinstance(v, int) for v in list.__iter__(obj.components))
+
+                    if not isinstance(obj, avb.core.AVBObject):
+                        continue
+
+                    data = obj.property_data
+                    for j, value in enumerate(data.slots):
+                        if data.layout.refs & (1 << j):
+                            assert not isinstance(value, avb.utils.AVBObjectRef)
+
+                    if data.get('descriptor') is not None:
+                        ref = obj.get_ref('descriptor')
+                        assert ref.value is obj.descriptor
+                        assert f.read_chunk(ref.index).class_id == obj.descriptor.class_id
+
+    def test_prefetch(self):
+        with avb.open(test_file_01) as a:
+            with avb.open(test_file_01) as b:
+                assert not b.prefetch_refs
+                a.prefetch_refs = True
+                indices = [i for i, chunk in enumerate(a.chunks()) if chunk.class_id == b'SEQU']
+                assert indices
+
+                sequences = a.read_objects(list(reversed(indices)) + [0])
+                assert sequences[-1] is None
+                for index, seq in zip(reversed(indices), sequences):
+                    assert seq.instance_id == index
+                    other = b.read_object(index)
+                    items = list(seq.components)
+                    assert [c.instance_id for c in items] == [c.instance_id for c in other.components]
+                    # items are not pinned by the list, only by the caller
+                    assert all(isinstance(v, int) for v in list.__iter__(seq.components))
+                    assert all(isinstance(v, int) for v in list.__iter__(other.components))
+                    assert all(c is a.object_cache.get(c.instance_id) for c in items)
+
+                assert not a.modified_objects
+
+                # long lists are read a window at a time
+                seq = max(sequences[:-1], key=lambda seq: len(seq.components))
+                assert len(seq.components) > 2
+                windows = []
+                read_objects = a.read_objects
+                def counting_read_objects(indices, *args, **kwargs):
+                    windows.append(len(indices))
+                    return read_objects(indices, *args, **kwargs)
+                a.read_objects = counting_read_objects
+                window = avb.core.PREFETCH_WINDOW
+                avb.core.PREFETCH_WINDOW = 2
+                try:
+                    items = list(seq.components)
+                finally:
+                    avb.core.PREFETCH_WINDOW = window
+                    del a.read_objects
+                assert [c.instance_id for c in items] == list(list.__iter__(seq.components))
+                assert max(windows) <= 2
+                assert sum(windows) == len(items)
+
+    def test_block_cache_reader(self):
+        with open(test_file_01, 'rb') as f:
+            data = f.read()
+
+        reader = BlockCacheReader(io.BytesIO(data), block_size=1024, cache_blocks=8)
+        for pos, size in ((0, 10), (1000, 100), (1020, 2000), (5000, 1), (0, 10000), (len(data) - 5, 5)):
+            assert reader.read(pos, size) == data[pos:pos+size]
+
+        reader.prefetch([(30000, 10), (31000, 3000)])
+        reads = reader.stats.reads
+        assert reader.read(31000, 3000) == data[31000:34000]
+        assert reader.stats.reads == reads
+        assert len(reader.blocks) <= 8
+
+    def test_read_block_cache(self):
+        reader = lambda f: BlockCacheReader(f, block_size=4096, cache_blocks=16)
+        with avb.open(test_file_01, reader=reader) as a:
+            with avb.open(test_file_01) as b:
+                for i, chunk in enumerate(a.chunks()):
+                    assert chunk.read() == b.read_chunk(i).read()
+                    if chunk.class_id in avb.utils.AVBClaseID_dict:
+                        assert type(a.read_object(i)) is type(b.read_object(i))
+
+                stats = a.reader.stats
+                assert stats.cache_hits
+                assert stats.reads < b.reader.stats.reads
+
+    def test_ref_offsets(self):
+        with avb.open(test_file_01) as f:
+            for i, chunk in enumerate(f.chunks()):
+                if i == 0 or chunk.class_id not in avb.utils.AVBClaseID_dict:
+                    continue
+                class_id, data = f.read_chunk_data(i)
+                offsets = avb.refscan.python_ref_offsets(class_id, data)
+                if avb.refscan.native_ref_offsets and class_id in f.fast_readers:
+                    assert avb.refscan.native_ref_offsets(class_id, data) == offsets
+                if class_id in avb.refscan.SCANNERS:
+                    assert avb.refscan.SCANNERS[class_id](data) == offsets
+
+                refs = avb.refscan.chunk_refs(f, class_id, data)
+                assert len(refs) == len(offsets)
+                assert all(0 <= ref < len(f.object_positions) for ref in refs)
+
+    def test_referrers(self):
+        with avb.open(test_file_01) as f:
+            index = f.reference_index()
+            assert len(index) == len(f.object_positions)
+            assert f.unreachable_objects() == []
+            assert f.referrers(f.root_index) == []
+            assert index.unknown == []
+
+            for i in range(1, len(index)):
+                for ref in index.references(i):
+                    assert i in f.referrers(ref)
+                for ref in f.referrers(i):
+                    assert i in index.references(ref)
+
+            # only the root object is decoded
+            assert len(f.object_cache) == 1
+
+            for mob in f.content.mobs:
+                for track in mob.tracks:
+                    if track.component is not None:
+                        assert mob.instance_id in f.referrers(track.component.instance_id)
+
+    def test_iter_locators(self):
+        expected = []
+        with avb.open(test_file_01) as f:
+            for mob in f.content.mobs:
+                descriptor = mob.property_data.get('descriptor', None)
+                locator = getattr(descriptor, 'locator', None) if descriptor is not None else None
+                if locator is not None:
+                    expected.append((locator.instance_id, mob.mob_id))
+
+        with avb.open(test_file_01) as f:
+            records = list(f.iter_locators())
+            # no reference index is built and no mob is decoded
+            assert f.ref_index is None
+            assert not any(obj.class_id == b'CMPO' for obj in f.object_cache.values())
+            indices = [fields['index'] for mob_id, fields in records]
+            assert indices == sorted(indices)
+
+            found = [(fields['index'], mob_id) for mob_id, fields in records]
+            for item in expected:
+                assert item in found
+
+            for mob_id, fields in records:
+                locator = f.read_object(fields['index'])
+                assert locator.class_id == fields['class_id']
+                if fields['class_id'] == b'MSML':
+                    assert fields['mob_id'] == locator.mob_id
+                else:
+                    assert fields['path'] == locator.path
+
+    def test_mob_graph(self):
+        with avb.open(test_file_01) as f:
+            graph = f.content.mob_graph()
+            assert graph is f.content.mob_graph()
+            order = [mob.mob_id for mob in graph.topological_order()]
+            assert len(order) == len(set(order)) == len(graph)
+
+            for mob in f.content.mobs:
+                expected = set()
+                stack = [mob]
+                while stack:
+                    item = stack.pop()
+                    for obj in avb.core.walk_references(item):
+                        if isinstance(obj, avb.components.SourceClip):
+                            ref_mob = obj.mob
+                            if ref_mob and ref_mob.mob_id not in expected:
+                                expected.add(ref_mob.mob_id)
+                                stack.append(ref_mob)
+                expected.discard(mob.mob_id)
+
+                closure = [m.mob_id for m in mob.dependant_mobs()]
+                assert set(closure) == expected
+                assert len(closure) == len(expected)
+
+                for m in graph.dependencies(mob.mob_id):
+                    assert mob in graph.referrers(m.mob_id)
+                    assert order.index(m.mob_id) < order.index(mob.mob_id)
+                    for dep in graph.closure(m.mob_id):
+                        assert closure.index(dep.mob_id) < closure.index(m.mob_id)
+
+        # retargeting a source clip in place invalidates the cached graph
+        with avb.open(test_file_01) as f:
+            graph = f.content.mob_graph()
+            mob = next(m for m in f.content.mobs if graph.dependencies(m.mob_id))
+            clips = [obj for obj in avb.core.walk_references(mob)
+                     if isinstance(obj, avb.components.SourceClip) and obj.mob_id in graph]
+            target = next(m for m in f.content.mastermobs()
+                          if m.mob_id not in set(c.mob_id for c in clips) and m.mob_id != mob.mob_id)
+            for clip in clips:
+                clip.mob_id = target.mob_id
+
+            assert f.content.cached_mob_graph() is None
+            assert [m.mob_id for m in f.content.mob_graph().dependencies(mob.mob_id)] == [target.mob_id]
+            assert target.mob_id in [m.mob_id for m in mob.dependant_mobs()]
+
+    def test_threaded_reads(self):
+        with avb.open(test_file_01) as f:
+            expected = {}
+            for i, chunk in enumerate(f.chunks()):
+                if chunk.class_id in avb.utils.AVBClaseID_dict:
+                    expected[i] = (chunk.class_id, chunk.read())
+        indices = sorted(expected)
+
+        reader = lambda f: BlockCacheReader(f, block_size=4096, cache_blocks=4)
+        for kwargs in ({}, {'reader': reader}, {'use_ext': False}):
+            with avb.open(test_file_01, **kwargs) as f:
+                errors = []
+                results = [{} for i in range(8)]
+
+                def work(n):
+                    try:
+                        result = results[n]
+                        for i in indices[n::2] + indices[n::3]:
+                            class_id, data = f.read_chunk_data(i)
+                            assert (class_id, bytes(data)) == expected[i]
+                            obj = f.read_object(i)
+                            assert obj.class_id == class_id
+                            result[i] = obj
+                        assert not f.reading
+                    except Exception as e:
+                        errors.append(e)
+
+                threads = [threading.Thread(target=work, args=(n,)) for n in range(len(results))]
+                for t in threads:
+                    t.start()
+                for t in threads:
+                    t.join()
+
+                assert errors == []
+                assert not f.modified_objects
+                for result in results:
+                    for i, obj in result.items():
+                        assert f.read_object(i) is obj
+
+    @unittest.skipIf(avb.shm.shared_memory is None, "multiprocessing.shared_memory not available")
+    def test_shared_memory(self):
+        with avb.open(test_file_01) as a:
+            with avb.shm.publish(a) as published:
+                shared = avb.shm.attach(published.name)
+                assert shared.object_count == len(a.object_positions)
+                assert list(shared.object_positions) == list(a.object_positions)
+                assert shared.mob_count == len(list(a.content.mobs))
+
+                for i in range(1, shared.object_count):
+                    assert shared.class_id(i) == a.read_chunk(i).class_id
+                assert shared.indices([b'ABIN']) == [a.root_index]
+
+                with shared.open() as b:
+                    assert b.object_positions is shared.object_positions
+                    compare_mobs = [(mob.mob_id, mob.name, mob.instance_id) for mob in b.content.mobs]
+                    assert compare_mobs == [(mob.mob_id, mob.name, mob.instance_id) for mob in a.content.mobs]
+
+                    for mob in a.content.mobs:
+                        index = shared.mob_index(mob.mob_id)
+                        assert index == mob.instance_id
+                        assert b.read_object(index).mob_id == mob.mob_id
+                        assert b.read_chunk_data(index) == a.read_chunk_data(index)
+
+                    assert sorted(i for mob_id, i in shared.iter_mob_ids()) == \
+                        sorted(mob.instance_id for mob in a.content.mobs)
+                    assert shared.mob_index(avb.mobid.MobID.new()) is None
+
+                shared.close()
+
+                # a process attaching to the block does not unlink it when it exits
+                # the resource tracker of the child is stopped to let it clean up before the check
+                code = ("import avb.shm; avb.shm.attach(%r).close(); "
+                        "from multiprocessing import resource_tracker; "
+                        "resource_tracker._resource_tracker._stop()" % published.name)
+                env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+                subprocess.check_call([sys.executable, '-c', code], env=env)
+                avb.shm.attach(published.name).close()
+
+    def test_timestamps(self):
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext) as f:
+                assert isinstance(f.last_save, datetime.datetime)
+                assert f.last_save == datetime.datetime.fromtimestamp(f.last_save_timestamp)
+
+                mobs = list(f.content.mobs)
+                for mob in mobs:
+                    raw = mob.property_data.get('last_modified')
+                    assert isinstance(raw, int)
+                    assert mob.last_modified == datetime.datetime.fromtimestamp(raw)
+                    assert mob.last_modified_timestamp == raw
+                    if 'creation_time' in mob.property_data:
+                        assert mob.creation_time == datetime.datetime.fromtimestamp(mob.creation_timestamp)
+
+                times = sorted(mob.last_modified_timestamp for mob in mobs)
+                middle = times[len(times) // 2]
+                expected = sorted(mob.instance_id for mob in mobs if mob.last_modified_timestamp >= middle)
+                assert sorted(mob.instance_id for mob in f.content.modified_since(middle)) == expected
+                assert sorted(mob.instance_id for mob in f.content.modified_since(
+                    datetime.datetime.fromtimestamp(middle))) == expected
+
+                mob = mobs[0]
+                del mob.property_data['creation_time']
+                with self.assertRaises(AttributeError):
+                    mob.creation_time
+                del mob.property_data['last_modified']
+                with self.assertRaises(AttributeError):
+                    mob.last_modified
+
+                now = datetime.datetime.now().replace(microsecond=0)
+                mob.last_modified = now
+                assert mob.last_modified == now
+                assert mob.last_modified_timestamp == int(time.mktime(now.timetuple()))
+
+        # only the matching mobs are decoded
+        with avb.open(test_file_01) as f:
+            last = max(f.content.modified_since(0), key=lambda mob: mob.last_modified_timestamp)
+            timestamp = last.last_modified_timestamp
+            del last
+            assert all(mob.last_modified_timestamp >= timestamp for mob in f.content.modified_since(timestamp))
+            cached = [obj for obj in f.object_cache.values() if obj.class_id == b'CMPO']
+            assert all(mob.last_modified_timestamp >= timestamp for mob in cached)
+
+            # mobs created after the file was read are included
+            mob = f.create.Composition(mob_type="MasterMob")
+            f.content.add_mob(mob)
+            assert list(f.content.modified_since(timestamp))[-1] is mob
+            assert mob not in list(f.content.modified_since(mob.last_modified_timestamp + 1))
+
+        with avb.open() as f:
+            mob = f.create.Composition(mob_type="MasterMob")
+            f.content.add_mob(mob)
+            assert list(f.content.modified_since(mob.last_modified)) == [mob]
+
+    def test_frozen_mob_ids(self):
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext) as f:
+                for mob in f.content.mobs:
+                    mob_id = mob.mob_id
+                    assert isinstance(mob_id, avb.mobid.FrozenMobID)
+                    copy = avb.mobid.MobID(mob_id.urn)
+                    assert copy == mob_id and mob_id == copy
+                    assert hash(copy) == hash(mob_id)
+                    assert mob_id.urn is mob_id.urn
+                    assert mob_id.frozen() is mob_id
+                    assert copy.frozen() == mob_id
+                    assert f.content.find_by_mob_id(copy) is mob
+
+                    # fields are read like the ones of a MobID
+                    assert mob_id.int == copy.int
+                    assert mob_id.length == copy.length
+                    assert mob_id.material == copy.material
+
+                    with self.assertRaises(AttributeError):
+                        mob_id.length = 0x33
+
+    def test_stats(self):
+        stats = avb.instrument.FileStats()
+        with avb.open(test_file_01, stats=stats) as f:
+            assert f.stats is stats
+            assert stats.header_time > 0
+            assert stats.cache_misses == 1
+            for i in range(1, len(f.object_positions)):
+                f.read_object(i)
+
+            total = stats.totals()
+            assert total.decode_count == len(f.object_positions) - 1
+            assert total.fast_path + total.slow_path == total.decode_count
+            if f.fast_readers:
+                assert total.fast_path > 0
+            assert stats.cache_misses + stats.cache_hits == total.decode_count + 1
+            assert stats.seeks > 0
+            assert stats.bytes_read >= total.bytes_decoded
+
+            mob_count = len(list(f.content.mobs))
+            assert stats.classes[b'CMPO'].decode_count >= mob_count
+
+            total = stats.totals()
+            f.disable_stats()
+            assert f.stats is None
+            assert 'read_object' not in f.__dict__
+            f.read_object(1)
+            assert stats.totals().decode_count == total.decode_count
+
+        with avb.open(test_file_01, use_ext=False) as f:
+            with f.profile() as stats:
+                list(f.content.mobs)
+                f.write(os.path.join(os.path.dirname(__file__), 'results', 'stats.avb'))
+            assert f.stats is None
+            total = stats.totals()
+            assert total.fast_path == 0
+            assert total.slow_path == total.decode_count > 0
+            assert total.encode_count > len(list(f.content.mobs))
+            assert stats.report()
+
+    def test_select(self):
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext) as f:
+                mobs = list(f.content.mobs)
+                times = sorted(mob.last_modified_timestamp for mob in mobs)
+                middle = datetime.datetime.fromtimestamp(times[len(times) // 2])
+                queries = [
+                    ({'usage_code': 0}, lambda mob: mob.usage_code == 0),
+                    ([('mob_type', '==', 'MasterMob'), ('name', 'icontains', 'a')],
+                     lambda mob: mob.mob_type == 'MasterMob' and 'a' in mob.name.lower()),
+                    (('last_modified', '>=', middle), lambda mob: mob.last_modified >= middle),
+                    (('mob_type', 'in', ['SourceMob']), lambda mob: mob.mob_type == 'SourceMob'),
+                    (lambda mob: len(mob.tracks) > 1, lambda mob: len(mob.tracks) > 1),
+                ]
+                for where, test in queries:
+                    expected = sorted(mob.instance_id for mob in mobs if test(mob))
+                    assert expected
+                    result = [mob.instance_id for mob in f.select(b'CMPO', where=where)]
+                    assert result == expected
+                    assert sorted(mob.instance_id for mob in f.content.select(where)) == expected
+
+                mob_id = mobs[3].mob_id
+                assert list(f.select(b'CMPO', where={'mob_id': mob_id})) == [mobs[3]]
+
+                descriptors = list(f.select((b'CDCI', b'MDES'), where=('resolution_id', '!=', None)))
+                assert descriptors
+                assert all(d.class_id == b'CDCI' for d in descriptors)
+
+                # modified and new objects are tested as they are in memory
+                mobs[0].name = u"Selected"
+                mob = f.create.Composition(mob_type="MasterMob")
+                mob.name = u"Selected too"
+                assert list(f.select(b'CMPO', where=('name', 'startswith', u'Selected'))) == [mobs[0], mob]
+
+                # mobs added to the bin are selected from memory
+                f.content.add_mob(mob)
+                assert list(f.content.select(('name', 'startswith', u'Selected'))) == [mobs[0], mob]
+                assert list(f.content.select({'mob_type': 'MasterMob'}))[-1] is mob
+
+        # files without chunks are selected from memory
+        with avb.open() as f:
+            mob = f.create.Composition(mob_type="MasterMob")
+            mob.name = u"New"
+            f.content.add_mob(mob)
+            assert list(f.content.select({'name': u"New"})) == [mob]
+            assert list(f.select(b'CMPO', where={'mob_type': 'MasterMob'})) == [mob]
+            assert list(f.select(b'CMPO', where={'mob_type': 'SourceMob'})) == []
+
+        # only matching chunks are decoded by the native readers
+        if avb.query.match_chunk is not None:
+            with avb.open(test_file_01) as f:
+                with f.profile() as stats:
+                    result = list(f.select(b'CMPO', where={'mob_type': 'MasterMob'}))
+                assert stats.classes[b'CMPO'].decode_count == len(result)
+
+    def test_bin_table(self):
+        with avb.open(test_file_01) as f:
+            mobs = list(f.content.mobs)
+            table = f.content.table()
+            assert len(table) == len(mobs)
+            assert table.column('Name') == [mob.name for mob in mobs]
+            assert table.column('Duration') == [mob.length for mob in mobs]
+            assert table.column('Creation Date') == [mob.creation_timestamp for mob in mobs]
+
+            rows = table.sort([[1, 'Duration'], [0, 'Name']])
+            expected = sorted(range(len(mobs)), key=lambda i: (-mobs[i].length, mobs[i].name.lower()))
+            assert rows == expected
+
+            rows = table.sift([(avb.binview.SIFT_CONTAINS, 'DUST', 'Name')])
+            assert rows == [i for i, mob in enumerate(mobs) if 'dust' in mob.name.lower()]
+            assert table.sift([(avb.binview.SIFT_EXACT, mobs[0].name, 'Any')])[0] == 0
+            assert table.sift([(avb.binview.SIFT_BEGINS_WITH, 'zzz', 'Name')]) == []
+
+            f.content.sifted = True
+            f.content.sifted_settings[0].string = u'dust'
+            f.content.sifted_settings[0].column = u'Name'
+            f.content.sort_columns = [[0, 'Name']]
+            view = f.content.view_mobs()
+            assert [mob.name for mob in view] == sorted((mob.name for mob in mobs if 'dust' in mob.name.lower()),
+                                                         key=lambda name: name.lower())
+
+            # only new and modified mobs are computed again
+            names = table.column('Name')
+            mob = f.create.Composition(mob_type="MasterMob")
+            mob.name = u"dust new"
+            f.content.add_mob(mob)
+            mobs[1].name = u"dust renamed"
+            assert f.content.table() is table
+            assert len(table) == len(mobs) + 1
+            assert table.column('Name')[-1] == u"dust new"
+            assert table.column('Name')[1] == u"dust renamed"
+            assert table.column('Name')[2:-1] == names[2:]
+            assert mob in f.content.view_mobs()
+
+            # rows are not computed again once they are current
+            computed = []
+            compute = table.compute
+            table.compute = lambda title, rows: computed.extend(rows) or compute(title, rows)
+            f.content.table()
+            assert computed == []
+
+            # tracks are stored in the chunk of their mob
+            row = next(i for i, value in enumerate(table.column('Tracks')) if value)
+            track = table.mob(row).tracks[0]
+            track.index = 9
+            assert f.content.table().column('Tracks')[row] == avb.binview.track_summary(table.mob(row))
+            assert computed == [row] * len(table.titles)
+
+            # rows depend on the descriptors of the mobs they take their material from
+            row = next(i for i, value in enumerate(table.column('Video')) if value)
+            sources = list(avb.binview.source_chain(table.mob(row), f.content))
+            descriptor = next(m.descriptor for m in sources[1:] if 'resolution_id' in m.descriptor.property_data)
+            descriptor.resolution_id = 4242
+            del computed[:]
+            assert f.content.table().column('Video')[row] == 4242
+            assert row in computed
+            del computed[:]
+            f.content.table()
+            assert computed == []
+
+    def test_sort_key(self):
+        values = [u'b', None, b'a', 3, u'A', bytearray(b'c'), 1]
+        result = sorted(values, key=avb.binview.sort_key)
+        assert result == [None, 1, 3, u'A', u'b', b'a', bytearray(b'c')]
+
 
 if __name__ == "__main__":
     unittest.main()
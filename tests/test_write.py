@@ -78,6 +78,133 @@ class TestWrite(unittest.TestCase):
             with avb.open(result_file, use_ext=False) as b:
                 compare(a.content, b.content)
 
+    def test_rewrite_all_compact(self):
+
+        result_file = os.path.join(result_dir, 'rewrite_all_compact.avb')
+        with avb.open(test_file_01, compact=True) as f:
+            f.write(result_file)
+
+        for use_ext in (True, False):
+            with avb.open(test_file_01, use_ext=use_ext) as a:
+                with avb.open(result_file, use_ext=use_ext, compact=True) as b:
+                    compare(a.content, b.content)
+                    compare(b.content, a.content)
+
+    def test_write_compacted(self):
+        result_file = os.path.join(result_dir, 'write_compacted.avb')
+        with avb.open(test_file_01) as f:
+            stats = f.write_compacted(result_file)
+            assert stats['objects_dropped'] == 0
+            assert stats['bytes_reclaimed'] == 0
+
+        with avb.open(test_file_01) as a:
+            with avb.open(result_file) as b:
+                compare(a.content, b.content)
+
+        # make a single mob the root, everything else becomes unreachable
+        result_file = os.path.join(result_dir, 'write_compacted_mob.avb')
+        with avb.open(test_file_01) as f:
+            mob = list(f.content.compositionmobs())[0]
+            mob_index = mob.instance_id
+            f.root_index = mob_index
+            stats = f.write_compacted(result_file)
+            assert stats['objects_written'] < stats['objects_before']
+            assert stats['objects_dropped'] == len(f.unreachable_objects())
+            assert stats['bytes_reclaimed'] > 0
+            assert stats['bytes_written'] < stats['bytes_before']
+
+        with avb.open(test_file_01) as a:
+            with avb.open(result_file) as b:
+                assert b.unreachable_objects() == []
+                assert len(b.object_positions) - 1 == stats['objects_written']
+                compare(a.read_object(mob_index), b.content)
+
+        with avb.open(test_file_01) as f:
+            for mob in f.content.compositionmobs():
+                mob.name = u"Cow"
+            with self.assertRaises(ValueError):
+                f.write_compacted(result_file)
+
+        # the indices stored in a chunk of an unknown class can not be renumbered
+        with avb.open(test_file_01) as f:
+            index = f.reference_index()
+            index.unknown = [f.root_index]
+            with self.assertRaises(ValueError):
+                f.write_compacted(result_file)
+
+    def test_snapshot(self):
+        source_file = os.path.join(result_dir, 'snapshot_source.avb')
+        snapshot_file = os.path.join(result_dir, 'snapshot.snap')
+        with open(test_file_01, 'rb') as src:
+            with open(source_file, 'wb') as dst:
+                dst.write(src.read())
+
+        for compact in (False, True):
+            with avb.open(source_file, compact=compact) as f:
+                f.save_snapshot(snapshot_file)
+
+            with avb.open(source_file) as a:
+                with avb.load_snapshot(snapshot_file, compact=compact) as b:
+                    assert len(b.pinned_objects) == len(a.object_positions) - 1
+                    assert list(b.object_positions) == list(a.object_positions)
+                    compare(a.content, b.content)
+                    compare(b.content, a.content)
+                    assert not b.modified_objects
+
+                    # references are restored as plain indices, as the readers store them
+                    for mob in b.content.compositionmobs():
+                        for track in mob.tracks:
+                            assert isinstance(track.get_ref('component'), avb.utils.AVBObjectRef)
+                            if isinstance(track.component, avb.components.Sequence):
+                                items = list(list.__iter__(track.component.components))
+                                assert all(isinstance(item, int) for item in items)
+
+                    result_file = os.path.join(result_dir, 'snapshot_rewrite.avb')
+                    b.write(result_file)
+
+            with avb.open(test_file_01) as a:
+                with avb.open(result_file) as b:
+                    compare(a.content, b.content)
+
+        # a changed source file is parsed again
+        st = os.stat(source_file)
+        os.utime(source_file, (st.st_atime, st.st_mtime + 10))
+        with avb.load_snapshot(snapshot_file) as f:
+            assert f.pinned_objects is None
+            assert len(list(f.content.mobs)) == 160
+
+    def test_bin_items(self):
+        result_file = os.path.join(result_dir, 'bin_items.avb')
+        with avb.open(test_file_01) as f:
+            items = f.content.items
+            assert isinstance(items, avb.bin.BinItemList)
+            mob_ids = [mob.mob_id for mob in f.content.mobs]
+            # mobs are resolved from the table, no BinItems are created
+            assert list(list.__iter__(items)).count(None) == len(items)
+
+            items[0].x = 123
+            items[-1].user_placed = False
+            rows = [items.row(i) for i in range(len(items))]
+            assert list(list.__iter__(items)).count(None) == len(items) - 2
+
+            mob = f.create.Composition(mob_type="CompositionMob")
+            mob.name = u"Table"
+            f.content.add_mob(mob)
+            f.write(result_file)
+
+        with avb.open(result_file) as f:
+            items = f.content.items
+            assert len(items) == len(rows) + 1
+            assert items[0].x == 123
+            assert items[len(rows) - 1].user_placed is False
+            assert [items.row(i)[1:] for i in range(len(rows))] == [row[1:] for row in rows]
+            assert [mob.mob_id for mob in f.content.mobs][:-1] == mob_ids
+            assert items[-1].mob.name == u"Table"
+
+            items.reverse()
+            assert items[0].mob.name == u"Table"
+            assert all(item is not None for item in list.__iter__(items))
+
     def test_rewrite_all_be(self):
 
         result_file = os.path.join(result_dir, 'rewrite_be.avb')